@@ -0,0 +1,269 @@
+"""memory-mapped index of current aliases for read-only instances
+
+Looking up an alias in aliases.sqlite3 requires a B-tree search, row
+conversion, and namespace translation for every lookup.  Snapshots
+never change, so `seqrepo snapshot --alias-index` precomputes an
+open-addressing hash table of every current alias and stores it in
+aliases.idx next to aliases.sqlite3.  SeqRepo memory-maps the file, so
+lookups read a few pages that are shared by all processes on a host.
+
+File layout (all integers little-endian):
+
+* header: magic, fingerprint of aliases.sqlite3 and
+  sequences/db.sqlite3 (size and sqlite file change counter of each),
+  number of slots, number of sequences, and offsets of the sections
+  that follow
+* slots: n_slots (a power of 2) slots of (hash: u64, value: i32,
+  key offset: u64, key length: u32); hash 0 marks an empty slot
+* sequence offsets: n_seqs + 1 u64 offsets into the string section
+* strings: for each sequence, "seq_id\\tlen\\talpha\\tadded\\trelpath" (utf-8)
+* keys: the utf-8 key of each slot, at its offset
+
+SeqRepo adds the sequence info of indexed aliases to FastaDir's
+seqinfo cache, so fetches by alias do not query sequences/db.sqlite3.
+
+Keys are "namespace\\talias" for each current alias (with namespaces
+as stored in the database) and "\\talias" for each alias without
+namespace.  Values are sequence numbers, or ambiguous (-1) for aliases
+without namespace that refer to more than one sequence.  Lookups
+compare keys, so keys whose hashes collide are probed past like any
+other occupied slot.
+
+The table is built in the index file through a writable memory map
+rather than in memory, but every alias is hashed and inserted by
+Python, so building takes time proportional to the number of aliases.
+
+"""
+
+import datetime
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+from typing import Optional
+
+_logger = logging.getLogger(__name__)
+
+index_filename = "aliases.idx"
+
+_magic = b"SRAIDX03"
+_header = struct.Struct("<8s4Q5Q")
+_slot = struct.Struct("<QiQI")
+_seq_offset = struct.Struct("<Q")
+max_load_factor = 0.7
+
+ambiguous = -1
+
+
+def _hash(key: bytes) -> int:
+    h = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+    return h or 1  # 0 marks empty slots
+
+
+def _fingerprint(root_dir: str) -> tuple[int, int, int, int]:
+    """return (size, change counter) for aliases.sqlite3 and sequences/db.sqlite3
+
+    sqlite increments the change counter (bytes 24-27 of the header)
+    on every write transaction.
+    """
+    fp: list[int] = []
+    for rp in ("aliases.sqlite3", os.path.join("sequences", "db.sqlite3")):
+        path = os.path.join(root_dir, rp)
+        with open(path, "rb") as f:
+            f.seek(24)
+            fp += [os.path.getsize(path), int.from_bytes(f.read(4), "big")]
+    return fp[0], fp[1], fp[2], fp[3]
+
+
+class AliasIndex:
+    """read-only, memory-mapped index of current aliases
+
+    Use AliasIndex.open(root_dir), which returns None if the index
+    doesn't exist or doesn't match the databases.
+
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            *fingerprint,
+            self._n_slots,
+            self._n_seqs,
+            self._seq_offsets_pos,
+            self._strings_pos,
+            self._keys_pos,
+        ) = _header.unpack_from(self._mm, 0)
+        if magic != _magic:
+            self.close()
+            raise ValueError(f"{path}: not a seqrepo alias index")
+        self.fingerprint = tuple(fingerprint)
+        self._mask = self._n_slots - 1
+
+    @classmethod
+    def open(cls, root_dir: str) -> Optional["AliasIndex"]:
+        """return the AliasIndex for root_dir if it exists and is current, else None"""
+        path = os.path.join(root_dir, index_filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            ai = cls(path)
+        except ValueError:
+            _logger.warning(f"{path} is not a current alias index; ignoring it")
+            return None
+        if ai.fingerprint != _fingerprint(root_dir):
+            _logger.warning(f"{path} is out of date with databases; ignoring it")
+            ai.close()
+            return None
+        _logger.info(f"Using alias index {path}")
+        return ai
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def lookup(self, alias: str, namespace: Optional[str] = None) -> Optional[int]:
+        """return sequence number for alias (and namespace, as stored in the
+        database), `ambiguous` if alias refers to more than one sequence,
+        or None if the alias is not current"""
+        key = ((namespace or "") + "\t" + alias).encode()
+        h = _hash(key)
+        i = h & self._mask
+        while True:
+            slot_h, value, key_offset, key_len = _slot.unpack_from(
+                self._mm, _header.size + i * _slot.size
+            )
+            if slot_h == 0:
+                return None
+            if slot_h == h and key_len == len(key):
+                pos = self._keys_pos + key_offset
+                if self._mm[pos : pos + key_len] == key:
+                    return value
+            i = (i + 1) & self._mask
+
+    def seqinfo(self, i: int) -> dict:
+        """return dict of seq_id, len, alpha, added, and relpath for
+        sequence number i, as FastaDir.fetch_seqinfo() does"""
+        start, end = struct.unpack_from("<QQ", self._mm, self._seq_offsets_pos + i * 8)
+        seq_id, len_, alpha, added, relpath = (
+            self._mm[self._strings_pos + start : self._strings_pos + end].decode().split("\t")
+        )
+        return {
+            "seq_id": seq_id,
+            "len": int(len_) if len_ else None,
+            "alpha": alpha,
+            "added": datetime.datetime.fromisoformat(added) if added else None,
+            "relpath": relpath,
+        }
+
+    def seq_id(self, i: int) -> str:
+        return self.seqinfo(i)["seq_id"]
+
+    def __len__(self) -> int:
+        return self._n_seqs
+
+
+def build_alias_index(root_dir: str) -> str:
+    """build aliases.idx for the seqrepo instance in root_dir; returns its path
+
+    The databases must not change afterward; indexes are intended for
+    snapshots.
+
+    """
+    path = os.path.join(root_dir, index_filename)
+    fingerprint = _fingerprint(root_dir)
+    db = sqlite3.connect(os.path.join(root_dir, "aliases.sqlite3"))
+    db.execute("attach database ? as seqdb", (os.path.join(root_dir, "sequences", "db.sqlite3"),))
+
+    # number sequences that have current aliases
+    db.execute(
+        """create temp table seqnum (
+        i integer primary key, seq_id text unique not null, len int, alpha text, added text,
+        relpath text)"""
+    )
+    db.execute(
+        """insert into temp.seqnum (seq_id, len, alpha, added, relpath)
+        select q.seq_id, si.len, si.alpha, si.added, si.relpath
+        from (select distinct seq_id from seqalias where is_current = 1) q
+        left join seqdb.seqinfo si on si.seq_id = q.seq_id
+        order by q.seq_id"""
+    )
+    n_seqs = db.execute("select count(*) from temp.seqnum").fetchone()[0]
+    n_keys = db.execute(
+        """select (select count(*) from seqalias where is_current = 1)
+        + (select count(distinct alias) from seqalias where is_current = 1)"""
+    ).fetchone()[0]
+    n_slots = 1 << max(4, int(n_keys / max_load_factor).bit_length())
+    mask = n_slots - 1
+    seq_offsets_pos = _header.size + n_slots * _slot.size
+    strings_pos = seq_offsets_pos + (n_seqs + 1) * _seq_offset.size
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w+b") as f, tempfile.TemporaryFile() as keys_f:
+        # slots are filled in place; the OS writes pages back as needed
+        f.truncate(strings_pos)
+        slots = mmap.mmap(f.fileno(), seq_offsets_pos)
+        keys_len = 0
+
+        def _insert(key: str, value: int) -> None:
+            nonlocal keys_len
+            kb = key.encode()
+            h = _hash(kb)
+            i = h & mask
+            while _slot.unpack_from(slots, _header.size + i * _slot.size)[0] != 0:
+                i = (i + 1) & mask
+            _slot.pack_into(slots, _header.size + i * _slot.size, h, value, keys_len, len(kb))
+            keys_f.write(kb)
+            keys_len += len(kb)
+
+        for namespace, alias, i in db.execute(
+            """select sa.namespace, sa.alias, s.i - 1 from seqalias sa
+            join temp.seqnum s on s.seq_id = sa.seq_id where sa.is_current = 1"""
+        ):
+            _insert(namespace + "\t" + alias, i)
+        for alias, i, n in db.execute(
+            """select sa.alias, min(s.i) - 1, count(distinct s.i) from seqalias sa
+            join temp.seqnum s on s.seq_id = sa.seq_id where sa.is_current = 1
+            group by sa.alias"""
+        ):
+            _insert("\t" + alias, i if n == 1 else ambiguous)
+        slots.flush()
+        slots.close()
+
+        f.seek(seq_offsets_pos)
+        strings_len = 0
+        f.write(_seq_offset.pack(0))
+        with tempfile.TemporaryFile() as strings_f:
+            for seq_id, len_, alpha, added, relpath in db.execute(
+                "select seq_id, len, alpha, added, relpath from temp.seqnum order by i"
+            ):
+                sb = "\t".join((
+                    seq_id,
+                    "" if len_ is None else str(len_),
+                    alpha or "",
+                    added or "",
+                    relpath or "",
+                )).encode()
+                strings_f.write(sb)
+                strings_len += len(sb)
+                f.write(_seq_offset.pack(strings_len))
+            strings_f.seek(0)
+            shutil.copyfileobj(strings_f, f)
+        keys_pos = strings_pos + strings_len
+        keys_f.seek(0)
+        shutil.copyfileobj(keys_f, f)
+
+        f.seek(0)
+        f.write(
+            _header.pack(
+                _magic, *fingerprint, n_slots, n_seqs, seq_offsets_pos, strings_pos, keys_pos
+            )
+        )
+    db.close()
+    os.rename(tmp_path, path)
+    _logger.info(f"Wrote {path} ({n_keys} keys, {n_seqs} sequences)")
+    return path
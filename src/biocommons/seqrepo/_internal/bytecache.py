@@ -0,0 +1,326 @@
+"""thread-safe caches bounded by the total size of their values
+
+functools.lru_cache bounds the number of entries, which is a poor
+bound when values vary in size from a few residues to a chromosome.
+These caches evict entries when the total size of values, as measured
+by sizeof (len by default), exceeds max_bytes.
+
+Eviction policies:
+
+* lru: evict the least recently used entry (ByteCache)
+* lfu: evict the least frequently used entry, and the least recently
+  used among those (LFUByteCache)
+* tinylfu: evict least recently used entries, but admit a new entry
+  only if it has been requested more often than the entries it would
+  evict (TinyLFUByteCache); this keeps a few large, rarely requested
+  values from flushing many small, popular ones
+
+Use make_byte_cache(max_bytes, policy) to create a cache by policy
+name.  A cache may also be bounded by number of entries (max_entries),
+like lru_cache; approx_sizeof estimates sizes of such values for
+statistics.
+
+"""
+
+import collections
+import sys
+import threading
+from array import array
+from collections.abc import Hashable
+from typing import Any, Callable, Optional
+
+# sentinel for resize() arguments that are not changed
+_unchanged: Any = object()
+
+
+# approx_sizeof estimate for each item of a container, or for a scalar
+approx_item_size = 32
+
+
+def approx_sizeof(value: Any) -> int:
+    """return approximate size of value in bytes: the length of strings
+    and bytes, and approx_item_size per item of other containers
+
+    Values are not traversed or formatted, so that sizing is cheap.
+
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (dict, list, tuple, set)):
+        return approx_item_size * len(value)
+    return approx_item_size
+
+
+class ByteCache:
+    """LRU cache bounded by the total size of values
+
+    max_bytes of None means no bound; 0 disables the cache.  Values
+    larger than max_bytes are not cached.  If max_entries is not None,
+    the number of entries is also bounded.
+
+    >>> c = ByteCache(max_bytes=10)
+    >>> c.put("a", "ACGTAC")
+    >>> c.put("b", "ACGTAC")  # evicts "a"
+    >>> c.get("a"), c.get("b"), c.nbytes
+    (None, 'ACGTAC', 6)
+
+    """
+
+    policy = "lru"
+
+    def __init__(
+        self,
+        max_bytes: Optional[int],
+        sizeof: Callable[[Any], int] = len,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._sizeof = sizeof
+        self._data: collections.OrderedDict[Hashable, tuple[Any, int]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+        self.invalidations = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes != 0 and self.max_entries != 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """return value for key, or default if key is not cached"""
+        with self._lock:
+            self._record(key)
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._touch(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """cache value for key, evicting other entries as needed"""
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            elif not self._admit(key, size):
+                self.rejections += 1
+                return
+            self._data[key] = (value, size)
+            self.nbytes += size
+            self._insert(key)
+            self._evict()
+
+    def clear(self) -> None:
+        """remove all entries and reset statistics"""
+        with self._lock:
+            for key in list(self._data):
+                self._remove(key)
+            self.hits = self.misses = self.evictions = self.rejections = self.invalidations = 0
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """remove keys, or all entries if no keys are given, because the
+        underlying data changed; statistics are kept"""
+        with self._lock:
+            stale = [k for k in keys if k in self._data] if keys else list(self._data)
+            for k in stale:
+                self._remove(k)
+            self.invalidations += len(stale)
+
+    def resize(
+        self, max_bytes: Optional[int] = _unchanged, max_entries: Optional[int] = _unchanged
+    ) -> None:
+        """set max_bytes and/or max_entries, evicting entries as needed"""
+        with self._lock:
+            if max_bytes is not _unchanged:
+                self.max_bytes = max_bytes
+            if max_entries is not _unchanged:
+                self.max_entries = max_entries
+            self._evict()
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "entries": len(self._data),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "rejections": self.rejections,
+            "invalidations": self.invalidations,
+        }
+
+    # policy hooks; called with the lock held
+
+    def _record(self, key: Hashable) -> None:
+        """record a request for key"""
+
+    def _admit(self, key: Hashable, size: int) -> bool:
+        """return True if a new entry should be cached"""
+        return True
+
+    def _insert(self, key: Hashable) -> None:
+        """note that key was added"""
+
+    def _touch(self, key: Hashable) -> None:
+        """note a cache hit for key"""
+        self._data.move_to_end(key)
+
+    def _victim(self) -> Hashable:
+        """return the key to evict next"""
+        return next(iter(self._data))
+
+    def _remove(self, key: Hashable) -> None:
+        _, size = self._data.pop(key)
+        self.nbytes -= size
+
+    def _evict(self) -> None:
+        while (self.max_bytes is not None and self.nbytes > self.max_bytes) or (
+            self.max_entries is not None and len(self._data) > self.max_entries
+        ):
+            self._remove(self._victim())
+            self.evictions += 1
+
+
+class LFUByteCache(ByteCache):
+    """LFU cache bounded by the total size of values
+
+    Entries are kept in buckets by request count; the oldest entry in
+    the lowest bucket is evicted first.  Counts are discarded when an
+    entry is evicted.
+
+    """
+
+    policy = "lfu"
+
+    def __init__(
+        self,
+        max_bytes: Optional[int],
+        sizeof: Callable[[Any], int] = len,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        super().__init__(max_bytes, sizeof, max_entries)
+        self._counts: dict[Hashable, int] = {}
+        self._buckets: dict[int, collections.OrderedDict[Hashable, None]] = {}
+
+    def _insert(self, key: Hashable) -> None:
+        self._counts[key] = 1
+        self._buckets.setdefault(1, collections.OrderedDict())[key] = None
+
+    def _touch(self, key: Hashable) -> None:
+        n = self._counts[key]
+        self._unbucket(key, n)
+        self._counts[key] = n + 1
+        self._buckets.setdefault(n + 1, collections.OrderedDict())[key] = None
+
+    def _victim(self) -> Hashable:
+        return next(iter(self._buckets[min(self._buckets)]))
+
+    def _remove(self, key: Hashable) -> None:
+        super()._remove(key)
+        self._unbucket(key, self._counts.pop(key))
+
+    def _unbucket(self, key: Hashable, n: int) -> None:
+        bucket = self._buckets[n]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[n]
+
+
+class TinyLFUByteCache(ByteCache):
+    """LRU cache with TinyLFU admission, bounded by the total size of values
+
+    Requests for all keys, cached or not, are counted approximately in
+    a count-min sketch.  The counts are halved after sample_size
+    requests so that they reflect recent popularity.  A new entry that
+    requires evictions is admitted only if its count exceeds the count
+    of every entry it would evict.
+
+    """
+
+    policy = "tinylfu"
+    depth = 4
+
+    def __init__(
+        self,
+        max_bytes: Optional[int],
+        sizeof: Callable[[Any], int] = len,
+        max_entries: Optional[int] = None,
+        width: int = 1 << 16,
+    ) -> None:
+        super().__init__(max_bytes, sizeof, max_entries)
+        self._mask = (1 << (width - 1).bit_length()) - 1
+        self._sketch = [array("I", bytes(4 * (self._mask + 1))) for _ in range(self.depth)]
+        # clears the bit shifted into the top of each counter when a
+        # row is halved as a single integer
+        self._halve_mask = int.from_bytes(
+            (0x7FFFFFFF).to_bytes(4, sys.byteorder) * (self._mask + 1), sys.byteorder
+        )
+        self.sample_size = 10 * (self._mask + 1)
+        self._n_recorded = 0
+
+    def estimate(self, key: Hashable) -> int:
+        """return the approximate number of recent requests for key"""
+        return min(row[hash((i, key)) & self._mask] for i, row in enumerate(self._sketch))
+
+    def _record(self, key: Hashable) -> None:
+        for i, row in enumerate(self._sketch):
+            j = hash((i, key)) & self._mask
+            if row[j] < 0xFFFFFFFF:
+                row[j] += 1
+        self._n_recorded += 1
+        if self._n_recorded >= self.sample_size:
+            for row in self._sketch:
+                halved = (int.from_bytes(row.tobytes(), sys.byteorder) >> 1) & self._halve_mask
+                row[:] = array("I", halved.to_bytes(4 * len(row), sys.byteorder))
+            self._n_recorded //= 2
+
+    def _admit(self, key: Hashable, size: int) -> bool:
+        bytes_needed = 0 if self.max_bytes is None else self.nbytes + size - self.max_bytes
+        entries_needed = 0 if self.max_entries is None else len(self._data) + 1 - self.max_entries
+        if bytes_needed <= 0 and entries_needed <= 0:
+            return True
+        count = self.estimate(key)
+        for victim, (_, victim_size) in self._data.items():
+            if self.estimate(victim) >= count:
+                return False
+            bytes_needed -= victim_size
+            entries_needed -= 1
+            if bytes_needed <= 0 and entries_needed <= 0:
+                return True
+        return True
+
+
+policies = {cls.policy: cls for cls in (ByteCache, LFUByteCache, TinyLFUByteCache)}
+
+
+def make_byte_cache(
+    max_bytes: Optional[int],
+    policy: str = "lru",
+    sizeof: Callable[[Any], int] = len,
+    max_entries: Optional[int] = None,
+) -> ByteCache:
+    """return a cache with the named eviction policy (lru, lfu, or tinylfu)"""
+    try:
+        cls = policies[policy.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown cache policy {policy!r}; expected one of {', '.join(policies)}"
+        ) from None
+    return cls(max_bytes, sizeof=sizeof, max_entries=max_entries)
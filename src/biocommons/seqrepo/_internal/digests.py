@@ -0,0 +1,129 @@
+"""compute the derived values needed to store a sequence
+
+digest_sequence() bundles everything that SeqRepo.store() derives
+from sequence residues -- case normalization, the seq_id
+(sha512t24u), digest aliases, and the alphabet -- so that the work can
+be done independently of (and in parallel with) writing.  It is a
+module-level function so that it may be used with process pools.
+
+All values are computed in a single chunked pass by
+SequenceDigester, which may also be fed a sequence incrementally.
+Digests are identical to those from bioutils.digests: they are
+computed on the normalized sequence (uppercased, without whitespace
+or "*"), which must contain only A-Z.  Because SHA1 and SEGUID share
+a sha1 digest, and VMC and sha512t24u share a sha512 digest, each
+residue is hashed three times rather than five.
+
+"""
+
+import base64
+import hashlib
+import string
+
+default_chunk_size = 1 << 20
+
+# bytes removed before hashing (re's \s for ASCII, plus "*"); see
+# bioutils.sequences.normalize_sequence
+_ignored_bytes = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f*"
+_upper_bytes = string.ascii_uppercase.encode("ascii")
+
+
+class SequenceDigester:
+    """accumulates digests, length, and alphabet over sequence chunks
+
+    >>> sd = SequenceDigester()
+    >>> sd.update("ac"), sd.update("gt")
+    ('AC', 'GT')
+    >>> d = sd.digests()
+    >>> d["seq_id"], d["len"], d["alpha"]
+    ('aKF498dAxcJAqme6QYQ7EZ07-fiw8Kw2', 4, 'ACGT')
+
+    """
+
+    def __init__(self, upcase: bool = True) -> None:
+        self._upcase = upcase
+        self._len = 0
+        self._alpha = b""
+        self._sha512 = hashlib.sha512()
+        self._sha1 = hashlib.sha1()  # noqa: S324
+        self._md5 = hashlib.md5()  # noqa: S324
+
+    def update(self, chunk: str) -> str:
+        """add chunk to the digests; returns the chunk as it should be
+        stored (i.e., upcased if requested)"""
+        if self._upcase:
+            chunk = chunk.upper()
+        self._update_bytes(_encode(chunk), is_upper=self._upcase)
+        return chunk
+
+    def digests(self) -> dict:
+        """return seq_id, len, alpha, and digest_aliases for all chunks
+        seen so far (see digest_sequence())"""
+        seq_id = base64.urlsafe_b64encode(self._sha512.digest()[:24]).decode("ascii")
+        sha1 = self._sha1.digest()
+        return {
+            "seq_id": seq_id,
+            "len": self._len,
+            "alpha": "".join(sorted(self._alpha.decode("ascii"))),
+            "digest_aliases": [
+                {"namespace": "VMC", "alias": "GS_" + seq_id},
+                {"namespace": "SHA1", "alias": sha1.hex()},
+                {"namespace": "MD5", "alias": self._md5.hexdigest()},
+                {
+                    "namespace": "SEGUID",
+                    "alias": base64.b64encode(sha1).decode("ascii").rstrip("="),
+                },
+            ],
+        }
+
+    def _update_bytes(self, b: bytes, is_upper: bool) -> None:
+        self._len += len(b)
+
+        # alphabet: drop residues seen already; the remainder is usually empty
+        new = b.translate(None, self._alpha)
+        if new:
+            self._alpha += bytes(sorted(set(new)))
+
+        nb = (b if is_upper else b.upper()).translate(None, _ignored_bytes)
+        if nb.translate(None, _upper_bytes):
+            raise RuntimeError("Normalized sequence contains non-alphabetic characters")
+        self._sha512.update(nb)
+        self._sha1.update(nb)
+        self._md5.update(nb)
+
+
+def digest_sequence(seq: str, upcase: bool = True, chunk_size: int = default_chunk_size) -> dict:
+    """return a dict of values derived from seq for storage
+
+    The returned dict contains:
+
+    * seq: the sequence to store (upcased if upcase is True)
+    * seq_id: the sha512t24u digest, which is the sequence identifier
+    * len: the sequence length
+    * alpha: the sorted distinct residues of the sequence
+    * digest_aliases: list of {"namespace": ..., "alias": ...} dicts for
+      the VMC, SHA1, MD5, and SEGUID digests
+
+    >>> sd = digest_sequence("acgt")
+    >>> sd["seq"], sd["seq_id"], sd["len"], sd["alpha"]
+    ('ACGT', 'aKF498dAxcJAqme6QYQ7EZ07-fiw8Kw2', 4, 'ACGT')
+    >>> [a["namespace"] for a in sd["digest_aliases"]]
+    ['VMC', 'SHA1', 'MD5', 'SEGUID']
+
+    """
+
+    if upcase:
+        seq = seq.upper()
+    digester = SequenceDigester(upcase=upcase)
+    for i in range(0, len(seq), chunk_size):
+        digester._update_bytes(_encode(seq[i : i + chunk_size]), is_upper=upcase)
+    sd = digester.digests()
+    sd["seq"] = seq
+    return sd
+
+
+def _encode(chunk: str) -> bytes:
+    try:
+        return chunk.encode("ascii")
+    except UnicodeEncodeError:
+        raise RuntimeError("Normalized sequence contains non-alphabetic characters") from None
@@ -0,0 +1,29 @@
+"""exceptions for identifiers that cannot be resolved
+
+SeqRepo and SeqAliasDB build these with alias_error() so that
+single-identifier lookups (fetch, __getitem__) and bulk lookups
+(fetch_many, resolve_many, proxies) report the same message for the
+same identifier.
+
+"""
+
+from typing import Optional
+
+
+class AliasNotUnique(KeyError):
+    """raised when an alias without namespace refers to more than one sequence"""
+
+
+def alias_error(alias: str, namespace: Optional[str], ambiguous: bool = False) -> KeyError:
+    """return the KeyError for an alias that is not found or, if
+    ambiguous, not unique
+
+    >>> alias_error("NM_000059.3", "RefSeq")
+    KeyError('Alias NM_000059.3 (namespace: RefSeq)')
+    >>> isinstance(alias_error("GAPDH", None, ambiguous=True), AliasNotUnique)
+    True
+
+    """
+    if ambiguous:
+        return AliasNotUnique(f"Alias {alias} (namespace: {namespace}): not unique")
+    return KeyError(f"Alias {alias} (namespace: {namespace})")
@@ -0,0 +1,175 @@
+"""compact in-memory indexes of strings for existence tests during loads
+
+Loading a release into an existing repository mostly finds sequences
+and aliases that are already stored.  KeySet and KeyMap answer "is
+this already stored?" from memory rather than with one sqlite query
+per record.
+
+Entries are held in sorted arrays of 64-bit string hashes (Python's
+SipHash) with the utf-8 encoded strings themselves concatenated in a
+single buffer, at about 20 bytes per entry plus the strings.  A lookup
+finds candidates by hash and then compares the strings, so distinct
+strings with the same hash are never confused.  Entries added after
+loading are kept in a dict that is merged into the arrays as it grows.
+Because string hashes are randomized per process, indexes are valid
+only within the process that built them.
+
+"""
+
+import heapq
+import itertools
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from operator import itemgetter
+from typing import Optional
+
+# keys are sorted in runs of load_chunk_size, then merged, to bound
+# memory while loading
+load_chunk_size = 1 << 20
+
+# merge added keys into the sorted arrays when there are more than
+# max(min_merge_size, len(arrays) * merge_ratio) of them
+min_merge_size = 1 << 16
+merge_ratio = 0.25
+
+_hash = hash
+
+# (hash, key, value), with key and value utf-8 encoded
+_Entry = tuple[int, bytes, bytes]
+
+
+class _Entries:
+    """sorted entries in compact form; keys are distinct"""
+
+    def __init__(self, entries: Iterable[_Entry] = ()) -> None:
+        self.hashes = array("q")
+        self.offsets = array("Q", [0])  # of each entry (key, then value) in blob
+        self.key_lens = array("I")
+        self.blob = bytearray()
+        it = iter(entries)
+        while chunk := list(itertools.islice(it, load_chunk_size)):
+            self.hashes.extend(h for h, _, _ in chunk)
+            self.key_lens.extend(len(k) for _, k, _ in chunk)
+            base = len(self.blob)
+            self.offsets.extend(
+                base + o for o in itertools.accumulate(len(k) + len(v) for _, k, v in chunk)
+            )
+            self.blob += b"".join(k + v for _, k, v in chunk)
+
+    def __iter__(self) -> Iterator[_Entry]:
+        blob, offsets = self.blob, self.offsets
+        for i, (h, kl) in enumerate(zip(self.hashes, self.key_lens)):
+            o = offsets[i]
+            yield h, bytes(blob[o : o + kl]), bytes(blob[o + kl : offsets[i + 1]])
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def get(self, h: int, k: bytes) -> Optional[bytes]:
+        """return the value for key k with hash h, or None"""
+        i = bisect_left(self.hashes, h)
+        while i < len(self.hashes) and self.hashes[i] == h:
+            o = self.offsets[i]
+            if self.key_lens[i] == len(k) and self.blob[o : o + len(k)] == k:
+                return bytes(self.blob[o + len(k) : self.offsets[i + 1]])
+            i += 1
+        return None
+
+
+def _merged(runs: Iterable[Iterable[_Entry]]) -> Iterator[_Entry]:
+    """merge sorted runs of entries; for equal keys, the last run wins"""
+    prev: Optional[_Entry] = None
+    for entry in heapq.merge(*runs, key=itemgetter(0, 1)):
+        if prev is not None and prev[:2] != entry[:2]:
+            yield prev
+        prev = entry
+    if prev is not None:
+        yield prev
+
+
+class KeyMap:
+    """map of strings to strings
+
+    >>> km = KeyMap.from_items([("NM_000059.3", "seq1")])
+    >>> km["NM_000059.4"] = "seq2"
+    >>> km.matches("NM_000059.3", "seq1"), km.matches("NM_000059.4", "seq1")
+    (True, False)
+
+    """
+
+    def __init__(self) -> None:
+        self._entries = _Entries()
+        self._added: dict[str, str] = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[str, str]]) -> "KeyMap":
+        """return a KeyMap from (key, value) pairs with distinct keys"""
+        km = cls()
+        it = iter(items)
+        runs = []
+        while run := sorted(
+            (_hash(k), k.encode(), v.encode()) for k, v in itertools.islice(it, load_chunk_size)
+        ):
+            runs.append(_Entries(run))
+        km._entries = runs[0] if len(runs) == 1 else _Entries(_merged(runs))
+        return km
+
+    def __len__(self) -> int:
+        return len(self._entries) + sum(1 for s in self._added if self._get_loaded(s) is None)
+
+    def __setitem__(self, s: str, value: str) -> None:
+        self._added[s] = value
+        if len(self._added) > max(min_merge_size, len(self._entries) * merge_ratio):
+            self._merge()
+
+    def get(self, s: str) -> Optional[str]:
+        """return the value for s, or None"""
+        value = self._added.get(s)
+        if value is None:
+            value = self._get_loaded(s)
+        return value
+
+    def matches(self, s: str, value: str) -> bool:
+        """return True if s is mapped to value"""
+        return self.get(s) == value
+
+    def _get_loaded(self, s: str) -> Optional[str]:
+        value = self._entries.get(_hash(s), s.encode())
+        return None if value is None else value.decode()
+
+    def _merge(self) -> None:
+        added = sorted((_hash(s), s.encode(), v.encode()) for s, v in self._added.items())
+        self._entries = _Entries(_merged([self._entries, added]))
+        self._added.clear()
+
+
+class KeySet:
+    """set of strings
+
+    >>> ks = KeySet.from_strings(["a", "b"])
+    >>> ks.add("c")
+    >>> "a" in ks, "c" in ks, "d" in ks
+    (True, True, False)
+
+    """
+
+    def __init__(self) -> None:
+        self._map = KeyMap()
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "KeySet":
+        """return a KeySet of strings"""
+        ks = cls()
+        ks._map = KeyMap.from_items((s, "") for s in strings)
+        return ks
+
+    def __contains__(self, s: str) -> bool:
+        return self._map.get(s) is not None
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def add(self, s: str) -> None:
+        if s not in self:
+            self._map[s] = ""
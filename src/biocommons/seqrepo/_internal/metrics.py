@@ -0,0 +1,221 @@
+"""counters and latency histograms for the hot path
+
+Metrics are recorded in a process-wide registry, like the chunk cache.
+They are disabled by default, so that the hot path pays only a flag
+check; enable them with enable() or by setting SEQREPO_METRICS=1.
+SeqRepo.metrics() returns a snapshot.
+
+Recorded metrics:
+
+* aliases.resolve: alias to seq_id lookups (sqlite or alias index)
+* seqinfo.lookup: seqinfo queries (sqlite)
+* readers.open: FabgzReader opens; readers.evictions: readers closed
+  to stay within the open file limit; readers.wait: time waiting for
+  a reader when all are in use
+* readers.acquire: time to get a reader for exclusive use, including
+  waiting and opening
+* fabgz.lock_wait: time waiting for the lock of a FabgzReader that is
+  used directly as a context manager (readers from the pool are
+  already exclusive)
+* fabgz.fetch: htslib reads; fabgz.bytes: residues returned by
+  those reads (decompressed blocks may be larger)
+* seqrepo.fetch, seqrepo.store, seqrepo.commit
+
+Hooks are called with (name, value) for every observation: value is
+the duration in seconds for timers and the increment for counters.
+Hooks may forward metrics to a monitoring system or log slow
+operations.  They are called in the thread that made the observation
+and should be fast.
+
+"""
+
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from ..config import SEQREPO_METRICS
+
+_logger = logging.getLogger(__name__)
+
+Hook = Callable[[str, float], None]
+F = TypeVar("F", bound=Callable[..., Any])
+
+enabled = SEQREPO_METRICS
+
+# histogram buckets are powers of 2 in microseconds, up to ~35 minutes
+n_buckets = 32
+
+
+def enable(on: bool = True) -> None:
+    """enable (or disable) recording of metrics"""
+    global enabled
+    enabled = on
+
+
+class Histogram:
+    """latency histogram with power-of-2 microsecond buckets"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.buckets = [0] * n_buckets
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), n_buckets - 1)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """return the upper bound, in seconds, of the bucket that contains quantile q"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        n = 0
+        for i, c in enumerate(self.buckets):
+            n += c
+            if n >= rank:
+                return min((1 << i) / 1e6, self.max)  # type: ignore
+        return self.max  # pragma: no cover
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Registry:
+    """thread-safe counters and histograms, with hooks"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._histograms: dict[str, Histogram] = {}
+        self._hooks: list[Hook] = []
+
+    def add_hook(self, hook: Hook) -> None:
+        with self._lock:
+            self._hooks = [*self._hooks, hook]
+
+    def remove_hook(self, hook: Hook) -> None:
+        with self._lock:
+            self._hooks = [h for h in self._hooks if h is not hook]
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+        self._call_hooks(name, n)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            h = self._histograms.get(name)
+            if h is None:
+                h = self._histograms[name] = Histogram()
+            h.observe(seconds)
+        self._call_hooks(name, seconds)
+
+    def reset(self) -> None:
+        """discard all counters and histograms; hooks are kept"""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timers": {name: h.snapshot() for name, h in self._histograms.items()},
+            }
+
+    def _call_hooks(self, name: str, value: float) -> None:
+        for hook in self._hooks:
+            try:
+                hook(name, value)
+            except Exception:
+                _logger.exception(f"Metrics hook {hook!r} failed for {name}")
+
+
+registry = Registry()
+
+
+def add_hook(hook: Hook) -> None:
+    """call hook(name, value) for each observation"""
+    registry.add_hook(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    registry.remove_hook(hook)
+
+
+def reset() -> None:
+    """discard all counters and histograms"""
+    registry.reset()
+
+
+def snapshot() -> dict:
+    """return counters and timer summaries"""
+    return registry.snapshot()
+
+
+def incr(name: str, n: int = 1) -> None:
+    """add n to counter name, if metrics are enabled"""
+    if enabled:
+        registry.incr(name, n)
+
+
+def observe(name: str, seconds: float) -> None:
+    """record a duration for timer name, if metrics are enabled"""
+    if enabled:
+        registry.observe(name, seconds)
+
+
+class Timer:
+    """context manager that records the duration of its block, if
+    metrics are enabled
+
+    >>> with Timer("example"):
+    ...     pass
+
+    """
+
+    __slots__ = ("_t0", "name")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._t0: Optional[float] = None
+
+    def __enter__(self) -> "Timer":
+        if enabled:
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._t0 is not None and enabled:
+            registry.observe(self.name, time.perf_counter() - self._t0)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """decorator that records the duration of each call, if metrics are enabled"""
+
+    def decorator(f: F) -> F:
+        @functools.wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with Timer(name):
+                return f(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
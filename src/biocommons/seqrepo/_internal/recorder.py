@@ -0,0 +1,128 @@
+"""record SeqRepo and DataProxy calls to a JSONL trace for replay
+
+A trace has one JSON object per line, such as
+`{"ts":0.0012,"op":"fetch","args":{"alias":"NM_000551.3","end":10},"elapsed":0.0004}`,
+where ts is the time since recording started and elapsed is the
+duration of the call, both in seconds.  Calls that raise have an
+"error" key with the exception class name.  Arguments that are None
+are omitted.  Traces whose names end in .gz are gzip compressed.
+
+Calls made while another call on the same recorder is in progress
+in the same thread (e.g., fetch() within fetch_uri()) are not
+recorded, so that replaying a trace does not repeat work.
+
+Usage::
+
+    with TraceRecorder("trace.jsonl.gz") as recorder:
+        sr = SeqRepo(seqrepo_dir, recorder=recorder)
+        ...
+
+Replay traces with `seqrepo replay`.
+
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+from typing import IO, Any, Optional
+
+_logger = logging.getLogger(__name__)
+
+
+class TraceRecorder:
+    """thread-safe writer of call traces"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh: Optional[IO[str]] = (
+            gzip.open(path, "wt", encoding="utf-8")
+            if path.endswith(".gz")
+            else open(path, "w", encoding="utf-8")
+        )
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._t0 = time.perf_counter()
+        self.n_recorded = 0
+        _logger.info(f"Recording calls to {path}")
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the trace; safe to call multiple times"""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def record(self, op: str, **args: Any) -> "_Call":
+        """return a context manager that records a call to op with args"""
+        return _Call(self, op, args)
+
+    def _write(self, rec: dict) -> None:
+        line = json.dumps(rec, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line)
+            self.n_recorded += 1
+
+
+class _Call:
+    __slots__ = ("_args", "_op", "_recorder", "_t0")
+
+    def __init__(self, recorder: TraceRecorder, op: str, args: dict) -> None:
+        self._recorder = recorder
+        self._op = op
+        self._args = args
+        self._t0: Optional[float] = None
+
+    def __enter__(self) -> None:
+        local = self._recorder._local
+        depth = getattr(local, "depth", 0)
+        local.depth = depth + 1
+        if depth == 0:
+            self._t0 = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._recorder._local.depth -= 1
+        if self._t0 is None:
+            return
+        t1 = time.perf_counter()
+        rec: dict[str, Any] = {
+            "ts": round(self._t0 - self._recorder._t0, 6),
+            "op": self._op,
+            "args": {k: v for k, v in self._args.items() if v is not None},
+            "elapsed": round(t1 - self._t0, 6),
+        }
+        if exc_type is not None:
+            rec["error"] = exc_type.__name__
+        self._recorder._write(rec)
+
+
+class _NoCall:
+    """no-op context manager used when no recorder is set"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_no_call = _NoCall()
+
+
+def record(recorder: Optional[TraceRecorder], op: str, **args: Any) -> Any:
+    """return a context manager that records a call with recorder, if
+    recorder is not None"""
+    if recorder is None:
+        return _no_call
+    return recorder.record(op, **args)
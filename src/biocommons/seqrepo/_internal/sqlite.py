@@ -0,0 +1,168 @@
+"""sqlite connections for seqrepo databases
+
+Read-only instances open databases with `mode=ro` and tuned pragmas.
+Snapshots made by `seqrepo snapshot` have no write permissions; for
+those, the database is also opened with `immutable=1`, which tells
+sqlite that the file cannot change.  sqlite then skips file locking
+and change detection on every query, and pages read through mmap are
+shared by all processes that open the same file.
+
+Do not open a database as immutable if any process may modify it:
+sqlite would not see those changes and may return corrupt results.
+
+"""
+
+import logging
+import os
+import sqlite3
+import stat
+import threading
+import urllib.parse
+from typing import Callable, Optional
+
+_logger = logging.getLogger(__name__)
+
+# pragmas for read-only connections
+mmap_size = 1 << 30
+cache_size_kib = 16 * 1024
+
+# (path, device, inode, size, mtime) -> schema version, for immutable databases
+_schema_versions: dict[tuple, Optional[int]] = {}
+
+
+def is_immutable(path: str) -> bool:
+    """return True if path looks like a snapshot database: it has no
+    write permission bits and no write-ahead log
+
+    Permission bits are used rather than os.access() so that the
+    result is the same for root.
+
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return False
+    writeable_bits = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+    return not (mode & writeable_bits) and not os.path.exists(path + "-wal")
+
+
+def connect(
+    path: str,
+    writeable: bool = False,
+    immutable: Optional[bool] = None,
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    """return a connection to the sqlite database at path
+
+    If writeable is False, the database is opened read-only.  If
+    immutable is None, it is set by is_immutable(path).
+
+    """
+    if writeable:
+        if immutable:
+            raise ValueError("Cannot open a database as both writeable and immutable")
+        return sqlite3.connect(
+            path, check_same_thread=check_same_thread, detect_types=sqlite3.PARSE_DECLTYPES
+        )
+
+    if not os.path.exists(path):
+        # connect normally so that callers report the missing schema
+        return sqlite3.connect(
+            path, check_same_thread=check_same_thread, detect_types=sqlite3.PARSE_DECLTYPES
+        )
+
+    if immutable is None:
+        immutable = is_immutable(path)
+    uri = "file:" + urllib.parse.quote(os.path.abspath(path)) + "?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    _logger.debug(f"Opening {uri}")
+    db = sqlite3.connect(
+        uri, uri=True, check_same_thread=check_same_thread, detect_types=sqlite3.PARSE_DECLTYPES
+    )
+    db.execute(f"pragma mmap_size = {mmap_size}")
+    db.execute(f"pragma cache_size = -{cache_size_kib}")
+    db.execute("pragma temp_store = memory")
+    db.execute("pragma query_only = 1")
+    return db
+
+
+def cached_schema_version(
+    path: str, immutable: bool, fetch: Callable[[], Optional[int]]
+) -> Optional[int]:
+    """return fetch(), the schema version of the database at path
+
+    For immutable databases, versions are cached by path and file
+    identity, so repeat opens of a snapshot do not query the database.
+
+    """
+    if not immutable:
+        return fetch()
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    if key not in _schema_versions:
+        _schema_versions[key] = fetch()
+    return _schema_versions[key]
+
+
+class ConnectionPool:
+    """connections to one database, one per thread
+
+    sqlite serializes statements on a connection, so threads that
+    share one connection cannot query concurrently.  A pool opens a
+    connection for each thread that uses it, on first use; sqlite
+    releases the GIL while it executes queries.  Connections of
+    threads that have exited are closed when the next connection is
+    opened, and all connections are closed by close(), so factory must
+    open connections with check_same_thread=False.
+
+    Writeable databases should use a single connection so that
+    transactions are not split across threads; if per_thread is
+    False, all threads get the same connection.
+
+    """
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], per_thread: bool = True) -> None:
+        self._factory = factory
+        self._per_thread = per_thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[tuple[threading.Thread, sqlite3.Connection]] = []
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def get(self) -> sqlite3.Connection:
+        """return the connection for the current thread, opening it if necessary"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        if not self._per_thread:
+            with self._lock:
+                if not self._connections:
+                    self._connections.append((threading.current_thread(), self._factory()))
+                return self._connections[0][1]
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._factory()
+            self._local.db = db
+            with self._lock:
+                for thread, c in self._connections:
+                    if not thread.is_alive():
+                        c.close()
+                self._connections = [tc for tc in self._connections if tc[0].is_alive()]
+                self._connections.append((threading.current_thread(), db))
+        return db
+
+    def close(self) -> None:
+        """close all connections; safe to call multiple times"""
+        with self._lock:
+            self._closed = True
+            for _, c in self._connections:
+                try:
+                    c.close()
+                except sqlite3.ProgrammingError:
+                    # a check_same_thread connection closed from another thread,
+                    # e.g., by garbage collection; sqlite closes it when freed
+                    pass
+            self._connections = []
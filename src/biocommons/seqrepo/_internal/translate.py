@@ -15,8 +15,12 @@ All translations occur in seqaliasdb.
 
 import copy
 import datetime
+import re
 from typing import Iterable, Iterator, Optional
 
+# seq_ids are sha512t24u digests: 24 bytes of sha512, base64url encoded
+_digest_re = re.compile(r"[-_0-9A-Za-z]{32}")
+
 
 def translate_db2api(namespace: str, alias: str) -> list[tuple[str, Optional[str]]]:
     """
@@ -63,6 +67,31 @@ def translate_api2db(namespace: str, alias: Optional[str]) -> list[tuple[str, Op
     return []
 
 
+def digest_seq_id(namespace: Optional[str], alias: str) -> Optional[str]:
+    """return the seq_id for a digest identifier (ga4gh:SQ.<digest>,
+    sha512t24u:<digest>, or VMC:GS_<digest>), or None for other
+    identifiers
+
+    seq_ids are sha512t24u digests, so these identifiers map to seq_ids
+    without an alias lookup.
+
+    >>> digest_seq_id("ga4gh", "SQ.v_QTc1p-MUYdgrRv4LMT6ByXIOsdw3C_")
+    'v_QTc1p-MUYdgrRv4LMT6ByXIOsdw3C_'
+    >>> digest_seq_id("refseq", "NM_000551.3") is None
+    True
+
+    """
+    if namespace == "ga4gh" and alias.startswith("SQ."):
+        digest = alias[3:]
+    elif namespace == "sha512t24u":
+        digest = alias
+    elif namespace == "VMC" and alias.startswith("GS_"):
+        digest = alias[3:]
+    else:
+        return None
+    return digest if _digest_re.fullmatch(digest) else None
+
+
 def translate_alias_records(aliases_itr: Iterable[dict]) -> Iterator[dict]:
     """given an iterator of find_aliases results, return a stream with
     translated records"""
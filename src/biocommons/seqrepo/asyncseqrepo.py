@@ -0,0 +1,156 @@
+"""asyncio front-end to a local SeqRepo instance
+
+AsyncSeqRepo runs blocking SeqRepo calls (sqlite queries and bgzf
+decompression with pysam) on a bounded thread pool so that an event
+loop is not stalled while sequences are fetched.  All worker threads
+share one SeqRepo instance (and its caches), which opens a database
+connection per thread.
+
+Usage::
+
+    async with AsyncSeqRepo("/usr/local/share/seqrepo/latest") as asr:
+        seq = await asr.fetch("NM_000551.3", 0, 10)
+        seq = await asr["NM_000551.3"][0:10]
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from collections.abc import Coroutine, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Union
+
+from .seqrepo import SeqRepo, nsa_sep
+
+_logger = logging.getLogger(__name__)
+
+
+class AsyncSequenceProxy:
+    """Provides awaitable slicing of a sequence stored in an AsyncSeqRepo
+
+    The alias is not resolved until the proxy is sliced, so a proxy
+    for a non-existent alias raises KeyError when awaited.
+
+    Usage::
+
+        seq = await asr["NM_000551.3"][0:10]
+
+    """
+
+    def __init__(self, asr: AsyncSeqRepo, namespace: Optional[str], alias: str) -> None:
+        self._asr = asr
+        self.namespace = namespace
+        self.alias = alias
+
+    def __getitem__(self, key: Union[int, slice]) -> Coroutine[Any, Any, str]:
+        if isinstance(key, int):
+            key = slice(key, key + 1)
+        if key.step is not None:
+            raise ValueError("Only contiguous sequence slices are supported")
+        return self.fetch(key.start, key.stop)
+
+    def __repr__(self) -> str:
+        return f"AsyncSequenceProxy(namespace={self.namespace}, alias={self.alias})"
+
+    async def fetch(self, start: Optional[int] = None, end: Optional[int] = None) -> str:
+        return await self._asr.fetch(
+            alias=self.alias, start=start, end=end, namespace=self.namespace
+        )
+
+
+class AsyncSeqRepo:
+    """asyncio wrapper around a read-only SeqRepo
+
+    Blocking work is run on a thread pool of at most `max_workers`
+    threads, which share one SeqRepo(root_dir, **kwargs) that is
+    closed by close().
+
+    """
+
+    def __init__(self, root_dir: str, max_workers: int = 4, **kwargs: Any) -> None:
+        if kwargs.get("writeable"):
+            raise ValueError("AsyncSeqRepo supports read-only access only")
+        self._root_dir = root_dir
+        self._sr = SeqRepo(root_dir, **kwargs)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="AsyncSeqRepo"
+        )
+
+    def __getitem__(self, nsa: str) -> AsyncSequenceProxy:
+        ns, a = nsa.split(nsa_sep) if nsa_sep in nsa else (None, nsa)
+        return AsyncSequenceProxy(self, namespace=ns, alias=a)
+
+    def __str__(self) -> str:
+        return f"AsyncSeqRepo(root_dir={self._root_dir})"
+
+    async def __aenter__(self) -> AsyncSeqRepo:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        # close() waits for worker threads, so run it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def close(self) -> None:
+        """Shut down worker threads and close the SeqRepo instance.
+
+        This method is safe to call multiple times.
+        """
+        self._executor.shutdown(wait=True)
+        self._sr.close()
+
+    async def contains(self, nsa: str) -> bool:
+        return await self._run("__contains__", nsa)
+
+    async def fetch(
+        self,
+        alias: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        namespace: Optional[str] = None,
+    ) -> str:
+        return await self._run("fetch", alias=alias, start=start, end=end, namespace=namespace)
+
+    async def fetch_many(
+        self, requests: Iterable[tuple[str, Optional[int], Optional[int]]]
+    ) -> list[str]:
+        return await self._run("fetch_many", list(requests))
+
+    async def fetch_uri(
+        self, uri: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> str:
+        return await self._run("fetch_uri", uri, start, end)
+
+    async def resolve_many(self, identifiers: Iterable[str]) -> dict[str, Union[dict, KeyError]]:
+        return await self._run("resolve_many", list(identifiers))
+
+    async def translate_alias(
+        self,
+        alias: str,
+        namespace: Optional[str] = None,
+        target_namespaces: Optional[list[str]] = None,
+    ) -> list[str]:
+        return await self._run(
+            "translate_alias",
+            alias=alias,
+            namespace=namespace,
+            target_namespaces=target_namespaces,
+        )
+
+    async def translate_identifier(
+        self, identifier: str, target_namespaces: Optional[list[str]] = None
+    ) -> list[str]:
+        return await self._run(
+            "translate_identifier", identifier, target_namespaces=target_namespaces
+        )
+
+    ############################################################################
+    # Internal Methods
+
+    async def _run(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(getattr(self._sr, method), *args, **kwargs)
+        )
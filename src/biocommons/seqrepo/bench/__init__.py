@@ -0,0 +1,9 @@
+"""benchmarks and synthetic repositories for measuring SeqRepo performance
+
+See `seqrepo bench --help` and `seqrepo replay --help`.
+
+"""
+
+from .benchmarks import run_benchmarks  # noqa: F401
+from .replay import read_trace, replay  # noqa: F401
+from .synthetic import generate  # noqa: F401
@@ -0,0 +1,207 @@
+"""benchmarks for SeqRepo instances
+
+Each benchmark opens its own SeqRepo instance so that caches from one
+benchmark do not affect another, and draws requests from a seeded
+generator so that runs are repeatable.  Latencies are summarized as
+percentiles in milliseconds; throughputs are per second.
+
+Usage::
+
+    results = run_benchmarks(seqrepo_dir, aliases, iterations=1000)
+
+"""
+
+import concurrent.futures
+import functools
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, Optional, Sequence
+
+from ..seqrepo import SeqRepo
+from . import synthetic
+
+_logger = logging.getLogger(__name__)
+
+short_slice = 100
+long_slice = 100_000
+
+
+def summarize(seconds: Sequence[float]) -> dict:
+    """return count, mean, and percentiles (in ms) of durations in seconds
+
+    >>> summarize([0.001, 0.002, 0.003, 0.004])["p50"]
+    2.5
+
+    """
+    if not seconds:
+        return {"n": 0}
+    ms = sorted(s * 1000 for s in seconds)
+
+    def pct(q: float) -> float:
+        # linear interpolation between closest ranks
+        k = (len(ms) - 1) * q
+        f = int(k)
+        c = min(f + 1, len(ms) - 1)
+        return round(ms[f] + (ms[c] - ms[f]) * (k - f), 6)
+
+    return {
+        "n": len(ms),
+        "mean": round(statistics.fmean(ms), 6),
+        "p50": pct(0.5),
+        "p90": pct(0.9),
+        "p99": pct(0.99),
+        "max": round(ms[-1], 6),
+    }
+
+
+def _timed(func: Callable[..., object], requests: Sequence[tuple]) -> list[float]:
+    """return the duration of func(*args) for each args in requests"""
+    durations = []
+    for args in requests:
+        t0 = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+def _slices(
+    sr: SeqRepo, rng: random.Random, aliases: Sequence[str], n: int, size: int
+) -> list[tuple[str, int, int]]:
+    """return n (alias, start, end) requests for slices of up to size residues"""
+    requests = []
+    for alias in rng.choices(aliases, k=n):
+        seq_len = len(sr[f"{synthetic.namespace}:{alias}"])  # type: ignore
+        start = rng.randrange(max(1, seq_len - size + 1))
+        requests.append((alias, start, min(start + size, seq_len)))
+    return requests
+
+
+def bench_resolve(seqrepo_dir: str, aliases: Sequence[str], n: int, seed: int = 0) -> dict:
+    """latency of resolving distinct aliases to seq_ids (uncached)"""
+    rng = random.Random(seed)
+    sample = rng.sample(list(aliases), min(n, len(aliases)))
+    with SeqRepo(seqrepo_dir) as sr:
+        durations = _timed(sr._get_unique_seqid, [(a, synthetic.namespace) for a in sample])
+    return summarize(durations)
+
+
+def bench_fetch(seqrepo_dir: str, aliases: Sequence[str], n: int, size: int, seed: int = 0) -> dict:
+    """latency of fetching random slices of up to size residues"""
+    rng = random.Random(seed)
+    with SeqRepo(seqrepo_dir) as sr:
+        requests = _slices(sr, rng, aliases, n, size)
+        durations = _timed(functools.partial(sr.fetch, namespace=synthetic.namespace), requests)
+    return summarize(durations)
+
+
+def bench_proxy(seqrepo_dir: str, aliases: Sequence[str], n: int, seed: int = 0) -> dict:
+    """latency of creating a SequenceProxy and reading its length and a short slice"""
+    rng = random.Random(seed)
+
+    def _access(sr: SeqRepo, alias: str, frac: float) -> str:
+        proxy = sr[f"{synthetic.namespace}:{alias}"]
+        start = int(len(proxy) * frac)
+        return proxy[start : start + short_slice]
+
+    with SeqRepo(seqrepo_dir) as sr:
+        requests = [(a, rng.random()) for a in rng.choices(aliases, k=n)]
+        durations = _timed(functools.partial(_access, sr), requests)
+    return summarize(durations)
+
+
+def bench_store(
+    n_sequences: int, lengths: str, seed: int = 0, tmp_dir: Optional[str] = None
+) -> dict:
+    """throughput of storing new sequences and duration of commit"""
+    rng = random.Random(seed)
+    draw_length = synthetic.parse_lengths(lengths)
+    seqs = [synthetic.random_sequence_chunks(rng, draw_length(rng)) for _ in range(n_sequences)]
+    n_residues = sum(len(c) for chunks in seqs for c in chunks)
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as td:
+        with SeqRepo(os.path.join(td, "store"), writeable=True) as sr:
+            t0 = time.perf_counter()
+            for i, chunks in enumerate(seqs):
+                sr.store_stream(chunks, [{"namespace": synthetic.namespace, "alias": f"N{i}"}])
+            t1 = time.perf_counter()
+            sr.commit()
+            t2 = time.perf_counter()
+    return {
+        "n": n_sequences,
+        "residues": n_residues,
+        "store_s": round(t1 - t0, 6),
+        "commit_s": round(t2 - t1, 6),
+        "sequences_per_s": round(n_sequences / max(t2 - t0, 1e-9), 1),
+        "residues_per_s": round(n_residues / max(t2 - t0, 1e-9), 1),
+    }
+
+
+def bench_export(seqrepo_dir: str) -> dict:
+    """throughput of iterating over all sequences and aliases, as `seqrepo export` does"""
+    n_sequences = n_residues = 0
+    with SeqRepo(seqrepo_dir) as sr:
+        t0 = time.perf_counter()
+        for srec, _ in sr:
+            n_sequences += 1
+            n_residues += len(srec["seq"])
+        elapsed = time.perf_counter() - t0
+    return {
+        "n": n_sequences,
+        "residues": n_residues,
+        "elapsed_s": round(elapsed, 6),
+        "residues_per_s": round(n_residues / max(elapsed, 1e-9), 1),
+    }
+
+
+def bench_threads(
+    seqrepo_dir: str, aliases: Sequence[str], n: int, threads: Sequence[int], seed: int = 0
+) -> dict:
+    """throughput of short fetches from one shared instance by each number of threads"""
+    results = {}
+    with SeqRepo(seqrepo_dir, fd_cache_size=None) as sr:
+        requests = _slices(sr, random.Random(seed), aliases, n, short_slice)
+        for n_threads in threads:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=n_threads) as executor:
+                t0 = time.perf_counter()
+                list(
+                    executor.map(
+                        lambda r: sr.fetch(r[0], r[1], r[2], namespace=synthetic.namespace),
+                        requests,
+                    )
+                )
+                elapsed = time.perf_counter() - t0
+            results[str(n_threads)] = {
+                "elapsed_s": round(elapsed, 6),
+                "fetches_per_s": round(len(requests) / max(elapsed, 1e-9), 1),
+            }
+    return results
+
+
+def run_benchmarks(
+    seqrepo_dir: str,
+    aliases: Sequence[str],
+    iterations: int = 1000,
+    threads: Sequence[int] = (1, 2, 4),
+    store_sequences: int = 100,
+    store_lengths: str = "lognormal:2000,1.0",
+    seed: int = 0,
+) -> dict:
+    """run all benchmarks on the instance in seqrepo_dir, whose sequences
+    have the given primary aliases in the synthetic namespace"""
+    results = {}
+    benchmarks: list[tuple[str, Callable[[], dict]]] = [
+        ("resolve", lambda: bench_resolve(seqrepo_dir, aliases, iterations, seed)),
+        ("fetch_short", lambda: bench_fetch(seqrepo_dir, aliases, iterations, short_slice, seed)),
+        ("fetch_long", lambda: bench_fetch(seqrepo_dir, aliases, iterations, long_slice, seed)),
+        ("proxy", lambda: bench_proxy(seqrepo_dir, aliases, iterations, seed)),
+        ("store", lambda: bench_store(store_sequences, store_lengths, seed)),
+        ("export", lambda: bench_export(seqrepo_dir)),
+        ("threads", lambda: bench_threads(seqrepo_dir, aliases, iterations, threads, seed)),
+    ]
+    for name, bench in benchmarks:
+        _logger.info(f"Running benchmark {name}")
+        results[name] = bench()
+    return results
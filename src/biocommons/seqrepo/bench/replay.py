@@ -0,0 +1,96 @@
+"""replay traces recorded by TraceRecorder against a SeqRepo instance
+
+Each call in the trace is re-issued with the same arguments, by
+`concurrency` threads sharing one instance, as fast as possible.
+DataProxy calls (get_sequence, get_metadata) are replayed with a
+SeqRepoDataProxy for the instance.  The report has latency percentiles
+(see benchmarks.summarize()) for all calls and by operation, the
+throughput, and counts of calls whose outcome (success or exception
+class) differs from the trace, e.g., because an alias is missing
+from the instance.
+
+Usage::
+
+    with SeqRepo(seqrepo_dir) as sr:
+        report = replay(sr, read_trace("trace.jsonl.gz"), concurrency=8)
+
+"""
+
+import collections
+import concurrent.futures
+import gzip
+import json
+import logging
+import time
+from collections.abc import Iterable, Iterator
+from typing import Any, Callable, Optional
+
+from ..dataproxy import SeqRepoDataProxy
+from ..seqrepo import SeqRepo
+from .benchmarks import summarize
+
+_logger = logging.getLogger(__name__)
+
+
+def read_trace(path: str, limit: Optional[int] = None) -> Iterator[dict]:
+    """yield up to limit call records from the trace at path"""
+    opener: Callable[..., Any] = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        for i, line in enumerate(fh):
+            if limit is not None and i >= limit:
+                return
+            if line.strip():
+                yield json.loads(line)
+
+
+def _dispatcher(sr: SeqRepo) -> dict[str, Callable[..., Any]]:
+    dp = SeqRepoDataProxy(sr)
+    return {
+        "fetch": sr.fetch,
+        "fetch_uri": sr.fetch_uri,
+        "translate_identifier": sr.translate_identifier,
+        "get_sequence": dp.get_sequence,
+        "get_metadata": dp.get_metadata,
+    }
+
+
+def replay(sr: SeqRepo, records: Iterable[dict], concurrency: int = 1) -> dict:
+    """replay call records against sr with concurrency threads; returns a report"""
+    ops = _dispatcher(sr)
+    records = list(records)
+    unknown = {rec["op"] for rec in records} - set(ops)
+    if unknown:
+        raise ValueError(f"Unknown operations in trace: {', '.join(sorted(unknown))}")
+
+    def _call(rec: dict) -> tuple[float, Optional[str]]:
+        t0 = time.perf_counter()
+        try:
+            ops[rec["op"]](**rec["args"])
+            error = None
+        except Exception as e:
+            error = type(e).__name__
+        return time.perf_counter() - t0, error
+
+    t0 = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(_call, records))
+    elapsed = time.perf_counter() - t0
+
+    by_op: dict[str, list[float]] = collections.defaultdict(list)
+    mismatches: collections.Counter[str] = collections.Counter()
+    for rec, (seconds, error) in zip(records, outcomes):
+        by_op[rec["op"]].append(seconds)
+        if error != rec.get("error"):
+            mismatches[f"{rec['op']}: {rec.get('error') or 'ok'} -> {error or 'ok'}"] += 1
+    if mismatches:
+        _logger.warning(f"{sum(mismatches.values())} calls had different outcomes than traced")
+    return {
+        "n": len(records),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 6),
+        "calls_per_s": round(len(records) / max(elapsed, 1e-9), 1),
+        "all": summarize([seconds for seconds, _ in outcomes]),
+        "traced": summarize([rec["elapsed"] for rec in records if "elapsed" in rec]),
+        "ops": {op: summarize(durations) for op, durations in sorted(by_op.items())},
+        "mismatches": dict(mismatches),
+    }
@@ -0,0 +1,124 @@
+"""generate synthetic SeqRepo instances for benchmarks
+
+Sequences are random DNA drawn from a seeded generator, so a given set
+of parameters always produces the same sequences, seq_ids, and
+aliases.  Every sequence has a primary alias bench:S<i>; additional
+aliases bench:S<i>.<k> are assigned round-robin until there are
+n_aliases in total.  Sequences are stored in n_files sequence files
+(one file per commit).
+
+"""
+
+import logging
+import math
+import os
+import random
+from typing import Callable
+
+from ..seqrepo import SeqRepo
+
+_logger = logging.getLogger(__name__)
+
+namespace = "bench"
+
+# sequences are generated and stored in chunks of this many residues
+residue_chunk_size = 1024 * 1024
+
+LengthFunction = Callable[[random.Random], int]
+
+
+def parse_lengths(spec: str) -> LengthFunction:
+    """return a function that draws sequence lengths from the
+    distribution described by spec
+
+    spec is one of fixed:N, uniform:MIN,MAX, or lognormal:MEDIAN,SIGMA
+
+    >>> rng = random.Random(0)
+    >>> parse_lengths("fixed:100")(rng)
+    100
+    >>> 10 <= parse_lengths("uniform:10,20")(rng) <= 20
+    True
+
+    """
+    try:
+        kind, _, args = spec.partition(":")
+        params = [float(a) for a in args.split(",")]
+        if kind == "fixed" and len(params) == 1:
+            n = int(params[0])
+            return lambda rng: n
+        if kind == "uniform" and len(params) == 2:
+            lo, hi = int(params[0]), int(params[1])
+            return lambda rng: rng.randint(lo, hi)
+        if kind == "lognormal" and len(params) == 2:
+            mu, sigma = math.log(params[0]), params[1]
+            return lambda rng: max(1, int(rng.lognormvariate(mu, sigma)))
+    except ValueError:
+        pass
+    raise ValueError(
+        f"Invalid length distribution {spec!r}; expected fixed:N, uniform:MIN,MAX, "
+        "or lognormal:MEDIAN,SIGMA"
+    )
+
+
+def random_sequence_chunks(rng: random.Random, length: int) -> list[str]:
+    """return a random DNA sequence of length residues as a list of chunks"""
+    chunks = []
+    for i in range(0, length, residue_chunk_size):
+        n = min(residue_chunk_size, length - i)
+        chunks.append("".join(rng.choices("ACGT", k=n)))
+    return chunks
+
+
+def generate(
+    root_dir: str,
+    n_sequences: int = 1000,
+    n_aliases: int = 2000,
+    lengths: str = "lognormal:2000,1.0",
+    n_files: int = 1,
+    seed: int = 0,
+) -> dict:
+    """create a synthetic SeqRepo instance in root_dir, which must not exist
+
+    Returns a summary with the number of sequences, aliases, and
+    residues, and the primary aliases of all sequences.
+
+    """
+    if n_sequences < 1 or n_files < 1:
+        raise ValueError("n_sequences and n_files must be at least 1")
+    if n_aliases < n_sequences:
+        raise ValueError("n_aliases must be at least n_sequences (one alias per sequence)")
+    if os.path.exists(root_dir):
+        raise OSError(f"{root_dir} already exists")
+
+    rng = random.Random(seed)
+    draw_length = parse_lengths(lengths)
+    per_file = math.ceil(n_sequences / n_files)
+    n_extra = n_aliases - n_sequences
+    n_residues = 0
+    aliases = []
+    with SeqRepo(root_dir, writeable=True) as sr:
+        for i in range(n_sequences):
+            alias = f"S{i}"
+            nsaliases = [{"namespace": namespace, "alias": alias}]
+            # extra aliases round-robin: sequence i gets k-th extras while k*n + i < n_extra
+            nsaliases += [
+                {"namespace": namespace, "alias": f"{alias}.{k}"}
+                for k in range(1, n_extra // n_sequences + 2)
+                if (k - 1) * n_sequences + i < n_extra
+            ]
+            length = draw_length(rng)
+            sr.store_stream(random_sequence_chunks(rng, length), nsaliases)
+            aliases.append(alias)
+            n_residues += length
+            if (i + 1) % per_file == 0 or i + 1 == n_sequences:
+                sr.commit()
+    _logger.info(
+        f"Generated {n_sequences} sequences ({n_residues} residues) and {n_aliases} aliases"
+        f" in {root_dir}"
+    )
+    return {
+        "n_sequences": n_sequences,
+        "n_aliases": n_aliases,
+        "n_residues": n_residues,
+        "aliases": aliases,
+    }
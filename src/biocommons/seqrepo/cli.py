@@ -16,6 +16,7 @@ import datetime
 import gzip
 import io
 import itertools
+import json
 import logging
 import os
 import re
@@ -24,6 +25,7 @@ import stat
 import subprocess
 import sys
 import tempfile
+import time
 from typing import Iterable, Iterator, Optional
 
 import bioutils.assemblies
@@ -31,13 +33,19 @@ import bioutils.seqfetcher
 import tqdm
 
 from . import SeqRepo, __version__
+from ._internal.aliasindex import build_alias_index
+from ._internal.digests import digest_sequence
 from .fastaiter import FastaIter
+from .seqaliasdb import SeqAliasDB
 from .utils import parse_defline, validate_aliases
 
 SEQREPO_ROOT_DIR = os.environ.get("SEQREPO_ROOT_DIR", "/usr/local/share/seqrepo")
 DEFAULT_INSTANCE_NAME_RW = "master"
 DEFAULT_INSTANCE_NAME_RO = "latest"
 
+# sequences are read from fasta files in chunks of about this many residues
+fasta_chunk_size = 1024 * 1024
+
 
 instance_name_new_re = re.compile(
     r"^20[12]\d-\d\d-\d\d$"
@@ -103,6 +111,16 @@ def _latest_instance_path(opts: argparse.Namespace) -> Optional[str]:
     return os.path.join(opts.root_directory, li) if li else None
 
 
+def _write_report(opts: argparse.Namespace, params: dict, results: dict) -> None:
+    """write a JSON report of params and results to opts.output, or stdout"""
+    report = json.dumps({"version": __version__, "params": params, "results": results}, indent=2)
+    if opts.output:
+        with open(opts.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
 def parse_arguments() -> argparse.Namespace:
     epilog = (
         f"seqrepo {__version__}"
@@ -167,6 +185,42 @@ def parse_arguments() -> argparse.Namespace:
         help="reload all assemblies, not just missing ones",
     )
 
+    # bench
+    ap = subparsers.add_parser(
+        "bench", help="benchmark a synthetic (or existing) seqrepo instance and print JSON results"
+    )
+    ap.set_defaults(func=bench)
+    ap.add_argument(
+        "--instance-name",
+        "-i",
+        default=None,
+        help="existing instance to benchmark, whose sequences have aliases bench:S<n>;"
+        " by default, a synthetic instance is generated in a temporary directory",
+    )
+    ap.add_argument(
+        "--generate-dir",
+        help="generate the synthetic instance in this directory (which must not exist) and keep it",
+    )
+    ap.add_argument("--sequences", "-N", type=int, default=1000, help="number of sequences")
+    ap.add_argument(
+        "--aliases", "-M", type=int, default=2000, help="total number of aliases (>= sequences)"
+    )
+    ap.add_argument(
+        "--lengths",
+        default="lognormal:2000,1.0",
+        help="sequence length distribution: fixed:N, uniform:MIN,MAX, or lognormal:MEDIAN,SIGMA",
+    )
+    ap.add_argument("--files", type=int, default=1, help="number of sequence files")
+    ap.add_argument("--seed", type=int, default=0, help="random seed")
+    ap.add_argument("--iterations", type=int, default=1000, help="requests per latency benchmark")
+    ap.add_argument(
+        "--threads", default="1,2,4", help="comma-separated thread counts for scaling benchmark"
+    )
+    ap.add_argument(
+        "--store-sequences", type=int, default=100, help="sequences stored by store benchmark"
+    )
+    ap.add_argument("--output", "-o", help="write results to this file instead of stdout")
+
     # export
     ap = subparsers.add_parser("export", help="export sequences")
     ap.set_defaults(func=export)
@@ -244,6 +298,13 @@ def parse_arguments() -> argparse.Namespace:
         nargs="+",
         help="fasta files to load (compressed okay)",
     )
+    ap.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="number of processes for computing sequence digests",
+    )
     ap.add_argument(
         "--namespace",
         "-n",
@@ -263,6 +324,20 @@ def parse_arguments() -> argparse.Namespace:
         help="set latest symlink to point to this instance",
     )
 
+    # replay
+    ap = subparsers.add_parser(
+        "replay",
+        help="replay a trace of recorded calls (see TraceRecorder) and print JSON latencies",
+    )
+    ap.set_defaults(func=replay)
+    ap.add_argument("trace", help="trace file (.jsonl or .jsonl.gz)")
+    ap.add_argument("--instance-name", "-i", default=DEFAULT_INSTANCE_NAME_RO, help="instance name")
+    ap.add_argument(
+        "--concurrency", "-c", type=int, default=1, help="number of threads issuing calls"
+    )
+    ap.add_argument("--limit", type=int, help="replay only the first LIMIT calls")
+    ap.add_argument("--output", "-o", help="write results to this file instead of stdout")
+
     # show-status
     ap = subparsers.add_parser("show-status", help="show seqrepo status")
     ap.set_defaults(func=show_status)
@@ -283,6 +358,18 @@ def parse_arguments() -> argparse.Namespace:
         default=datetime.datetime.utcnow().strftime("%F"),
         help="destination directory name (must not already exist)",
     )
+    ap.add_argument(
+        "--alias-index",
+        default=False,
+        action="store_true",
+        help="build the alias index (aliases.idx) used for fast alias lookups",
+    )
+    ap.add_argument(
+        "--search-index",
+        default=False,
+        action="store_true",
+        help="build the trigram index used by alias searches with leading or inner wildcards",
+    )
 
     # start-shell
     ap = subparsers.add_parser(
@@ -396,19 +483,70 @@ def add_assembly_names(opts: argparse.Namespace) -> None:
             "Loading {n} new accessions for assembly {an}".format(an=assy_name, n=len(eq_sequences))
         )
 
-        for s in eq_sequences:
-            seq_id = ncbi_alias_map[s["refseq_ac"]]
-            aliases = [{"namespace": assy_name, "alias": a} for a in [s["name"]] + s["aliases"]]
-            for alias in aliases:
-                sr.aliases.store_alias(seq_id=seq_id, **alias)
-                _logger.debug(
-                    "Added assembly alias {a[namespace]}:{a[alias]} for {seq_id}".format(
-                        a=alias, seq_id=seq_id
-                    )
-                )
+        records = [
+            (ncbi_alias_map[s["refseq_ac"]], assy_name, a)
+            for s in eq_sequences
+            for a in [s["name"]] + s["aliases"]
+        ]
+        n_added = sr.aliases.store_aliases(records)
+        _logger.debug(
+            "Added {n} of {m} assembly aliases for {an}".format(
+                n=n_added, m=len(records), an=assy_name
+            )
+        )
         sr.commit()
 
 
+def bench(opts: argparse.Namespace) -> None:
+    from .bench import generate, run_benchmarks
+
+    params = {
+        "sequences": opts.sequences,
+        "aliases": opts.aliases,
+        "lengths": opts.lengths,
+        "files": opts.files,
+        "seed": opts.seed,
+        "iterations": opts.iterations,
+    }
+    threads = [int(t) for t in opts.threads.split(",")]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if opts.instance_name:
+            seqrepo_dir = os.path.join(opts.root_directory, opts.instance_name)
+            with SeqRepo(seqrepo_dir) as sr:
+                aliases = sorted(
+                    a["alias"]
+                    for a in sr.aliases.find_aliases(namespace="bench", alias="S%")
+                    if "." not in a["alias"]
+                )
+            if not aliases:
+                raise RuntimeError(f"{seqrepo_dir} has no bench:S<n> aliases; see --generate-dir")
+            params = {"instance": seqrepo_dir, "seed": opts.seed, "iterations": opts.iterations}
+        else:
+            seqrepo_dir = opts.generate_dir or os.path.join(tmp_dir, "synthetic")
+            t0 = time.perf_counter()
+            summary = generate(
+                seqrepo_dir,
+                n_sequences=opts.sequences,
+                n_aliases=opts.aliases,
+                lengths=opts.lengths,
+                n_files=opts.files,
+                seed=opts.seed,
+            )
+            aliases = summary.pop("aliases")
+            params.update(summary, generate_s=round(time.perf_counter() - t0, 6))
+        results = run_benchmarks(
+            seqrepo_dir,
+            aliases,
+            iterations=opts.iterations,
+            threads=threads,
+            store_sequences=opts.store_sequences,
+            store_lengths=opts.lengths,
+            seed=opts.seed,
+        )
+
+    _write_report(opts, params, results)
+
+
 def export(opts: argparse.Namespace) -> None:  # noqa: C901
     seqrepo_dir = os.path.join(opts.root_directory, opts.instance_name)
     sr = SeqRepo(seqrepo_dir)
@@ -541,35 +679,39 @@ def load(opts: argparse.Namespace) -> None:
         )
     sr = SeqRepo(seqrepo_dir, writeable=True)
 
+    def _records():
+        """yield (seq, aliases) for each record in each fasta file"""
+        fn_bar = tqdm.tqdm(opts.fasta_files, unit="file", disable=disable_bar)
+        for fn in fn_bar:
+            fn_bar.set_description(os.path.basename(fn))
+            if fn == "-":
+                fh = sys.stdin
+            elif fn.endswith(".gz") or fn.endswith(".bgz"):
+                fh = gzip.open(fn, mode="rt", encoding="ascii")
+            else:
+                fh = io.open(fn, mode="rt", encoding="ascii")
+            _logger.info("Opened " + fn)
+            for defline, seq in FastaIter(fh, chunk_size=fasta_chunk_size):  # type: ignore
+                aliases = parse_defline(defline, opts.namespace)
+                validate_aliases(aliases)
+                yield seq, aliases
+
     n_seqs_seen = n_seqs_added = n_aliases_added = 0
-    fn_bar = tqdm.tqdm(opts.fasta_files, unit="file", disable=disable_bar)
-    for fn in fn_bar:
-        fn_bar.set_description(os.path.basename(fn))
-        if fn == "-":
-            fh = sys.stdin
-        elif fn.endswith(".gz") or fn.endswith(".bgz"):
-            fh = gzip.open(fn, mode="rt", encoding="ascii")
-        else:
-            fh = io.open(fn, mode="rt", encoding="ascii")
-        _logger.info("Opened " + fn)
-        seq_bar = tqdm.tqdm(
-            FastaIter(fh),  # type: ignore
-            unit=" seqs",
-            disable=disable_bar,
-            leave=False,
-        )
-        for defline, seq in seq_bar:  # type: ignore
-            n_seqs_seen += 1
-            seq_bar.set_description(
-                "sequences: {nsa}/{nss} added/seen; aliases: {naa} added".format(
-                    nss=n_seqs_seen, nsa=n_seqs_added, naa=n_aliases_added
-                )
+    seq_bar = tqdm.tqdm(
+        sr.store_many(_records(), jobs=opts.jobs),
+        unit=" seqs",
+        disable=disable_bar,
+        leave=False,
+    )
+    for n_sa, n_aa in seq_bar:
+        n_seqs_seen += 1
+        n_seqs_added += n_sa
+        n_aliases_added += n_aa
+        seq_bar.set_description(
+            "sequences: {nsa}/{nss} added/seen; aliases: {naa} added".format(
+                nss=n_seqs_seen, nsa=n_seqs_added, naa=n_aliases_added
             )
-            aliases = parse_defline(defline, opts.namespace)
-            validate_aliases(aliases)
-            n_sa, n_aa = sr.store(seq, aliases)
-            n_seqs_added += n_sa
-            n_aliases_added += n_aa
+        )
     sr.commit()
 
 
@@ -608,6 +750,17 @@ def pull(opts: argparse.Namespace) -> None:
             update_latest(opts, instance_name)
 
 
+def replay(opts: argparse.Namespace) -> None:
+    from .bench import read_trace
+    from .bench import replay as replay_trace
+
+    seqrepo_dir = os.path.join(opts.root_directory, opts.instance_name)
+    with SeqRepo(seqrepo_dir) as sr:
+        results = replay_trace(sr, read_trace(opts.trace, opts.limit), concurrency=opts.concurrency)
+    params = {"instance": seqrepo_dir, "trace": opts.trace}
+    _write_report(opts, params, results)
+
+
 def show_status(opts: argparse.Namespace) -> SeqRepo:
     seqrepo_dir = os.path.join(opts.root_directory, opts.instance_name)
     tot_size = sum(
@@ -693,6 +846,13 @@ def snapshot(opts: argparse.Namespace) -> None:
         dp = os.path.join(tmp_dir, rp)
         shutil.copyfile(rp, dp)
 
+    # the alias index fingerprints aliases.sqlite3, so build it last
+    if opts.search_index:
+        with SeqAliasDB(os.path.join(tmp_dir, "aliases.sqlite3"), writeable=True) as db:
+            db.create_search_index()
+    if opts.alias_index:
+        build_alias_index(tmp_dir)
+
     # recursively drop write perms on snapshot
     mode_aw = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
 
@@ -743,8 +903,14 @@ def upgrade(opts: argparse.Namespace) -> None:
 def update_digests(opts: argparse.Namespace) -> None:
     seqrepo_dir = os.path.join(opts.root_directory, opts.instance_name)
     sr = SeqRepo(seqrepo_dir, writeable=True)
-    for srec in tqdm.tqdm(sr.sequences):
-        sr._update_digest_aliases(srec["seq_id"], srec["seq"])
+
+    def _records() -> Iterator[tuple[str, str, str]]:
+        for srec in tqdm.tqdm(sr.sequences):
+            for sa in digest_sequence(srec["seq"])["digest_aliases"]:
+                yield srec["seq_id"], sa["namespace"], sa["alias"]
+
+    sr.aliases.store_aliases(_records())
+    sr.commit()
 
 
 def update_latest(opts: argparse.Namespace, mri: Optional[str] = None) -> None:
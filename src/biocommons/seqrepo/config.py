@@ -17,6 +17,21 @@ def parse_caching_env_var(env_name: str, env_default: str) -> Optional[int]:
 
 
 SEQREPO_LRU_CACHE_MAXSIZE = parse_caching_env_var("SEQREPO_LRU_CACHE_MAXSIZE", "1000000")
+# Number of unknown (or ambiguous) identifiers remembered by each SeqRepo
+# instance; 0 disables the cache and none removes the bound
+SEQREPO_NEGATIVE_CACHE_MAXSIZE = parse_caching_env_var("SEQREPO_NEGATIVE_CACHE_MAXSIZE", "100000")
 # Using a default value here of -1 to differentiate not setting this env var and an
 # explicit None (unbounded cache)
 SEQREPO_FD_CACHE_MAXSIZE = parse_caching_env_var("SEQREPO_FD_CACHE_MAXSIZE", "-1")
+# Total size in bytes of residue chunks cached by FastaDir.fetch, shared by
+# all instances in a process; 0 disables the cache and none removes the bound
+SEQREPO_CHUNK_CACHE_BYTES = parse_caching_env_var(
+    "SEQREPO_CHUNK_CACHE_BYTES", str(64 * 1024 * 1024)
+)
+# Total size in bytes of sequences and subsequences cached by each SeqRepo
+# instance; 0 (the default) disables the cache and none removes the bound
+SEQREPO_RESULT_CACHE_BYTES = parse_caching_env_var("SEQREPO_RESULT_CACHE_BYTES", "0")
+# Eviction policy for the result cache: lru, lfu, or tinylfu
+SEQREPO_RESULT_CACHE_POLICY = os.environ.get("SEQREPO_RESULT_CACHE_POLICY", "lru")
+# Record hot-path counters and latencies (see SeqRepo.metrics()); off by default
+SEQREPO_METRICS = os.environ.get("SEQREPO_METRICS", "0").lower() in ("1", "true", "yes", "on")
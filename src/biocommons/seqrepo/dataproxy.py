@@ -17,6 +17,8 @@ from urllib.parse import urlparse
 import requests
 from bioutils.accessions import coerce_namespace
 
+from ._internal.errors import AliasNotUnique
+from ._internal.recorder import TraceRecorder, record
 from .seqrepo import SeqRepo
 
 _logger = logging.getLogger(__name__)
@@ -99,13 +101,18 @@ class _SeqRepoDataProxyBase(_DataProxy):
     # wraps seqreqpo classes in order to provide translation to/from
     # `ga4gh` identifiers.
 
+    # if set, get_metadata and get_sequence calls are recorded for `seqrepo replay`
+    recorder: Optional[TraceRecorder] = None
+
     def get_metadata(self, identifier: str) -> dict:
-        md = self._get_metadata(identifier)
+        with record(self.recorder, "get_metadata", identifier=identifier):
+            md = self._get_metadata(identifier)
         md["aliases"] = list(md["aliases"])
         return md
 
     def get_sequence(self, identifier: str, start: Optional[int] = None, end: Optional[int] = None):
-        return self._get_sequence(identifier, start=start, end=end)
+        with record(self.recorder, "get_sequence", identifier=identifier, start=start, end=end):
+            return self._get_sequence(identifier, start=start, end=end)
 
     @abstractmethod
     def _get_metadata(self, identifier: str) -> dict:  # pragma: no cover
@@ -121,9 +128,10 @@ class _SeqRepoDataProxyBase(_DataProxy):
 class SeqRepoDataProxy(_SeqRepoDataProxyBase):
     """DataProxy based on a local instance of SeqRepo"""
 
-    def __init__(self, sr: SeqRepo) -> None:
+    def __init__(self, sr: SeqRepo, recorder: Optional[TraceRecorder] = None) -> None:
         super().__init__()
         self.sr = sr
+        self.recorder = recorder
 
     def _get_sequence(
         self, identifier: str, start: Optional[int] = None, end: Optional[int] = None
@@ -133,10 +141,17 @@ class SeqRepoDataProxy(_SeqRepoDataProxyBase):
 
     def _get_metadata(self, identifier: str) -> dict:
         ns, a = coerce_namespace(identifier).split(":", 2)
-        r = list(self.sr.aliases.find_aliases(namespace=ns, alias=a))
-        if len(r) == 0:
-            raise KeyError(identifier)
-        seq_id = r[0]["seq_id"]
+        # resolved through SeqRepo's caches, so repeated lookups of
+        # unknown identifiers do not query the database
+        try:
+            seq_id = self.sr._get_unique_seqid(alias=a, namespace=ns)
+        except AliasNotUnique:
+            # identifiers that match several sequences (e.g., with
+            # wildcards) return metadata for the first match
+            r = list(self.sr.aliases.find_aliases(namespace=ns, alias=a))
+            seq_id = r[0]["seq_id"]
+        except KeyError:
+            raise KeyError(identifier) from None
         seqinfo = self.sr.sequences.fetch_seqinfo(seq_id)
         aliases = self.sr.aliases.find_aliases(seq_id=seq_id)
         md = {
@@ -153,9 +168,10 @@ class SeqRepoRESTDataProxy(_SeqRepoDataProxyBase):
 
     rest_version = "1"
 
-    def __init__(self, base_url: str) -> None:
+    def __init__(self, base_url: str, recorder: Optional[TraceRecorder] = None) -> None:
         super().__init__()
         self.base_url = f"{base_url}/{self.rest_version}/"
+        self.recorder = recorder
 
     def _get_sequence(
         self, identifier: str, start: Optional[int] = None, end: Optional[int] = None
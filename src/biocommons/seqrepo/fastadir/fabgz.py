@@ -6,68 +6,57 @@ Files must be named as .fa.bgz to be recognized as blocked gzip compressed
 
 """
 
-import io
+import collections
+import contextlib
 import logging
 import os
-import re
-import shutil
 import stat
-import subprocess
+import struct
 import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from types import TracebackType
-from typing import Optional, Type
+from typing import Iterable, Iterator, Optional, Type
 
 from pysam import FastaFile
 from typing_extensions import Self
 
+from .._internal import metrics
+
 _logger = logging.getLogger(__name__)
 
 line_width = 100
 
-min_bgzip_version_info = (1, 2, 1)
-
-
-def _get_bgzip_version(exe: str) -> str:
-    """return bgzip version as string"""
-    p = subprocess.Popen(
-        [exe, "-h"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        universal_newlines=True,
-    )
-    output = p.communicate()
-    version_line = output[0].splitlines()[1]
-    version_match = re.match(r"(?:Version:|bgzip \(htslib\))\s+(\d+\.\d+(\.\d+)?)", version_line)
-    if version_match is None:
-        raise ValueError(f"Unable to extract bgzip version from {version_line}")
-    return version_match.group(1)
-
-
-def _find_bgzip() -> str:
-    """return path to bgzip if found and meets version requirements, else exception"""
-    min_bgzip_version = ".".join(map(str, min_bgzip_version_info))
-    exe = os.environ.get("SEQREPO_BGZIP_PATH", shutil.which("bgzip") or "/usr/bin/bgzip")
-
-    try:
-        bgzip_version = _get_bgzip_version(exe)
-    except AttributeError:
-        raise RuntimeError("Didn't find version string in bgzip executable ({exe})".format(exe=exe))
-    except FileNotFoundError:
-        raise RuntimeError(
-            "{exe} doesn't exist; you need to install htslib and tabix "
-            "(See https://github.com/biocommons/biocommons.seqrepo#requirements)".format(exe=exe)
-        )
-    except Exception:
-        raise RuntimeError("Unknown error while executing {exe}".format(exe=exe))
-    bgzip_version_info = tuple(map(int, bgzip_version.split(".")))
-    if bgzip_version_info < min_bgzip_version_info:
-        raise RuntimeError(
-            "bgzip ({exe}) {ev} is too old; >= {rv} is required; please upgrade".format(
-                exe=exe, ev=bgzip_version, rv=min_bgzip_version
-            )
-        )
-    _logger.info("Using bgzip {ev} ({exe})".format(ev=bgzip_version, exe=exe))
-    return exe
+# BGZF (see the SAM specification, section 4.1): a series of gzip
+# members of at most 64KiB each, with the compressed size of each
+# member recorded in a "BC" extra subfield.  bgzf_block_size is the
+# number of uncompressed bytes per block used by htslib.
+bgzf_block_size = 0xFF00
+bgzf_eof_block = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+default_compresslevel = 6
+
+# readers that FabgzReaderPool keeps open for each file
+default_readers_per_path = 4
+
+
+def _bgzf_block(data: bytes, compresslevel: int = default_compresslevel) -> bytes:
+    """return data (at most bgzf_block_size bytes) as a single BGZF block
+
+    zlib releases the GIL while compressing, so blocks may be
+    compressed concurrently in threads.
+    """
+    cdata = zlib.compress(data, compresslevel, wbits=-15)
+    header = struct.pack(
+        "<4BI2BH2BHH",
+        0x1F, 0x8B, 8, 4,  # gzip magic, deflate, FEXTRA
+        0,  # mtime
+        0, 0xFF,  # xfl, os (unknown)
+        6,  # xlen
+        ord("B"), ord("C"), 2,  # BC subfield, 2 bytes
+        18 + len(cdata) + 8 - 1,  # total block size - 1
+    )  # fmt: skip
+    return header + cdata + struct.pack("<II", zlib.crc32(data), len(data))
 
 
 class FabgzReader(object):
@@ -81,10 +70,15 @@ class FabgzReader(object):
         self._fh = FastaFile(filename)
 
     def __del__(self) -> None:
-        self._fh.close()
+        self.close()
 
     def __enter__(self) -> Self:
-        self.lock.acquire()
+        if metrics.enabled:
+            t0 = time.perf_counter()
+            self.lock.acquire()
+            metrics.observe("fabgz.lock_wait", time.perf_counter() - t0)
+        else:
+            self.lock.acquire()
         return self
 
     def __exit__(
@@ -93,7 +87,10 @@ class FabgzReader(object):
         self.lock.release()
 
     def fetch(self, seq_id: str, start: Optional[int] = None, end: Optional[int] = None):
-        return self._fh.fetch(seq_id.encode("ascii"), start, end)  # type: ignore
+        with metrics.Timer("fabgz.fetch"):
+            seq = self._fh.fetch(seq_id.encode("ascii"), start, end)  # type: ignore
+        metrics.incr("fabgz.bytes", len(seq))
+        return seq
 
     def keys(self):
         return self._fh.references
@@ -108,60 +105,253 @@ class FabgzReader(object):
     def filename(self) -> str:
         return self._fh.filename
 
+    def close(self) -> None:
+        if hasattr(self, "_fh"):
+            self._fh.close()
+
+
+class FabgzReaderPool:
+    """pool of open FabgzReaders
+
+    A FabgzReader serves one fetch at a time, so concurrent fetches
+    from one file need separate handles.  The pool keeps up to
+    max_per_path readers per file and up to max_open readers in total
+    (None for no limit).  When the total limit is reached, the least
+    recently used idle reader is closed to make room; if all readers
+    are in use, requests wait for one to be released.  If max_open is
+    0, readers are opened for each request and closed afterward.
+
+    Usage::
+
+        pool = FabgzReaderPool(max_per_path=4, max_open=100)
+        with pool.reader(path) as fabgz:
+            seq = fabgz.fetch(seq_id)
+
+    """
+
+    def __init__(
+        self, max_per_path: int = default_readers_per_path, max_open: Optional[int] = None
+    ) -> None:
+        if max_per_path < 1:
+            raise ValueError("max_per_path must be at least 1")
+        self.max_per_path = max_per_path
+        self.max_open = max_open
+        self._cond = threading.Condition()
+        self._idle: dict[str, list[FabgzReader]] = collections.defaultdict(list)
+        self._idle_lru: collections.OrderedDict[FabgzReader, str] = collections.OrderedDict()
+        self._n_open: collections.Counter[str] = collections.Counter()
+        self._n_open_total = 0
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._closed = False
+
+    @contextlib.contextmanager
+    def reader(self, path: str) -> Iterator[FabgzReader]:
+        """context manager that yields a reader for path for exclusive use"""
+        if self.max_open == 0:
+            with metrics.Timer("readers.open"):
+                fabgz = FabgzReader(path)
+            try:
+                yield fabgz
+            finally:
+                fabgz.close()
+            return
+        with metrics.Timer("readers.acquire"):
+            fabgz = self._acquire(path)
+        try:
+            yield fabgz
+        finally:
+            self._release(path, fabgz)
+
+    def close(self) -> None:
+        """close idle readers; readers in use are closed when released"""
+        with self._cond:
+            self._closed = True
+            for fabgz, path in self._idle_lru.items():
+                fabgz.close()
+                self._n_open[path] -= 1
+                self._n_open_total -= 1
+            self._idle.clear()
+            self._idle_lru.clear()
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "open": self._n_open_total,
+                "idle": len(self._idle_lru),
+                "max_per_path": self.max_per_path,
+                "max_open": self.max_open,
+            }
+
+    def _acquire(self, path: str) -> FabgzReader:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("FabgzReaderPool is closed")
+                if self._idle[path]:
+                    fabgz = self._idle[path].pop()
+                    del self._idle_lru[fabgz]
+                    self._hits += 1
+                    return fabgz
+                if self._n_open[path] < self.max_per_path:
+                    if self.max_open is None or self._n_open_total < self.max_open:
+                        break
+                    if self._idle_lru:
+                        old, old_path = self._idle_lru.popitem(last=False)
+                        self._idle[old_path].remove(old)
+                        old.close()
+                        self._n_open[old_path] -= 1
+                        self._n_open_total -= 1
+                        metrics.incr("readers.evictions")
+                        break
+                self._waits += 1
+                with metrics.Timer("readers.wait"):
+                    self._cond.wait()
+            # reserve the slot, then open outside the lock
+            self._n_open[path] += 1
+            self._n_open_total += 1
+            self._misses += 1
+        try:
+            with metrics.Timer("readers.open"):
+                return FabgzReader(path)
+        except BaseException:
+            with self._cond:
+                self._n_open[path] -= 1
+                self._n_open_total -= 1
+                self._cond.notify_all()
+            raise
+
+    def _release(self, path: str, fabgz: FabgzReader) -> None:
+        with self._cond:
+            if self._closed:
+                fabgz.close()
+                self._n_open[path] -= 1
+                self._n_open_total -= 1
+            else:
+                self._idle[path].append(fabgz)
+                self._idle_lru[fabgz] = path
+            # waiters may be waiting for this path or for any slot
+            self._cond.notify_all()
+
 
 class FabgzWriter(object):
-    # TODO: Use temp filename until indexes are built and perms are set, then rename
-    def __init__(self, filename: str) -> None:
+    """writes sequences as block gzip compressed FASTA with .fai and .gzi
+    indexes
+
+    Blocks are compressed on a pool of `threads` threads and written
+    in order as they complete.  The .fai and .gzi indexes are built
+    while writing and are identical to those created by htslib.  Data
+    are written to a temporary file that is renamed to filename on
+    close(), when all files are also made read-only.
+
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        threads: Optional[int] = None,
+        compresslevel: int = default_compresslevel,
+    ) -> None:
         super(FabgzWriter, self).__init__()
 
         self.filename = filename
         self._fh = None
-        self._basepath, suffix = os.path.splitext(self.filename)
-        if suffix != ".bgz":
+        if os.path.splitext(self.filename)[1] != ".bgz":
             raise RuntimeError("Path must end with .bgz")
-
-        self._bgzip_exe = _find_bgzip()
+        self._tmp_filename = self.filename + ".tmp"
 
         files = [
             self.filename,
             self.filename + ".fai",
             self.filename + ".gzi",
-            self._basepath,
+            self._tmp_filename,
         ]
         if any(os.path.exists(fn) for fn in files):
             raise RuntimeError(
                 "One or more target files already exists ({})".format(", ".join(files))
             )
 
-        self._fh = io.open(self._basepath, encoding="ascii", mode="w")
+        if threads is None:
+            threads = min(4, os.cpu_count() or 1)
+        self._compresslevel = compresslevel
+        self._max_pending = 2 * threads
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="FabgzWriter")
+        self._pending: collections.deque[tuple[Future, int]] = collections.deque()
+        self._buf = bytearray()
+        self._uoffset = 0  # uncompressed bytes submitted to the executor
+        self._coffset = 0  # compressed bytes written
+        self._uwritten = 0  # uncompressed bytes written
+        self._fai: list[str] = []
+        self._gzi: list[tuple[int, int]] = []
+
+        self._fh = open(self._tmp_filename, mode="wb")
         _logger.debug("opened " + self.filename + " for writing")
         self._added = set()
 
     def store(self, seq_id: str, seq: str) -> str:
-        def wrap_lines(seq, line_width):
-            for i in range(0, len(seq), line_width):
-                yield seq[i : i + line_width]
-
-        if seq_id not in self._added:
-            if self._fh is None:
-                raise RuntimeError("Writer has already been closed -- create a new FabgzWriter.")
-            self._fh.write(">" + seq_id + "\n")
-            for line in wrap_lines(seq, line_width):
-                self._fh.write(line + "\n")
-            self._added.add(seq_id)
-            _logger.debug("added seq_id {i}; length {l}".format(i=seq_id, l=len(seq)))
+        self.store_stream(seq_id, [seq])
         return seq_id
 
+    def store_stream(self, seq_id: str, chunks: Iterable[str]) -> int:
+        """store a sequence given as an iterable of string chunks of any
+        size; returns the number of residues written (0 if seq_id was
+        already added)"""
+        if seq_id in self._added:
+            return 0
+        if self._fh is None:
+            raise RuntimeError("Writer has already been closed -- create a new FabgzWriter.")
+        self._write((">" + seq_id + "\n").encode("ascii"))
+        offset = self._uoffset + len(self._buf)
+        n = 0
+        carry = ""
+        for chunk in chunks:
+            if carry:
+                chunk = carry + chunk
+            n_full = len(chunk) - len(chunk) % line_width
+            if n_full:
+                self._write(
+                    (
+                        "\n".join(chunk[i : i + line_width] for i in range(0, n_full, line_width))
+                        + "\n"
+                    ).encode("ascii")
+                )
+            carry = chunk[n_full:]
+            n += n_full
+        if carry:
+            self._write((carry + "\n").encode("ascii"))
+            n += len(carry)
+        if n:  # htslib does not index empty sequences
+            linebases = min(n, line_width)
+            self._fai.append(f"{seq_id}\t{n}\t{offset}\t{linebases}\t{linebases + 1}\n")
+        self._added.add(seq_id)
+        _logger.debug("added seq_id {i}; length {l}".format(i=seq_id, l=n))
+        return n
+
     def close(self) -> None:
         if self._fh:
+            if self._buf:
+                self._submit(bytes(self._buf))
+                self._buf.clear()
+            while self._pending:
+                self._write_next_block()
+            self._executor.shutdown()
+            self._fh.write(bgzf_eof_block)
             self._fh.close()
             self._fh = None
-            subprocess.check_call([self._bgzip_exe, "--force", self._basepath])
-            os.rename(self._basepath + ".gz", self.filename)
 
-            # open file with FastaFile to create indexes, then make all read-only
-            _fh = FastaFile(self.filename)
-            _fh.close()
+            with open(self.filename + ".fai", mode="w", encoding="ascii") as fai:
+                fai.writelines(self._fai)
+            with open(self.filename + ".gzi", mode="wb") as gzi:
+                gzi.write(struct.pack("<Q", len(self._gzi)))
+                for coffset, uoffset in self._gzi:
+                    gzi.write(struct.pack("<QQ", coffset, uoffset))
+            os.rename(self._tmp_filename, self.filename)
+
             os.chmod(self.filename, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
             os.chmod(self.filename + ".fai", stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
             os.chmod(self.filename + ".gzi", stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
@@ -174,3 +364,30 @@ class FabgzWriter(object):
                 "FabgzWriter({}) was not explicitly closed; data may be lost".format(self.filename)
             )
             self.close()
+
+    ############################################################################
+    # Internal Methods
+
+    def _write(self, data: bytes) -> None:
+        """buffer uncompressed data, submitting each full block for compression"""
+        self._buf += data
+        while len(self._buf) >= bgzf_block_size:
+            self._submit(bytes(self._buf[:bgzf_block_size]))
+            del self._buf[:bgzf_block_size]
+
+    def _submit(self, block: bytes) -> None:
+        if len(self._pending) >= self._max_pending:
+            self._write_next_block()
+        future = self._executor.submit(_bgzf_block, block, self._compresslevel)
+        self._pending.append((future, len(block)))
+        self._uoffset += len(block)
+
+    def _write_next_block(self) -> None:
+        """wait for the oldest pending block and write it"""
+        future, usize = self._pending.popleft()
+        cdata = future.result()
+        if self._coffset:  # .gzi omits the first block
+            self._gzi.append((self._coffset, self._uwritten))
+        self._fh.write(cdata)  # type: ignore
+        self._coffset += len(cdata)
+        self._uwritten += usize
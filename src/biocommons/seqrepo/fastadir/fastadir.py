@@ -1,18 +1,24 @@
+import collections
+import contextlib
 import datetime
-import functools
 import importlib.resources
+import itertools
 import logging
 import os
 import sqlite3
 import time
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from typing import Any, Optional
 
 import yoyo
 
-from ..config import SEQREPO_LRU_CACHE_MAXSIZE
+from .._internal import metrics
+from .._internal.bytecache import ByteCache, approx_sizeof
+from .._internal.keyindex import KeySet
+from .._internal.sqlite import ConnectionPool, cached_schema_version, connect, is_immutable
+from ..config import SEQREPO_CHUNK_CACHE_BYTES, SEQREPO_LRU_CACHE_MAXSIZE
 from .bases import BaseReader, BaseWriter
-from .fabgz import FabgzReader, FabgzWriter
+from .fabgz import FabgzReader, FabgzReaderPool, FabgzWriter, default_readers_per_path
 
 _logger = logging.getLogger(__name__)
 
@@ -28,6 +34,15 @@ _logger = logging.getLogger(__name__)
 
 expected_schema_version = 1
 
+# Small fetches are served from a process-wide cache of fixed-size
+# residue chunks keyed by (path, seq_id, chunk number), so that many
+# overlapping fetches near one locus read and decompress the file once.
+# Sequence files are never modified, so cached chunks are never stale.
+# Fetches longer than max_chunked_fetch bypass the cache.
+chunk_size = 16 * 1024
+max_chunked_fetch = 1024 * 1024
+chunk_cache = ByteCache(SEQREPO_CHUNK_CACHE_BYTES)
+
 
 class FastaDir(BaseReader, BaseWriter):
     """This class provides simple a simple key-value interface to a
@@ -58,6 +73,8 @@ class FastaDir(BaseReader, BaseWriter):
         writeable: bool = False,
         check_same_thread: bool = True,
         fd_cache_size: Optional[int] = 0,
+        immutable: Optional[bool] = None,
+        readers_per_path: int = default_readers_per_path,
     ) -> None:
         """Creates a new sequence repository if necessary, and then opens it"""
 
@@ -65,18 +82,19 @@ class FastaDir(BaseReader, BaseWriter):
         self._db_path = os.path.join(self._root_dir, "db.sqlite3")
         self._writing = None
         self._writeable = writeable
+        self._immutable = (
+            immutable if immutable is not None else not writeable and is_immutable(self._db_path)
+        )
+        self._seq_ids: Optional[KeySet] = None  # loaded on first use when writeable
 
         if self._writeable:
             os.makedirs(self._root_dir, exist_ok=True)
             self._upgrade_db()
 
-        self._db = sqlite3.connect(
-            self._db_path,
-            check_same_thread=check_same_thread,
-            detect_types=sqlite3.PARSE_DECLTYPES,
-        )
-        schema_version = self.schema_version()
-        self._db.row_factory = sqlite3.Row
+        self._check_same_thread = check_same_thread
+        # read-only instances open a connection per thread
+        self._pool = ConnectionPool(self._connect, per_thread=not self._writeable)
+        schema_version = cached_schema_version(self._db_path, self._immutable, self.schema_version)
 
         # if we're not at the expected schema version for this code, bail
         if schema_version != expected_schema_version:
@@ -90,13 +108,13 @@ class FastaDir(BaseReader, BaseWriter):
         else:
             _logger.warning(f"File descriptor caching enabled (size={fd_cache_size})")
 
-        @functools.lru_cache(maxsize=fd_cache_size)
-        def _open_for_reading(path):
-            if fd_cache_size == 0:
-                _logger.debug("Opening for reading uncached: " + path)
-            return FabgzReader(path)
+        # readers for concurrent fetches; fd_cache_size limits open files
+        self._readers = FabgzReaderPool(max_per_path=readers_per_path, max_open=fd_cache_size)
 
-        self._open_for_reading = _open_for_reading
+        # seqinfo records by seq_id; invalidated when a sequence is stored
+        self._seqinfo_cache = ByteCache(
+            None, sizeof=approx_sizeof, max_entries=SEQREPO_LRU_CACHE_MAXSIZE
+        )
 
     def __del__(self) -> None:
         self.close()
@@ -126,13 +144,15 @@ class FastaDir(BaseReader, BaseWriter):
         """
         if self._writing is not None:
             self.commit()
-        if hasattr(self, "_db") and self._db:
-            self._db.close()
+        if hasattr(self, "_pool"):
+            self._pool.close()
 
     # ############################################################################
     # Special methods
 
     def __contains__(self, seq_id: str) -> bool:
+        if self._writeable:
+            return seq_id in self._get_seq_ids()
         c = self._fetch_one(
             "select exists(select 1 from seqinfo where seq_id = ? limit 1) as ex",
             (seq_id,),
@@ -175,20 +195,94 @@ class FastaDir(BaseReader, BaseWriter):
 
         path = os.path.join(self._root_dir, rec["relpath"])
 
-        with self._open_for_reading(path) as fabgz:
+        if self._is_chunkable(rec, start, end):
+            return self._fetch_chunked(path, rec, start, end)
+        with self._readers.reader(path) as fabgz:
             seq = fabgz.fetch(seq_id, start, end)
         return seq
 
-    @functools.lru_cache(maxsize=SEQREPO_LRU_CACHE_MAXSIZE)
+    def fetch_many(self, requests: Iterable[tuple[str, Optional[int], Optional[int]]]) -> list[str]:
+        """fetch many sequences (or slices), returning a list of sequences in
+        the same order as `requests`
+
+        `requests` is an iterable of (seq_id, start, end) tuples; start
+        and end may be None.  Requests are grouped by the file that
+        contains the sequence so that each file is opened only once.
+        Raises KeyError if any seq_id does not exist.
+
+        """
+        requests = list(requests)
+        seqinfos = self.fetch_seqinfo_many(seq_id for seq_id, _, _ in requests)
+        for seq_id, _, _ in requests:
+            if seq_id not in seqinfos:
+                raise KeyError(seq_id)
+
+        groups = collections.defaultdict(list)
+        for i, (seq_id, _, _) in enumerate(requests):
+            groups[seqinfos[seq_id]["relpath"]].append(i)
+
+        if self._writing and self._writing["relpath"] in groups:
+            _logger.warning(
+                """Fetching from file opened for writing;
+            closing first ({})""".format(self._writing["relpath"])
+            )
+            self.commit()
+
+        seqs: list[str] = [""] * len(requests)
+        for relpath, idxs in groups.items():
+            path = os.path.join(self._root_dir, relpath)
+            with self._readers.reader(path) as fabgz:
+                for i in idxs:
+                    seq_id, start, end = requests[i]
+                    rec = seqinfos[seq_id]
+                    if self._is_chunkable(rec, start, end):
+                        seqs[i] = self._fetch_chunked(path, rec, start, end, fabgz=fabgz)
+                    else:
+                        seqs[i] = fabgz.fetch(seq_id, start, end)
+        return seqs
+
     def fetch_seqinfo(self, seq_id: str) -> dict:
         """fetch sequence info by seq_id"""
-        rec = self._fetch_one(
-            """select * from seqinfo where seq_id = ? order by added desc""", (seq_id,)
-        )
+        seqinfo = self._seqinfo_cache.get(seq_id)
+        if seqinfo is not None:
+            return seqinfo
+        with metrics.Timer("seqinfo.lookup"):
+            rec = self._fetch_one(
+                """select * from seqinfo where seq_id = ? order by added desc""", (seq_id,)
+            )
 
         if rec is None:
             raise KeyError(seq_id)
-        return dict(rec)
+        seqinfo = dict(rec)
+        self._seqinfo_cache.put(seq_id, seqinfo)
+        return seqinfo
+
+    def cache_seqinfo(self, seqinfo: dict) -> None:
+        """add sequence info obtained elsewhere (e.g., from an alias
+        index) to the seqinfo cache"""
+        self._seqinfo_cache.put(seqinfo["seq_id"], seqinfo)
+
+    def fetch_seqinfo_many(self, seq_ids: Iterable[str], chunk_size: int = 500) -> dict[str, dict]:
+        """fetch sequence info for many seq_ids, returning a dict of
+        seq_id -> seqinfo dict
+
+        seq_ids that do not exist are omitted from the result.  Lookups
+        are made in chunks of `chunk_size`, each with a single query.
+
+        """
+        keys = list(set(seq_ids))
+        seqinfos: dict[str, dict] = {}
+        cursor = self._db.cursor()
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i : i + chunk_size]
+            sql = "select * from seqinfo where seq_id in ({})".format(  # nosec
+                ", ".join(["?"] * len(chunk))
+            )
+            with metrics.Timer("seqinfo.lookup"):
+                cursor.execute(sql, chunk)
+                seqinfos.update((rec["seq_id"], dict(rec)) for rec in cursor)
+        cursor.close()
+        return seqinfos
 
     def schema_version(self) -> Optional[int]:
         """return schema version as integer"""
@@ -204,10 +298,23 @@ class FastaDir(BaseReader, BaseWriter):
               n_files from seqinfo"""
         return dict(self._fetch_one(sql))
 
-    def store(self, seq_id: str, seq: str) -> str:
+    def store(self, seq_id: str, seq: str, alpha: Optional[str] = None) -> str:
         """store a sequence with key seq_id.  The sequence itself is stored in
         a fasta file and a reference to it in the sqlite3 database.
 
+        alpha, the sorted distinct residues of seq, is computed if not
+        provided.
+
+        """
+        if alpha is None:
+            alpha = "".join(sorted(set(seq)))
+        return self.store_stream(seq_id, [seq], alpha=alpha)
+
+    def store_stream(self, seq_id: str, chunks: Iterable[str], alpha: str) -> str:
+        """store a sequence, given as an iterable of string chunks, with key
+        seq_id.  Unlike store(), the sequence is never held in memory
+        in its entirety, so alpha must be provided by the caller.
+
         """
 
         if not self._writeable:
@@ -230,20 +337,82 @@ class FastaDir(BaseReader, BaseWriter):
             self._writing = {"relpath": relpath, "fabgz": fabgz}
             _logger.debug("Opened for writing: %s", path)
 
-        self._writing["fabgz"].store(seq_id, seq)
-        alpha = "".join(sorted(set(seq)))
+        seq_len = self._writing["fabgz"].store_stream(seq_id, chunks)
         cursor = self._db.cursor()
         cursor.execute(
             """insert into seqinfo (seq_id, len, alpha, relpath)
                          values (?, ?, ?,?)""",
-            (seq_id, len(seq), alpha, self._writing["relpath"]),
+            (seq_id, seq_len, alpha, self._writing["relpath"]),
         )
         cursor.close()
+        self._seqinfo_cache.invalidate(seq_id)
+        if self._seq_ids is not None:
+            self._seq_ids.add(seq_id)
         return seq_id
 
     # ############################################################################
     # Internal methods
 
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """connection for the current thread"""
+        return self._pool.get()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = connect(
+            self._db_path,
+            writeable=self._writeable,
+            immutable=self._immutable,
+            # read-only connections are used by one thread but closed by any
+            check_same_thread=self._check_same_thread if self._writeable else False,
+        )
+        db.row_factory = sqlite3.Row
+        return db
+
+    @staticmethod
+    def _is_chunkable(rec: dict, start: Optional[int], end: Optional[int]) -> bool:
+        """return True if fetch(start, end) should use the chunk cache"""
+        if not chunk_cache.enabled or rec["len"] is None:
+            return False
+        start = start or 0
+        end = rec["len"] if end is None else min(end, rec["len"])
+        # leave invalid coordinates to pysam, which raises
+        return 0 <= start <= end and end - start <= max_chunked_fetch
+
+    def _fetch_chunked(
+        self,
+        path: str,
+        rec: dict,
+        start: Optional[int],
+        end: Optional[int],
+        fabgz: Optional[FabgzReader] = None,
+    ) -> str:
+        """fetch sequence slice by chunks from chunk_cache, reading missing chunks"""
+        seq_id, seq_len = rec["seq_id"], rec["len"]
+        start = start or 0
+        end = seq_len if end is None else min(end, seq_len)
+        if start >= end:
+            return ""
+        first, last = start // chunk_size, (end - 1) // chunk_size
+        chunks = [chunk_cache.get((path, seq_id, ci)) for ci in range(first, last + 1)]
+        missing = [ci for ci, chunk in zip(range(first, last + 1), chunks) if chunk is None]
+        if missing:
+            with contextlib.ExitStack() as stack:
+                if fabgz is None:
+                    fabgz = stack.enter_context(self._readers.reader(path))
+                # read each run of consecutive missing chunks with one fetch
+                for _, run in itertools.groupby(enumerate(missing), lambda x: x[1] - x[0]):
+                    cis = [ci for _, ci in run]
+                    seq = fabgz.fetch(
+                        seq_id, cis[0] * chunk_size, min((cis[-1] + 1) * chunk_size, seq_len)
+                    )
+                    for j, ci in enumerate(cis):
+                        chunk = seq[j * chunk_size : (j + 1) * chunk_size]
+                        chunk_cache.put((path, seq_id, ci), chunk)
+                        chunks[ci - first] = chunk
+        offset = first * chunk_size
+        return "".join(chunks)[start - offset : end - offset]
+
     def _fetch_one(self, sql: str, params: tuple[str, ...] = ()) -> Any:
         cursor = self._db.cursor()
         cursor.execute(sql, params)
@@ -251,6 +420,21 @@ class FastaDir(BaseReader, BaseWriter):
         cursor.close()
         return val
 
+    def _get_seq_ids(self) -> KeySet:
+        """return the in-memory set of stored seq_ids, loading it if necessary
+
+        Writeable instances test membership in memory so that loading
+        sequences that already exist doesn't require a query for each
+        one (see _internal/keyindex.py).
+
+        """
+        if self._seq_ids is None:
+            cursor = self._db.execute("select seq_id from seqinfo")
+            self._seq_ids = KeySet.from_strings(r[0] for r in cursor)
+            cursor.close()
+            _logger.info(f"Loaded {len(self._seq_ids)} seq_ids for membership tests")
+        return self._seq_ids
+
     def _upgrade_db(self) -> None:
         """upgrade db using scripts for specified (current) schema version"""
         migration_path = "_data/migrations"
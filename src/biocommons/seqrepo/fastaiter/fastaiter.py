@@ -1,13 +1,34 @@
 from io import StringIO
-from typing import Iterator
+from typing import Iterator, Optional, Union
 
 
-def FastaIter(handle: StringIO) -> Iterator[tuple[str, str]]:
+def FastaIter(
+    handle: StringIO, chunk_size: Optional[int] = None
+) -> Iterator[tuple[str, Union[str, Iterator[str]]]]:
     """generator that returns (header, sequence) tuples from an open FASTA file handle
 
     Lines before the start of the first record are ignored.
+
+    If chunk_size is given, the sequence is returned as an iterator
+    of strings of about chunk_size residues (and at least one line)
+    each, so that a record never needs to be held in memory in its
+    entirety.  Each record's chunk iterator reads directly from the
+    handle; any chunks not consumed before advancing to the next
+    record are read and discarded.
+
+    >>> for header, chunks in FastaIter(StringIO(">s1\\nACGT\\nAC\\n>s2\\nTT\\n"), chunk_size=4):
+    ...     print(header, list(chunks))
+    s1 ['ACGT', 'AC']
+    s2 ['TT']
+
     """
 
+    if chunk_size is not None:
+        return _fasta_chunk_iter(handle, chunk_size)
+    return _fasta_iter(handle)
+
+
+def _fasta_iter(handle: StringIO) -> Iterator[tuple[str, str]]:
     seq_lines = None
     header = None
     for line in handle:
@@ -24,3 +45,38 @@ def FastaIter(handle: StringIO) -> Iterator[tuple[str, str]]:
         yield header, "".join(seq_lines)  # noqa: F821
     else:  # no FASTA records in file
         return
+
+
+def _fasta_chunk_iter(handle: StringIO, chunk_size: int) -> Iterator[tuple[str, Iterator[str]]]:
+    # state["header"] holds the header line that ended the previous
+    # record, which is read by that record's chunk iterator
+    state: dict[str, Optional[str]] = {"header": None}
+    for line in handle:
+        if line.startswith(">"):
+            state["header"] = line[1:].rstrip()
+            break
+
+    while state["header"] is not None:
+        header, state["header"] = state["header"], None
+        chunks = _record_chunks(handle, state, chunk_size)
+        yield header, chunks
+        for _ in chunks:  # discard unconsumed chunks
+            pass
+
+
+def _record_chunks(handle: StringIO, state: dict, chunk_size: int) -> Iterator[str]:
+    lines: list[str] = []
+    n = 0
+    for line in handle:
+        if line.startswith(">"):
+            state["header"] = line[1:].rstrip()
+            break
+        line = line.strip()
+        lines.append(line)
+        n += len(line)
+        if n >= chunk_size:
+            yield "".join(lines)
+            lines = []
+            n = 0
+    if n:
+        yield "".join(lines)
@@ -1,12 +1,17 @@
 import datetime
 import logging
+import re
 import sqlite3
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from importlib import resources
 from typing import Optional, Union
 
 import yoyo
 
+from .._internal import metrics
+from .._internal.errors import alias_error
+from .._internal.keyindex import KeyMap
+from .._internal.sqlite import ConnectionPool, cached_schema_version, connect, is_immutable
 from .._internal.translate import translate_alias_records, translate_api2db
 
 _logger = logging.getLogger(__name__)
@@ -21,6 +26,26 @@ if sqlite3.sqlite_version_info < min_sqlite_version_info:  # pragma: no cover
     raise ImportError(msg)
 
 
+# search_aliases() uses an FTS5 trigram table, if present, for queries
+# with leading or inner wildcards
+search_index_min_sqlite_version_info = (3, 34, 0)
+search_index_statements = [
+    """create virtual table seqalias_fts using fts5(alias, content='seqalias',
+    content_rowid='seqalias_id', tokenize='trigram case_sensitive 1')""",
+    """create trigger seqalias_fts_ai after insert on seqalias begin
+    insert into seqalias_fts(rowid, alias) values (new.seqalias_id, new.alias);
+    end""",
+    """create trigger seqalias_fts_ad after delete on seqalias begin
+    insert into seqalias_fts(seqalias_fts, rowid, alias) values ('delete', old.seqalias_id, old.alias);
+    end""",
+    """create trigger seqalias_fts_au after update of alias on seqalias begin
+    insert into seqalias_fts(seqalias_fts, rowid, alias) values ('delete', old.seqalias_id, old.alias);
+    insert into seqalias_fts(rowid, alias) values (new.seqalias_id, new.alias);
+    end""",
+    """insert into seqalias_fts(seqalias_fts) values ('rebuild')""",
+]
+
+
 sqlite3.register_converter("timestamp", lambda val: datetime.datetime.fromisoformat(val.decode()))
 
 
@@ -33,9 +58,16 @@ class SeqAliasDB:
         writeable: bool = False,
         translate_ncbi_namespace: Optional[str] = None,
         check_same_thread: bool = True,
+        immutable: Optional[bool] = None,
     ) -> None:
         self._db_path = db_path
         self._writeable = writeable
+        self._immutable = (
+            immutable if immutable is not None else not writeable and is_immutable(db_path)
+        )
+        # namespace -> KeyMap of current alias -> seq_id; loaded on first write to namespace
+        self._current_aliases: dict[str, KeyMap] = {}
+        self._search_index: Optional[bool] = None
 
         if translate_ncbi_namespace is not None:
             _logger.warning(
@@ -45,13 +77,10 @@ class SeqAliasDB:
 
         if self._writeable:
             self._upgrade_db()
-        self._db = sqlite3.connect(
-            self._db_path,
-            check_same_thread=check_same_thread,
-            detect_types=sqlite3.PARSE_DECLTYPES,
-        )
-        self._db.row_factory = sqlite3.Row
-        schema_version = self.schema_version()
+        self._check_same_thread = check_same_thread
+        # read-only instances open a connection per thread
+        self._pool = ConnectionPool(self._connect, per_thread=not self._writeable)
+        schema_version = cached_schema_version(self._db_path, self._immutable, self.schema_version)
         # if we're not at the expected schema version for this code, bail
         if schema_version != expected_schema_version:  # pragma: no cover
             raise RuntimeError(
@@ -87,8 +116,8 @@ class SeqAliasDB:
 
         This method is safe to call multiple times.
         """
-        if hasattr(self, "_db") and self._db:
-            self._db.close()
+        if hasattr(self, "_pool"):
+            self._pool.close()
 
     def __contains__(self, seq_id: str) -> bool:
         cursor = self._db.cursor()
@@ -120,6 +149,32 @@ class SeqAliasDB:
             )
         return [dict(r) for r in self.find_aliases(seq_id=seq_id, current_only=current_only)]
 
+    def create_search_index(self) -> None:
+        """create the trigram index that search_aliases() uses for queries
+        with leading or inner wildcards, if it does not exist
+
+        The index is an FTS5 table (which requires SQLite >= 3.34) that
+        triggers keep up to date as aliases are stored.  It is roughly
+        as large as the aliases it indexes.
+
+        """
+        if not self._writeable:
+            raise RuntimeError("Cannot write -- opened read-only")
+        if sqlite3.sqlite_version_info < search_index_min_sqlite_version_info:
+            min_version = ".".join(map(str, search_index_min_sqlite_version_info))
+            raise RuntimeError(
+                f"Search index requires sqlite3 >= {min_version} but {sqlite3.sqlite_version} is installed"
+            )
+        if self._has_search_index():
+            return
+        cursor = self._db.cursor()
+        for sql in search_index_statements:
+            cursor.execute(sql)
+        cursor.close()
+        self._db.commit()
+        self._search_index = True
+        _logger.info(f"Created alias search index in {self._db_path}")
+
     def find_aliases(
         self,
         seq_id: Optional[str] = None,
@@ -136,7 +191,9 @@ class SeqAliasDB:
         Regardless of arguments, results are ordered by seq_id.
 
         If arguments contain %, the `like` comparison operator is
-        used.  Otherwise arguments must match exactly.
+        used.  Otherwise arguments must match exactly.  `like` queries
+        scan all aliases; use search_aliases() for prefix and substring
+        searches.
 
         """
 
@@ -179,6 +236,119 @@ class SeqAliasDB:
         cursor.execute(sql, params)
         return translate_alias_records(dict(r) for r in cursor)
 
+    def resolve_many(
+        self, identifiers: Iterable[str], chunk_size: int = 400
+    ) -> dict[str, Union[str, KeyError]]:
+        """resolve many identifiers to seq_ids with a small number of queries
+
+        Identifiers are aliases, optionally namespaced (e.g.,
+        NM_000059.3 or refseq:NM_000059.3).  Returns a dict that maps
+        each distinct identifier to its seq_id, or to a KeyError if the
+        identifier is not found or does not refer to a unique sequence.
+        Only current aliases are considered, and arguments are matched
+        exactly (% is not interpreted as a wildcard).
+
+        Identifiers are resolved in chunks of `chunk_size`, each with a
+        single query.
+
+        """
+        # identifier -> (namespace, alias) as stored in the database
+        queries: dict[str, tuple[Optional[str], str]] = {}
+        for identifier in identifiers:
+            if identifier not in queries:
+                queries[identifier] = self._parse_identifier(identifier)
+
+        seq_ids: dict[tuple[Optional[str], str], set[str]] = {}
+        keys = list(set(queries.values()))
+        cursor = self._db.cursor()
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i : i + chunk_size]
+            values = ", ".join(["(?, ?)"] * len(chunk))
+            sql = f"""with q(namespace, alias) as (values {values})
+            select q.namespace, q.alias, sa.seq_id from q
+            join seqalias sa on sa.alias = q.alias
+              and (q.namespace is null or sa.namespace = q.namespace)
+            where sa.is_current = 1"""  # nosec
+            with metrics.Timer("aliases.resolve"):
+                cursor.execute(sql, [p for key in chunk for p in key])
+                for namespace, alias, seq_id in cursor:
+                    seq_ids.setdefault((namespace, alias), set()).add(seq_id)
+        cursor.close()
+
+        results: dict[str, Union[str, KeyError]] = {}
+        for identifier, key in queries.items():
+            found = seq_ids.get(key, set())
+            if len(found) == 1:
+                results[identifier] = next(iter(found))
+            else:
+                namespace, alias = (
+                    identifier.split(":", 1) if ":" in identifier else (None, identifier)
+                )
+                results[identifier] = alias_error(alias, namespace, ambiguous=bool(found))
+        return results
+
+    def search_aliases(
+        self,
+        query: str,
+        namespace: Optional[str] = None,
+        current_only: bool = True,
+        limit: Optional[int] = 100,
+        offset: int = 0,
+    ) -> list[dict]:
+        """return a page of alias records whose aliases match query
+
+        Matching is case-sensitive.  % in query matches any sequence of
+        characters; all other characters, including _, match only
+        themselves.  Queries without % match exactly, and prefix queries
+        (e.g., NM_0005%) are range scans of the alias index.  Other
+        queries (e.g., %ENST00000%) use the index created by
+        create_search_index() if it exists and query has at least three
+        consecutive characters without %; otherwise they scan all
+        aliases.
+
+        Records are ordered by alias, namespace, and seqalias_id, and
+        the page has up to `limit` records (None for all) after the
+        first `offset`.  As with find_aliases(), records in translated
+        namespaces (e.g., refseq for NCBI) follow the stored record and
+        do not count toward limit and offset.
+
+        """
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("limit and offset must not be negative")
+
+        clauses = []
+        params: list[Union[str, int]] = []
+        if namespace is not None:
+            ns_api2db = translate_api2db(namespace, query)
+            if ns_api2db:
+                db_namespace, db_query = ns_api2db[0]
+                # ga4gh aliases are translated by replacing SQ.
+                if db_query is not None and (namespace != "ga4gh" or query.startswith("SQ.")):
+                    query = db_query
+                namespace = db_namespace
+            clauses += ["namespace = ?"]
+            params += [namespace]
+
+        alias_clauses, alias_params = self._alias_search_clauses(query)
+        clauses += alias_clauses
+        params += alias_params
+        if current_only:
+            clauses += ["is_current = 1"]
+
+        sql = "select seqalias_id, seq_id, alias, added, is_current, namespace from seqalias"
+        if clauses:
+            sql += " where " + " and ".join(clauses)
+        sql += " order by alias, namespace, seqalias_id limit ? offset ?"
+        params += [-1 if limit is None else limit, offset]
+
+        _logger.debug(f"Executing: {sql} with params {params}")
+        cursor = self._db.cursor()
+        with metrics.Timer("aliases.search"):
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        cursor.close()
+        return list(translate_alias_records(dict(r) for r in rows))
+
     def schema_version(self) -> int:
         """return schema version as integer"""
         cursor = self._db.cursor()
@@ -219,6 +389,8 @@ class SeqAliasDB:
                 (seq_id, namespace, alias),
             )
             # success => new record
+            if namespace in self._current_aliases:
+                self._current_aliases[namespace][alias] = seq_id
             return cursor.lastrowid
         except Exception as ex:
             # Every driver has own class for IntegrityError so we have to
@@ -245,9 +417,143 @@ class SeqAliasDB:
         )
         return self.store_alias(seq_id, namespace, alias)
 
+    def store_aliases(
+        self,
+        records: Iterable[tuple[str, str, str]],
+        batch_size: int = 10000,
+        check_current: bool = True,
+    ) -> int:
+        """associate many namespaced aliases with sequences; returns the
+        number of new associations
+
+        records is an iterable of (seq_id, namespace, alias) tuples.
+        The result is the same as calling store_alias() for each record
+        in order: duplicate associations are discarded silently, and an
+        alias that is currently associated with a different sequence is
+        reassigned.
+
+        Records are stored in batches of up to `batch_size`, each with
+        one update (to deprecate reassigned aliases) and one insert.
+
+        Records that are already current are skipped without a query
+        using an in-memory index of current aliases, which is loaded for
+        each namespace on first use.  Callers that know that records are
+        new (e.g., digest aliases for a new sequence) may pass
+        check_current=False to avoid loading the index.
+
+        """
+
+        if not self._writeable:
+            raise RuntimeError("Cannot write -- opened read-only")
+
+        cursor = self._db.cursor()
+        cursor.execute(
+            "create temp table if not exists alias_batch"
+            " (seq_id text not null, namespace text not null, alias text not null)"
+        )
+
+        n_added = 0
+        batch: dict[tuple[str, str], str] = {}  # (namespace, alias) -> seq_id
+        for seq_id, namespace, alias in records:
+            ns_api2db = translate_api2db(namespace, alias)
+            if ns_api2db:
+                namespace, new_alias = ns_api2db[0]
+                if new_alias is not None:
+                    alias = new_alias
+            key = (namespace, alias)
+            if (
+                check_current
+                and key not in batch
+                and self._get_current_aliases(namespace).matches(alias, seq_id)
+            ):
+                continue
+            if batch.get(key, seq_id) != seq_id:
+                # reassigned within this batch; store the earlier association first
+                n_added += self._store_alias_batch(cursor, batch)
+                batch = {}
+            batch[key] = seq_id
+            if len(batch) >= batch_size:
+                n_added += self._store_alias_batch(cursor, batch)
+                batch = {}
+        if batch:
+            n_added += self._store_alias_batch(cursor, batch)
+        cursor.close()
+        return n_added
+
     # ############################################################################
     # Internal methods
 
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """connection for the current thread"""
+        return self._pool.get()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = connect(
+            self._db_path,
+            writeable=self._writeable,
+            immutable=self._immutable,
+            # read-only connections are used by one thread but closed by any
+            check_same_thread=self._check_same_thread if self._writeable else False,
+        )
+        db.row_factory = sqlite3.Row
+        return db
+
+    def _has_search_index(self) -> bool:
+        """return True if the alias search index exists and is usable"""
+        if self._search_index is None:
+            cursor = self._db.execute(
+                "select exists(select 1 from sqlite_master where type = 'table'"
+                " and name = 'seqalias_fts') as ex"
+            )
+            self._search_index = bool(cursor.fetchone()["ex"]) and (
+                sqlite3.sqlite_version_info >= search_index_min_sqlite_version_info
+            )
+            cursor.close()
+        return self._search_index
+
+    def _get_current_aliases(self, namespace: str) -> KeyMap:
+        """return the in-memory map of current aliases to seq_ids in
+        namespace, loading it if necessary
+
+        store_aliases() uses these maps to skip aliases that are
+        already current without querying (see _internal/keyindex.py).
+        Maps are loaded per namespace so that the cost of loading is
+        proportional to the namespaces being written.
+
+        """
+        km = self._current_aliases.get(namespace)
+        if km is None:
+            cursor = self._db.execute(
+                "select alias, seq_id from seqalias where namespace = ? and is_current = 1",
+                (namespace,),
+            )
+            km = self._current_aliases[namespace] = KeyMap.from_items(cursor)
+            cursor.close()
+            _logger.info(f"Loaded current aliases for namespace {namespace}")
+        return km
+
+    def _alias_search_clauses(self, query: str) -> tuple[list[str], list[str]]:
+        """return where clauses and parameters that match aliases to a
+        search_aliases() query"""
+        fragments = query.split("%")
+        if len(fragments) == 1:
+            return ["alias = ?"], [query]
+        if not any(fragments[1:]):
+            # prefix query: range scan of seqalias_alias_idx
+            prefix = fragments[0]
+            if not prefix:
+                return [], []
+            upper = _prefix_upper_bound(prefix)
+            if upper is None:
+                return ["alias >= ?"], [prefix]
+            return ["alias >= ?", "alias < ?"], [prefix, upper]
+        pattern = "*".join(re.sub(r"([*?\[])", r"[\1]", f) for f in fragments)
+        if self._has_search_index() and any(len(f) >= 3 for f in fragments):
+            # the trigram index finds candidates only for fragments of 3+ characters
+            return ["seqalias_id in (select rowid from seqalias_fts where alias glob ?)"], [pattern]
+        return ["alias glob ?"], [pattern]
+
     def _dump_aliases(self) -> None:  # pragma: no cover
         import prettytable  # type: ignore
 
@@ -259,6 +565,45 @@ class SeqAliasDB:
             pt.add_row([r[f] for f in fields])
         print(pt)
 
+    def _store_alias_batch(self, cursor: sqlite3.Cursor, batch: dict[tuple[str, str], str]) -> int:
+        """store a batch of distinct (namespace, alias) -> seq_id
+        associations; returns the number of new associations"""
+        cursor.execute("delete from alias_batch")
+        cursor.executemany(
+            "insert into alias_batch (seq_id, namespace, alias) values (?, ?, ?)",
+            ((seq_id, namespace, alias) for (namespace, alias), seq_id in batch.items()),
+        )
+        cursor.execute(
+            """update seqalias set is_current = 0 where seqalias_id in (
+              select sa.seqalias_id from alias_batch b
+              join seqalias sa on sa.namespace = b.namespace and sa.alias = b.alias
+              where sa.is_current = 1 and sa.seq_id != b.seq_id)"""
+        )
+        if cursor.rowcount:
+            _logger.debug(f"store_aliases: {cursor.rowcount} aliases reassigned")
+        cursor.execute(
+            "insert or ignore into seqalias (seq_id, namespace, alias)"
+            " select seq_id, namespace, alias from alias_batch"
+        )
+        n_added = cursor.rowcount
+        for (namespace, alias), seq_id in batch.items():
+            if namespace in self._current_aliases:
+                self._current_aliases[namespace][alias] = seq_id
+        return n_added
+
+    @staticmethod
+    def _parse_identifier(identifier: str) -> tuple[Optional[str], str]:
+        """split an identifier into (namespace, alias), translating the
+        namespace (and alias) to the form stored in the database"""
+        namespace, alias = identifier.split(":", 1) if ":" in identifier else (None, identifier)
+        if namespace is not None:
+            ns_api2db = translate_api2db(namespace, alias)
+            if ns_api2db:
+                namespace, db_alias = ns_api2db[0]
+                if db_alias is not None:
+                    alias = db_alias
+        return namespace, alias
+
     def _upgrade_db(self) -> None:
         """upgrade db using scripts for specified (current) schema version"""
         migration_path = "_data/migrations"
@@ -278,3 +623,23 @@ class SeqAliasDB:
         )
         migrations_to_apply = backend.to_apply(migrations)
         backend.apply_migrations(migrations_to_apply)
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """return the least string that is greater than all strings that
+    start with prefix, or None if there is no such string
+
+    sqlite compares text as utf-8 bytes, which sort by code point, so
+    aliases that start with prefix are those in [prefix, upper bound).
+
+    >>> _prefix_upper_bound("NM_0005")
+    'NM_0006'
+
+    """
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    cp = ord(prefix[-1]) + 1
+    if 0xD800 <= cp <= 0xDFFF:
+        cp = 0xE000  # surrogates cannot be encoded
+    return prefix[:-1] + chr(cp)
@@ -1,17 +1,30 @@
 from __future__ import annotations
 
+import collections
+import concurrent.futures
+import itertools
 import logging
 import os
 import re
-from collections.abc import Iterator, Sequence
-from functools import lru_cache
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Optional, Union
 
-import bioutils.digests
-from bioutils.digests import seq_seqhash as sha512t24u
-
-from .config import SEQREPO_FD_CACHE_MAXSIZE, SEQREPO_LRU_CACHE_MAXSIZE
-from .fastadir import FastaDir
+from ._internal import metrics as _metrics
+from ._internal.aliasindex import AliasIndex, ambiguous
+from ._internal.bytecache import ByteCache, approx_sizeof, make_byte_cache
+from ._internal.digests import SequenceDigester, digest_sequence
+from ._internal.errors import AliasNotUnique, alias_error
+from ._internal.recorder import TraceRecorder, record
+from ._internal.translate import digest_seq_id, translate_api2db
+from .config import (
+    SEQREPO_FD_CACHE_MAXSIZE,
+    SEQREPO_LRU_CACHE_MAXSIZE,
+    SEQREPO_NEGATIVE_CACHE_MAXSIZE,
+    SEQREPO_RESULT_CACHE_BYTES,
+    SEQREPO_RESULT_CACHE_POLICY,
+)
+from .fastadir import FastaDir, fastadir
 from .seqaliasdb import SeqAliasDB
 
 _logger = logging.getLogger(__name__)
@@ -21,43 +34,166 @@ ct_n_seqs = 20000
 ct_n_aliases = 60000
 ct_n_residues = 1e9
 
+# store_stream() spools sequences in memory up to this size, then on disk
+spool_max_size = 64 * 1024 * 1024
+spool_chunk_size = 1024 * 1024
+
+# store_many() digests sequences of up to parallel_max_size residues in
+# worker processes; larger sequences are streamed in this process
+parallel_max_size = 16 * 1024 * 1024
+
+# SequenceProxy compares strings in chunks of this size, larger than
+# fastadir.max_chunked_fetch so that comparisons bypass the chunk cache
+compare_chunk_size = 4 * 1024 * 1024
+# SequenceProxy reads ahead by iter_chunk_size residues when iterating
+# and searches in windows of search_chunk_size residues
+iter_chunk_size = 64 * 1024
+search_chunk_size = 1024 * 1024
+# SequenceProxy slices of at most window_max_size residues are fetched
+# with window_pad residues on each side, and the last such window is
+# kept to serve nearby slices
+window_pad = 1024
+window_max_size = 64 * 1024
+
 # namespace-alias separator
 nsa_sep = ":"
 
 uri_re = re.compile(r"([^:]+):(.+)")
 
 
+def _read_chunks(chunks: Iterable[str], max_size: int) -> tuple[list[str], Optional[Iterator[str]]]:
+    """read chunks until more than max_size residues have been read
+
+    Returns the chunks read and an iterator over the remaining chunks,
+    or None for the iterator if all chunks were read within max_size.
+
+    """
+    it = iter(chunks)
+    head = []
+    size = 0
+    for chunk in it:
+        head.append(chunk)
+        size += len(chunk)
+        if size > max_size:
+            return head, it
+    return head, None
+
+
 class SequenceProxy(Sequence):
     """Provides efficient and transparent string-like access, including
     random access slicing and reversing, to a biological sequence that
     is stored elsewhere.
 
+    Proxies hash and compare by seq_id, which is a digest of the
+    sequence, so they may be used as set members or dict keys without
+    fetching the sequence.  Proxies also compare equal to strings with
+    the same sequence, which are compared in chunks; note that a proxy
+    and an equal string have different hashes.
+
     """
 
-    def __init__(self, sr: SeqRepo, namespace: Optional[str], alias: str) -> None:
+    def __init__(
+        self,
+        sr: SeqRepo,
+        namespace: Optional[str],
+        alias: str,
+        seq_id: Optional[str] = None,
+        seqinfo: Optional[dict] = None,
+    ) -> None:
+        """The alias is resolved to seq_id, and seq_id to sequence info,
+        when first needed; either may be provided if already known."""
         self._sr = sr
-        self.seq_id = sr._get_unique_seqid(alias=alias, namespace=namespace)
-        self._md = sr.sequences.fetch_seqinfo(self.seq_id)
+        self._namespace = namespace
+        self._alias = alias
+        self._seq_id = seq_id
+        self._seqinfo = seqinfo
+        self._window: Optional[tuple[int, str]] = None  # (start, sequence)
+
+    @property
+    def seq_id(self) -> str:
+        if self._seq_id is None:
+            self._seq_id = self._sr._get_unique_seqid(alias=self._alias, namespace=self._namespace)
+        return self._seq_id
+
+    @property
+    def _md(self) -> dict:
+        if self._seqinfo is None:
+            self._seqinfo = self._sr.sequences.fetch_seqinfo(self.seq_id)
+        return self._seqinfo
 
     def _fetch(self, start: Optional[int] = None, end: Optional[int] = None) -> str:
-        seq_id = self.seq_id
-        return self._sr.sequences.fetch(seq_id, start, end)
+        return self._sr._fetch_seq(self.seq_id, start, end)
+
+    def _fetch_window(self, start: Optional[int], end: Optional[int]) -> str:
+        """fetch a slice, serving small slices from the window around the
+        last small slice when possible"""
+        if start is None or end is None or not 0 <= start <= end or end - start > window_max_size:
+            return self._fetch(start, end)
+        window = self._window
+        if window is not None:
+            w_start, w_seq = window
+            w_end = w_start + len(w_seq)
+            if w_start <= start and (end <= w_end or w_end == len(self)):
+                return w_seq[start - w_start : end - w_start]
+        w_start = max(0, start - window_pad)
+        w_seq = self._fetch(w_start, end + window_pad)
+        self._window = (w_start, w_seq)
+        return w_seq[start - w_start : end - w_start]
+
+    def _past_end(self, start: Optional[int]) -> bool:
+        """return True if start is beyond the end, where str finds no empty string"""
+        return start is not None and start > len(self)
+
+    def _find_all(self, sub: str, start: int, end: int) -> Iterator[int]:
+        """yield start positions of non-overlapping occurrences of sub
+        (which must not be empty) within [start, end), as str.find would
+        find them successively"""
+        n = len(sub)
+        pos = start
+        while pos + n <= end:
+            w_end = min(end, pos + search_chunk_size + n - 1)
+            seq = self._fetch(pos, w_end)
+            k = 0
+            while (j := seq.find(sub, k)) != -1:
+                yield pos + j
+                k = j + n
+            # the next window overlaps this one by n - 1 residues so that
+            # occurrences that span windows are found
+            pos = max(pos + k, w_end - n + 1)
 
     def __bool__(self) -> bool:
-        return str(self) != ""
-
-    def __eq__(self, s: str) -> bool:  # type: ignore
-        return str(self).__eq__(s)
+        return len(self) > 0
+
+    def __contains__(self, sub: object) -> bool:
+        if not isinstance(sub, str):
+            return False
+        return sub == "" or next(self._find_all(sub, 0, len(self)), None) is not None
+
+    def __eq__(self, s: object) -> bool:
+        if isinstance(s, SequenceProxy):
+            return self.seq_id == s.seq_id
+        if not isinstance(s, str):
+            return NotImplemented
+        if len(s) != len(self):
+            return False
+        return all(
+            self._fetch(i, i + compare_chunk_size) == s[i : i + compare_chunk_size]
+            for i in range(0, len(s), compare_chunk_size)
+        )
 
     def __getitem__(self, key: Union[int, slice]) -> str:
         if isinstance(key, int):
             key = slice(key, key + 1)
         if key.step is not None:
             raise ValueError("Only contiguous sequence slices are supported")
-        return self._fetch(key.start, key.stop)
+        return self._fetch_window(key.start, key.stop)
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return hash(self.seq_id)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(0, len(self), iter_chunk_size):
+            yield from self._fetch(i, i + iter_chunk_size)
 
     def __len__(self) -> int:
         return self._md["len"]
@@ -71,6 +207,27 @@ class SequenceProxy(Sequence):
     def __str__(self) -> str:
         return self._fetch()
 
+    def count(self, sub: str, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """return the number of non-overlapping occurrences of sub, like str.count"""
+        if sub == "" and self._past_end(start):
+            return 0
+        start, end, _ = slice(start, end).indices(len(self))
+        if sub == "":
+            return end - start + 1 if start <= end else 0
+        return sum(1 for _ in self._find_all(sub, start, end))
+
+    def index(self, sub: str, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """return the lowest position of sub, like str.index"""
+        past_end = self._past_end(start)
+        start, end, _ = slice(start, end).indices(len(self))
+        if sub == "":
+            pos = start if start <= end and not past_end else None
+        else:
+            pos = next(self._find_all(sub, start, end), None)
+        if pos is None:
+            raise ValueError("subsequence not found")
+        return pos
+
     @property
     def aliases(self) -> list[str]:
         aliases = self._sr.aliases.find_aliases(seq_id=self.seq_id)
@@ -104,6 +261,10 @@ class SeqRepo:
         check_same_thread: bool = False,
         use_sequenceproxy: bool = True,
         fd_cache_size: Optional[int] = 0,
+        immutable: Optional[bool] = None,
+        result_cache_bytes: Optional[int] = SEQREPO_RESULT_CACHE_BYTES,
+        result_cache_policy: str = SEQREPO_RESULT_CACHE_POLICY,
+        recorder: Optional[TraceRecorder] = None,
     ) -> None:
         self._root_dir = root_dir
         self._upcase = upcase
@@ -115,6 +276,9 @@ class SeqRepo:
         self._writeable = writeable
         self._check_same_thread = True if writeable else check_same_thread
         self.use_sequenceproxy = use_sequenceproxy
+        # if set, fetch, fetch_uri, and translate_identifier calls are
+        # recorded for `seqrepo replay`
+        self.recorder = recorder
 
         if self._writeable:
             os.makedirs(self._root_dir, exist_ok=True)
@@ -129,11 +293,27 @@ class SeqRepo:
             fd_cache_size=(
                 SEQREPO_FD_CACHE_MAXSIZE if SEQREPO_FD_CACHE_MAXSIZE != -1 else fd_cache_size
             ),
+            immutable=immutable,
         )
         self.aliases = SeqAliasDB(
             self._db_path,
             writeable=self._writeable,
             check_same_thread=self._check_same_thread,
+            immutable=immutable,
+        )
+        # snapshots may have a precomputed alias index (see `seqrepo snapshot`)
+        self._alias_index = None if self._writeable else AliasIndex.open(self._root_dir)
+        # fetched sequences and subsequences, keyed by (seq_id, start, end)
+        self._result_cache = make_byte_cache(result_cache_bytes, result_cache_policy)
+        # seq_ids by (alias, namespace); invalidated when aliases are stored
+        self._seqid_cache = ByteCache(
+            None, sizeof=approx_sizeof, max_entries=SEQREPO_LRU_CACHE_MAXSIZE
+        )
+        # (alias, namespace) pairs that are not found or not unique, so
+        # that repeated lookups of unknown identifiers do not query the
+        # database; invalidated with _seqid_cache
+        self._miss_cache = ByteCache(
+            None, sizeof=approx_sizeof, max_entries=SEQREPO_NEGATIVE_CACHE_MAXSIZE
         )
 
         if translate_ncbi_namespace is not None:
@@ -144,7 +324,23 @@ class SeqRepo:
 
     def __contains__(self, nsa: str) -> bool:
         ns, a = nsa.split(nsa_sep) if nsa_sep in nsa else (None, nsa)
-        return any(self.aliases.find_aliases(alias=a, namespace=ns))
+        key = (a, ns)
+        if key in self._seqid_cache:
+            return True
+        miss = self._miss_cache.get(key)
+        if miss is not None:
+            return miss == "ambiguous"
+        if digest_seq_id(ns, a) is not None:
+            # checked against seqinfo, without querying aliases
+            try:
+                self._get_unique_seqid(alias=a, namespace=ns)
+            except KeyError:
+                return False
+            return True
+        found = any(self.aliases.find_aliases(alias=a, namespace=ns))
+        if not found:
+            self._miss_cache.put(key, "missing")
+        return found
 
     def __getitem__(self, nsa: str) -> Union[SequenceProxy, str]:
         """lookup aliases, optionally namespaced, like NM_01234.5 or NCBI:NM_01234.5
@@ -156,7 +352,9 @@ class SeqRepo:
 
         ns, a = nsa.split(nsa_sep) if nsa_sep in nsa else (None, nsa)
         if self.use_sequenceproxy:
-            return SequenceProxy(self, alias=a, namespace=ns)
+            # resolve now so that unknown aliases raise KeyError here
+            seq_id = self._get_unique_seqid(alias=a, namespace=ns)
+            return SequenceProxy(self, alias=a, namespace=ns, seq_id=seq_id)
         return self.fetch(alias=a, namespace=ns)
 
     def __iter__(self) -> Iterator:
@@ -206,10 +404,58 @@ class SeqRepo:
             except Exception:
                 # Database may already be closed, ignore errors
                 pass
+        alias_index = getattr(self, "_alias_index", None)
+        if alias_index is not None:
+            alias_index.close()
+            self._alias_index = None
+
+    @property
+    def caches(self) -> dict[str, ByteCache]:
+        """caches used by this instance, by name
+
+        Each cache may be cleared (clear()) or resized (resize()) at
+        runtime.  The chunk cache is shared by all instances in a
+        process.
+
+        """
+        return {
+            "seq_ids": self._seqid_cache,
+            "misses": self._miss_cache,
+            "seqinfo": self.sequences._seqinfo_cache,
+            "results": self._result_cache,
+            "chunks": fastadir.chunk_cache,
+        }
+
+    def cache_stats(self) -> dict[str, dict]:
+        """return statistics (hits, misses, evictions, size, etc.) for each cache"""
+        return {name: cache.stats() for name, cache in self.caches.items()}
+
+    def metrics(self) -> dict:
+        """return a snapshot of hot-path metrics, cache statistics, and
+        sequence file reader statistics
+
+        Counters and timers (count, total, min, max, and approximate
+        p50, p90, and p99 in seconds) are recorded only if metrics are
+        enabled (set SEQREPO_METRICS=1 or call
+        biocommons.seqrepo._internal.metrics.enable()), and are shared
+        by all instances in a process.  See that module for metric
+        names and for hooks that receive each observation.
+
+        """
+        return {
+            "enabled": _metrics.enabled,
+            **_metrics.snapshot(),
+            "caches": self.cache_stats(),
+            "readers": self.sequences._readers.stats(),
+        }
 
     def commit(self) -> None:
-        self.sequences.commit()
-        self.aliases.commit()
+        with _metrics.Timer("seqrepo.commit"):
+            self.sequences.commit()
+            self.aliases.commit()
+        # aliases may also be stored directly with self.aliases.store_aliases()
+        self._seqid_cache.invalidate()
+        self._miss_cache.invalidate()
         if self._pending_sequences + self._pending_aliases > 0:
             _logger.info(
                 f"Committed {self._pending_sequences} sequences ({self._pending_sequences_len} residues) and {self._pending_aliases} aliases"
@@ -225,8 +471,41 @@ class SeqRepo:
         end: Optional[int] = None,
         namespace: Optional[str] = None,
     ) -> str:
-        seq_id = self._get_unique_seqid(alias=alias, namespace=namespace)
-        return self.sequences.fetch(seq_id, start, end)
+        rec = record(self.recorder, "fetch", alias=alias, start=start, end=end, namespace=namespace)
+        with rec, _metrics.Timer("seqrepo.fetch"):
+            seq_id = self._get_unique_seqid(alias=alias, namespace=namespace)
+            return self._fetch_seq(seq_id, start, end)
+
+    def fetch_many(self, requests: Iterable[tuple[str, Optional[int], Optional[int]]]) -> list[str]:
+        """fetch many sequences (or slices), returning a list of sequences in
+        the same order as `requests`
+
+        `requests` is an iterable of (identifier, start, end) tuples,
+        where identifier is an alias, optionally namespaced (e.g.,
+        NM_000059.3 or refseq:NM_000059.3), and start and end may be
+        None.  Identifiers are resolved in bulk (see resolve_many()),
+        and requests are grouped by sequence file so that each file is
+        opened only once.  Raises KeyError if any identifier cannot be
+        resolved to a unique sequence.
+
+        """
+        requests = list(requests)
+        seq_ids: dict[str, str] = {}
+        for identifier, seq_id in self._resolve_seq_ids(
+            identifier for identifier, _, _ in requests
+        ).items():
+            if isinstance(seq_id, KeyError):
+                raise seq_id
+            seq_ids[identifier] = seq_id
+        keys = [(seq_ids[identifier], start, end) for identifier, start, end in requests]
+        if not self._result_cache.enabled:
+            return self.sequences.fetch_many(keys)
+        seqs = [self._result_cache.get(key) for key in keys]
+        missing = [i for i, seq in enumerate(seqs) if seq is None]
+        for i, seq in zip(missing, self.sequences.fetch_many(keys[i] for i in missing)):
+            self._result_cache.put(keys[i], seq)
+            seqs[i] = seq
+        return seqs
 
     def fetch_uri(self, uri: str, start: Optional[int] = None, end: Optional[int] = None) -> str:
         """fetch sequence for URI/CURIE of the form namespace:alias, such as
@@ -239,7 +518,68 @@ class SeqRepo:
             raise ValueError(msg)
 
         namespace, alias = match.groups()
-        return self.fetch(alias=alias, namespace=namespace, start=start, end=end)
+        with record(self.recorder, "fetch_uri", uri=uri, start=start, end=end):
+            return self.fetch(alias=alias, namespace=namespace, start=start, end=end)
+
+    def proxies(self, identifiers: Iterable[str]) -> list[SequenceProxy]:
+        """return SequenceProxy objects for many identifiers, in the same
+        order as `identifiers`
+
+        Identifiers are aliases, optionally namespaced (e.g.,
+        NM_000059.3 or refseq:NM_000059.3), and are resolved in bulk
+        (see resolve_many()).  Raises KeyError if any identifier cannot
+        be resolved to a unique sequence.
+
+        """
+        identifiers = list(identifiers)
+        seqinfos = self.resolve_many(identifiers)
+        proxies = []
+        for identifier in identifiers:
+            seqinfo = seqinfos[identifier]
+            if isinstance(seqinfo, KeyError):
+                raise seqinfo
+            ns, a = identifier.split(nsa_sep, 1) if nsa_sep in identifier else (None, identifier)
+            proxies.append(SequenceProxy(self, ns, a, seq_id=seqinfo["seq_id"], seqinfo=seqinfo))
+        return proxies
+
+    def resolve_many(self, identifiers: Iterable[str]) -> dict[str, Union[dict, KeyError]]:
+        """resolve many identifiers to sequence info in bulk
+
+        Identifiers are aliases, optionally namespaced (e.g.,
+        NM_000059.3 or refseq:NM_000059.3).  Returns a dict that maps
+        each distinct identifier to its seqinfo dict (which includes
+        seq_id), or to a KeyError if the identifier is not found or is
+        ambiguous.  Aliases and sequence info are each looked up with
+        one query per chunk of identifiers rather than per identifier.
+
+        """
+        seq_ids = self._resolve_seq_ids(identifiers)
+        seqinfos = self.sequences.fetch_seqinfo_many(
+            seq_id for seq_id in seq_ids.values() if isinstance(seq_id, str)
+        )
+        results: dict[str, Union[dict, KeyError]] = {}
+        for identifier, seq_id in seq_ids.items():
+            if isinstance(seq_id, KeyError):
+                results[identifier] = seq_id
+            elif seq_id in seqinfos:
+                results[identifier] = seqinfos[seq_id]
+            else:
+                results[identifier] = KeyError(seq_id)
+        return results
+
+    def search_aliases(
+        self,
+        query: str,
+        namespace: Optional[str] = None,
+        current_only: bool = True,
+        limit: Optional[int] = 100,
+        offset: int = 0,
+    ) -> list[dict]:
+        """return a page of alias records whose aliases match query, such
+        as NM_0005% or %ENST00000%; see SeqAliasDB.search_aliases()"""
+        return self.aliases.search_aliases(
+            query, namespace=namespace, current_only=current_only, limit=limit, offset=offset
+        )
 
     def store(self, seq: str, nsaliases: list[dict[str, str]]) -> tuple[int, int]:
         """nsaliases is a list of dicts, like:
@@ -252,63 +592,100 @@ class SeqRepo:
         if not self._writeable:
             raise RuntimeError("Cannot write -- opened read-only")
 
-        if self._upcase:
-            seq = seq.upper()
-
         try:
-            seqhash = sha512t24u(seq)
+            sd = digest_sequence(seq, upcase=self._upcase)
         except Exception:
             import pprint
 
             _logger.critical("Exception raised for " + pprint.pformat(nsaliases))
             raise
-        seq_id = seqhash
+        return self._store_digested(sd, nsaliases, [sd["seq"]])
 
-        # add sequence if not present
-        n_seqs_added = n_aliases_added = 0
-        msg = "sh{nsa_sep}{seq_id:.10s}... ({l} residues; {na} aliases {aliases})".format(
-            seq_id=seq_id,
-            l=len(seq),
-            na=len(nsaliases),
-            nsa_sep=nsa_sep,
-            aliases=", ".join(f"{nsa['namespace']}:{nsa['alias']}" for nsa in nsaliases),
-        )
-        if seq_id not in self.sequences:
-            _logger.info("Storing " + msg)
-            if len(seq) > ct_n_residues:  # pragma: no cover
-                _logger.debug("Precommit for large sequence")
-                self.commit()
-            self.sequences.store(seq_id, seq)
-            n_seqs_added += 1
-            self._pending_sequences += 1
-            self._pending_sequences_len += len(seq)
-            self._pending_aliases += self._update_digest_aliases(seq_id, seq)
-        else:
-            _logger.debug("Sequence exists: " + msg)
+    def store_stream(
+        self, chunks: Iterable[str], nsaliases: list[dict[str, str]]
+    ) -> tuple[int, int]:
+        """store a sequence given as an iterable of string chunks; otherwise
+        like store()
 
-        # add/update external aliases for new and existing sequences
-        # updating is optimized to load only new <seq_id,ns,alias> tuples
-        existing_aliases = self.aliases.find_aliases(seq_id=seq_id)
-        ea_tuples = [(r["seq_id"], r["namespace"], r["alias"]) for r in existing_aliases]
-        new_tuples = [(seq_id, r["namespace"], r["alias"]) for r in nsaliases]
-        upd_tuples = set(new_tuples) - set(ea_tuples)
-        if upd_tuples:
-            _logger.info(f"{len(upd_tuples)} new aliases for {msg}")
-            for _, namespace, alias in upd_tuples:
-                self.aliases.store_alias(seq_id=seq_id, namespace=namespace, alias=alias)
-            self._pending_aliases += len(upd_tuples)
-            n_aliases_added += len(upd_tuples)
-        if (
-            self._pending_sequences > ct_n_seqs
-            or self._pending_aliases > ct_n_aliases
-            or self._pending_sequences_len > ct_n_residues
-        ):  # pragma: no cover
-            _logger.info(
-                f"Hit commit thresholds ({self._pending_sequences} sequences, "
-                f"{self._pending_aliases} aliases, {self._pending_sequences_len} residues)"
+        The full sequence is never held in memory: chunks are digested
+        as they arrive and spooled to a temporary file (in memory for
+        sequences up to spool_max_size residues), which is copied to
+        the sequence store only if the sequence is new.
+
+        """
+        if not self._writeable:
+            raise RuntimeError("Cannot write -- opened read-only")
+
+        digester = SequenceDigester(upcase=self._upcase)
+        with tempfile.SpooledTemporaryFile(
+            max_size=spool_max_size, mode="w+", encoding="ascii", dir=self._seq_path
+        ) as spool:
+            try:
+                for chunk in chunks:
+                    spool.write(digester.update(chunk))
+            except Exception:
+                import pprint
+
+                _logger.critical("Exception raised for " + pprint.pformat(nsaliases))
+                raise
+            spool.seek(0)
+            return self._store_digested(
+                digester.digests(),
+                nsaliases,
+                iter(lambda: spool.read(spool_chunk_size), ""),
             )
-            self.commit()
-        return n_seqs_added, n_aliases_added
+
+    def store_many(
+        self,
+        records: Iterable[tuple[Union[str, Iterable[str]], list[dict[str, str]]]],
+        jobs: int = 1,
+    ) -> Iterator[tuple[int, int]]:
+        """store many (seq, nsaliases) records, yielding (n_seqs_added,
+        n_aliases_added) for each record in order
+
+        seq may be a str or an iterable of str chunks (e.g., from
+        FastaIter(..., chunk_size=...)).  With jobs <= 1, chunked
+        sequences are stored with store_stream().
+
+        With jobs > 1, upcasing, digests, and alphabet computation for
+        sequences of up to parallel_max_size residues run in a pool of
+        `jobs` worker processes while this process does all writing.
+        Larger sequences (e.g., chromosomes) are stored with
+        store_stream() in this process, so they are never held in
+        memory whole.  At most 4 * jobs records are in flight at once,
+        which bounds memory use when records are read from a large
+        file.  Records are consumed lazily; the caller must exhaust the
+        returned iterator and then commit().
+
+        """
+        if not self._writeable:
+            raise RuntimeError("Cannot write -- opened read-only")
+
+        if jobs <= 1:
+            for seq, nsaliases in records:
+                if isinstance(seq, str):
+                    yield self.store(seq, nsaliases)
+                else:
+                    yield self.store_stream(seq, nsaliases)
+            return
+
+        max_pending = 4 * jobs
+        pending: collections.deque = collections.deque()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            for seq, nsaliases in records:
+                head, rest = _read_chunks([seq] if isinstance(seq, str) else seq, parallel_max_size)
+                if rest is None:
+                    future = executor.submit(digest_sequence, "".join(head), self._upcase)
+                    pending.append((future, nsaliases))
+                    if len(pending) >= max_pending:
+                        yield self._store_pending(*pending.popleft())
+                else:
+                    # results are yielded in order, so store pending records first
+                    while pending:
+                        yield self._store_pending(*pending.popleft())
+                    yield self.store_stream(itertools.chain(head, rest), nsaliases)
+            while pending:
+                yield self._store_pending(*pending.popleft())
 
     def translate_alias(
         self,
@@ -353,49 +730,202 @@ class SeqRepo:
         namespace, alias = (
             identifier.split(nsa_sep) if nsa_sep in identifier else (None, identifier)
         )
-        return self.translate_alias(
-            alias=alias, namespace=namespace, target_namespaces=target_namespaces
-        )
+        with record(
+            self.recorder,
+            "translate_identifier",
+            identifier=identifier,
+            target_namespaces=target_namespaces,
+        ):
+            return self.translate_alias(
+                alias=alias, namespace=namespace, target_namespaces=target_namespaces
+            )
 
     ############################################################################
     # Internal Methods
 
-    @lru_cache(maxsize=SEQREPO_LRU_CACHE_MAXSIZE)
-    def _get_unique_seqid(self, alias: str, namespace: str) -> str:
+    def _fetch_seq(self, seq_id: str, start: Optional[int], end: Optional[int]) -> str:
+        """fetch sequence (slice) by seq_id, using the result cache if enabled"""
+        if not self._result_cache.enabled:
+            return self.sequences.fetch(seq_id, start, end)
+        key = (seq_id, start, end)
+        seq = self._result_cache.get(key)
+        if seq is None:
+            seq = self.sequences.fetch(seq_id, start, end)
+            self._result_cache.put(key, seq)
+        return seq
+
+    def _get_unique_seqid(self, alias: str, namespace: Optional[str]) -> str:
         """given alias and namespace, return seq_id if exactly one distinct
         sequence id is found, raise KeyError if there's no match, or
         raise ValueError if there's more than one match.
 
         """
+        key = (alias, namespace)
+        seq_id = self._seqid_cache.get(key)
+        if seq_id is None:
+            miss = self._miss_cache.get(key)
+            if miss is not None:
+                raise alias_error(alias, namespace, ambiguous=miss == "ambiguous")
+            try:
+                with _metrics.Timer("aliases.resolve"):
+                    seq_id = self._lookup_unique_seqid(alias, namespace)
+            except AliasNotUnique:
+                self._miss_cache.put(key, "ambiguous")
+                raise
+            except KeyError:
+                self._miss_cache.put(key, "missing")
+                raise
+            self._seqid_cache.put(key, seq_id)
+        return seq_id
+
+    def _lookup_unique_seqid(self, alias: str, namespace: Optional[str]) -> str:
+        """as _get_unique_seqid(), without caching"""
+        seq_id = digest_seq_id(namespace, alias)
+        if seq_id is not None:
+            # digest identifiers are checked against seqinfo, which
+            # fetch() then reads from FastaDir's seqinfo cache
+            try:
+                self.sequences.fetch_seqinfo(seq_id)
+            except KeyError:
+                raise alias_error(alias, namespace) from None
+            return seq_id
+
+        alias_index = self._alias_index
+        if (
+            alias_index is not None
+            and "%" not in alias
+            and (namespace is None or "%" not in namespace)
+        ):
+            return self._get_unique_seqid_from_index(alias_index, alias=alias, namespace=namespace)
 
         recs = self.aliases.find_aliases(alias=alias, namespace=namespace)
         seq_ids = set(r["seq_id"] for r in recs)
         if len(seq_ids) == 0:
-            raise KeyError(f"Alias {alias} (namespace: {namespace})")
+            raise alias_error(alias, namespace)
         if len(seq_ids) > 1:
             # This should only happen when namespace is None
-            raise KeyError(f"Alias {alias} (namespace: {namespace}): not unique")
+            raise alias_error(alias, namespace, ambiguous=True)
         return seq_ids.pop()
 
-    def _update_digest_aliases(self, seq_id: str, seq: str) -> int:
-        """compute digest aliases for seq and update; returns number of digest
-        aliases (some of which may have already existed)
+    def _resolve_seq_ids(self, identifiers: Iterable[str]) -> dict[str, Union[str, KeyError]]:
+        """as SeqAliasDB.resolve_many(), but digest identifiers are mapped
+        to seq_ids directly; they are not checked for existence"""
+        seq_ids: dict[str, Union[str, KeyError]] = {}
+        others = []
+        for identifier in identifiers:
+            ns, a = identifier.split(nsa_sep, 1) if nsa_sep in identifier else (None, identifier)
+            seq_id = digest_seq_id(ns, a)
+            if seq_id is None:
+                others.append(identifier)
+            else:
+                seq_ids[identifier] = seq_id
+        if others:
+            seq_ids.update(self.aliases.resolve_many(others))
+        return seq_ids
+
+    def _get_unique_seqid_from_index(
+        self, alias_index: AliasIndex, alias: str, namespace: Optional[str]
+    ) -> str:
+        """as _get_unique_seqid(), but using alias_index
 
-        For the moment, sha512 is computed for seq_id separately from
-        the sha512 here.  We should fix that.
+        The sequence info in the index is added to the seqinfo cache,
+        which fetch() reads next.
 
         """
+        db_namespace, db_alias = namespace, alias
+        if namespace is not None:
+            ns_api2db = translate_api2db(namespace, alias)
+            if ns_api2db:
+                db_namespace, translated_alias = ns_api2db[0]
+                if translated_alias is not None:
+                    db_alias = translated_alias
+        i = alias_index.lookup(db_alias, db_namespace)
+        if i is None:
+            raise alias_error(alias, namespace)
+        if i == ambiguous:
+            raise alias_error(alias, namespace, ambiguous=True)
+        seqinfo = alias_index.seqinfo(i)
+        if seqinfo["relpath"]:
+            self.sequences.cache_seqinfo(seqinfo)
+        return seqinfo["seq_id"]
+
+    def _store_digest_aliases(self, seq_id: str, seq_aliases: list[dict[str, str]]) -> int:
+        """store precomputed digest aliases; returns number of digest
+        aliases (some of which may have already existed)
 
-        ir = bioutils.digests.seq_vmc_identifier(seq)
-        seq_aliases = [
-            {
-                "namespace": ir["namespace"],
-                "alias": ir["accession"],
-            },
-            {"namespace": "SHA1", "alias": bioutils.digests.seq_sha1(seq)},
-            {"namespace": "MD5", "alias": bioutils.digests.seq_md5(seq)},
-            {"namespace": "SEGUID", "alias": bioutils.digests.seq_seguid(seq)},
-        ]
-        for sa in seq_aliases:
-            self.aliases.store_alias(seq_id=seq_id, **sa)
+        """
+        # digest aliases are stored only for new sequences, so they need not
+        # be checked against current aliases
+        self.aliases.store_aliases(
+            ((seq_id, sa["namespace"], sa["alias"]) for sa in seq_aliases), check_current=False
+        )
         return len(seq_aliases)
+
+    @_metrics.timed("seqrepo.store")
+    def _store_digested(
+        self, sd: dict, nsaliases: list[dict[str, str]], chunks: Iterable[str]
+    ) -> tuple[int, int]:
+        """store a sequence and aliases given digests (from digest_sequence()
+        or SequenceDigester) and the sequence as an iterable of chunks
+
+        chunks is consumed only if the sequence is new.
+
+        """
+        seq_id = sd["seq_id"]
+        seq_len = sd["len"]
+
+        # add sequence if not present
+        n_seqs_added = n_aliases_added = 0
+        msg = "sh{nsa_sep}{seq_id:.10s}... ({l} residues; {na} aliases {aliases})".format(
+            seq_id=seq_id,
+            l=seq_len,
+            na=len(nsaliases),
+            nsa_sep=nsa_sep,
+            aliases=", ".join(f"{nsa['namespace']}:{nsa['alias']}" for nsa in nsaliases),
+        )
+        if seq_id not in self.sequences:
+            _logger.info("Storing " + msg)
+            if seq_len > ct_n_residues:  # pragma: no cover
+                _logger.debug("Precommit for large sequence")
+                self.commit()
+            self.sequences.store_stream(seq_id, chunks, alpha=sd["alpha"])
+            n_seqs_added += 1
+            self._pending_sequences += 1
+            self._pending_sequences_len += seq_len
+            self._pending_aliases += self._store_digest_aliases(seq_id, sd["digest_aliases"])
+        else:
+            _logger.debug("Sequence exists: " + msg)
+
+        # add/update external aliases for new and existing sequences;
+        # existing <seq_id,ns,alias> tuples are ignored by store_aliases
+        n_new = self.aliases.store_aliases((seq_id, r["namespace"], r["alias"]) for r in nsaliases)
+        if n_new:
+            _logger.info(f"{n_new} new aliases for {msg}")
+            self._seqid_cache.invalidate()
+            self._miss_cache.invalidate()
+            self._pending_aliases += n_new
+            n_aliases_added += n_new
+        if (
+            self._pending_sequences > ct_n_seqs
+            or self._pending_aliases > ct_n_aliases
+            or self._pending_sequences_len > ct_n_residues
+        ):  # pragma: no cover
+            _logger.info(
+                f"Hit commit thresholds ({self._pending_sequences} sequences, "
+                f"{self._pending_aliases} aliases, {self._pending_sequences_len} residues)"
+            )
+            self.commit()
+        return n_seqs_added, n_aliases_added
+
+    def _store_pending(
+        self, future: concurrent.futures.Future, nsaliases: list[dict[str, str]]
+    ) -> tuple[int, int]:
+        """wait for a digest_sequence() future from store_many(), then store it"""
+        try:
+            sd = future.result()
+        except Exception:
+            import pprint
+
+            _logger.critical("Exception raised for " + pprint.pformat(nsaliases))
+            raise
+        return self._store_digested(sd, nsaliases, [sd["seq"]])
@@ -18,28 +18,61 @@ def rest_dataproxy():
     return SeqRepoRESTDataProxy(base_url=url)
 
 
+@pytest.fixture(scope="session")
+def make_seqrepo_dir(tmpdir_factory):
+    """return a function that creates a SeqRepo in a new directory,
+    stores (seq, aliases) records and commits them, and returns the
+    directory"""
+
+    def make_seqrepo_dir(records=(), **kwargs):
+        seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo"))
+        with SeqRepo(seqrepo_dir, writeable=True, **kwargs) as sr:
+            for seq, aliases in records:
+                sr.store(seq, aliases)
+            sr.commit()
+        return seqrepo_dir
+
+    return make_seqrepo_dir
+
+
+@pytest.fixture
+def record_fetches(monkeypatch):
+    """return a function that records the arguments of each
+    sr.sequences.fetch() call in the returned list"""
+
+    def record_fetches(sr):
+        fetches = []
+        fetch = sr.sequences.fetch
+        monkeypatch.setattr(
+            sr.sequences, "fetch", lambda *args: fetches.append(args) or fetch(*args)
+        )
+        return fetches
+
+    return record_fetches
+
+
 @pytest.fixture(scope="session")
 def seqrepo(tmpdir_factory):
-    dir = str(tmpdir_factory.mktemp("seqrepo"))
-    sr = SeqRepo(dir, writeable=True)
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo"))
+    sr = SeqRepo(seqrepo_dir, writeable=True)
     yield sr
     sr.close()
 
 
 @pytest.fixture(scope="session")
 def seqrepo_ro(tmpdir_factory):
-    dir = str(tmpdir_factory.mktemp("seqrepo"))
-    with SeqRepo(dir, writeable=True) as sr:
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo"))
+    with SeqRepo(seqrepo_dir, writeable=True) as sr:
         pass  # closes automatically on exit
-    sr_ro = SeqRepo(dir)  # return read-only instance
+    sr_ro = SeqRepo(seqrepo_dir)  # return read-only instance
     yield sr_ro
     sr_ro.close()
 
 
 @pytest.fixture(scope="session")
 def seqrepo_keepcase(tmpdir_factory):
-    dir = str(tmpdir_factory.mktemp("seqrepo"))
-    sr = SeqRepo(dir, upcase=False, writeable=True)
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo"))
+    sr = SeqRepo(seqrepo_dir, upcase=False, writeable=True)
     yield sr
     sr.close()
 
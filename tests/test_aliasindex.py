@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from biocommons.seqrepo import SeqRepo
+from biocommons.seqrepo._internal import aliasindex
+from biocommons.seqrepo._internal.aliasindex import AliasIndex, build_alias_index
+
+
+@pytest.fixture
+def root_dir(tmpdir_factory):
+    root_dir = str(tmpdir_factory.mktemp("seqrepo"))
+    with SeqRepo(root_dir, writeable=True) as sr:
+        sr.store("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}])
+        sr.store("ROSE", [{"namespace": "fr", "alias": "rose"}])  # "rose" is ambiguous
+        sr.store(
+            "TREE", [{"namespace": "en", "alias": "tree"}, {"namespace": "fr", "alias": "arbre"}]
+        )
+        sr.store("NNNN", [{"namespace": "NCBI", "alias": "NM_01234.5"}])
+        sr.store("NNNNN", [{"namespace": "NCBI", "alias": "NM_01234.5"}])  # reassigned
+        sr.commit()
+    return root_dir
+
+
+def test_alias_index(root_dir, monkeypatch):
+    with SeqRepo(root_dir) as sr:
+        assert sr._alias_index is None
+        queries = [
+            (a, ns)
+            for a in ["rose", "tree", "arbre", "NM_01234.5", "bogus"]
+            for ns in [None, "en", "fr", "NCBI", "refseq", "bogus"]
+        ]
+        sha512t24u = sr.translate_alias("tree", namespace="en", target_namespaces=["sha512t24u"])
+        queries += [(sha512t24u[0].split(":")[1], "sha512t24u"), ("%ose", "en")]
+        expected = {}
+        for alias, namespace in queries:
+            try:
+                expected[alias, namespace] = sr._get_unique_seqid(alias=alias, namespace=namespace)
+            except KeyError as e:
+                expected[alias, namespace] = str(e)
+
+    build_alias_index(root_dir)
+    with SeqRepo(root_dir) as sr:
+        assert sr._alias_index is not None
+        for alias, namespace in queries:
+            try:
+                found = sr._get_unique_seqid(alias=alias, namespace=namespace)
+            except KeyError as e:
+                found = str(e)
+            assert found == expected[alias, namespace], (alias, namespace)
+        assert sr["en:tree"] == "TREE"
+        assert sr["NM_01234.5"] == "NNNNN"
+
+        seq_id = sr._get_unique_seqid(alias="tree", namespace="en")
+        i = sr._alias_index.lookup("tree", "en")
+        assert sr._alias_index.seqinfo(i) == sr.sequences.fetch_seqinfo(seq_id)
+
+        # fetches by alias use sequence info from the index
+        for cache in sr.caches.values():
+            cache.clear()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("seqinfo queried")
+
+        monkeypatch.setattr(sr.sequences, "_fetch_one", fail)
+        assert sr.fetch("tree", namespace="en") == "TREE"
+        assert sr.fetch("arbre", 1, 3) == "RE"
+
+
+def test_alias_index_hash_collisions(root_dir, monkeypatch):
+    """keys whose hashes collide are distinguished"""
+    monkeypatch.setattr(aliasindex, "_hash", lambda key: 1 + len(key) % 2)
+    build_alias_index(root_dir)
+    ai = AliasIndex.open(root_dir)
+    assert ai is not None
+    assert ai.seq_id(ai.lookup("tree", "en")) != ai.seq_id(ai.lookup("rose", "en"))
+    assert ai.lookup("rose") == aliasindex.ambiguous
+    assert ai.seq_id(ai.lookup("arbre")) == ai.seq_id(ai.lookup("tree"))
+    assert ai.lookup("tref", "en") is None
+    assert ai.lookup("rose", "es") is None
+    ai.close()
+
+
+def test_alias_index_out_of_date(root_dir):
+    build_alias_index(root_dir)
+    assert AliasIndex.open(root_dir) is not None
+    with SeqRepo(root_dir, writeable=True) as sr:
+        sr.store("GRASS", [{"namespace": "en", "alias": "grass"}])
+        sr.commit()
+    assert AliasIndex.open(root_dir) is None
+    with SeqRepo(root_dir) as sr:
+        assert sr["en:grass"] == "GRASS"
+
+
+def test_no_alias_index(tmpdir_factory):
+    assert AliasIndex.open(str(tmpdir_factory.mktemp("seqrepo"))) is None
+    with pytest.raises(ValueError):
+        path = os.path.join(str(tmpdir_factory.mktemp("bogus")), "aliases.idx")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 128)
+        AliasIndex(path)
+    assert AliasIndex.open(os.path.dirname(path)) is None
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from biocommons.seqrepo.asyncseqrepo import AsyncSeqRepo
+
+
+@pytest.fixture(scope="module")
+def seqrepo_dir(make_seqrepo_dir):
+    return make_seqrepo_dir([
+        ("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}]),
+        ("ASINCHANGE", [{"namespace": "en", "alias": "coin"}]),
+        ("ASINACORNER", [{"namespace": "fr", "alias": "coin"}]),
+    ])
+
+
+def test_fetch(seqrepo_dir):
+    async def run():
+        async with AsyncSeqRepo(seqrepo_dir, max_workers=2) as asr:
+            assert await asr.fetch("rose") == "SMELLASSWEET"
+            assert await asr.fetch("coin", 0, 4, namespace="fr") == "ASIN"
+            assert await asr.fetch_uri("en:coin") == "ASINCHANGE"
+            assert await asr.contains("en:rose")
+            with pytest.raises(KeyError):
+                await asr.fetch("bogus")
+
+    asyncio.run(run())
+
+
+def test_concurrent_fetch(seqrepo_dir):
+    async def run():
+        async with AsyncSeqRepo(seqrepo_dir, max_workers=4) as asr:
+            coros = [asr.fetch("rose", i, i + 1) for i in range(12)]
+            assert "".join(await asyncio.gather(*coros)) == "SMELLASSWEET"
+            # worker threads share one instance and its caches
+            assert asr._sr.cache_stats()["seq_ids"]["entries"] == 1
+            assert await asr.fetch_many([("en:coin", None, None), ("rose", 0, 5)]) == [
+                "ASINCHANGE",
+                "SMELL",
+            ]
+
+    asyncio.run(run())
+
+
+def test_translate_and_proxy(seqrepo_dir):
+    async def run():
+        async with AsyncSeqRepo(seqrepo_dir) as asr:
+            aliases = await asr.translate_identifier("en:rose", target_namespaces=["en"])
+            assert aliases == ["en:rose"]
+
+            proxy = asr["en:rose"]
+            assert await proxy[0:5] == "SMELL"
+            assert await proxy[5] == "A"
+            with pytest.raises(ValueError, match="contiguous"):
+                proxy[::2]
+
+    asyncio.run(run())
+
+
+def test_writeable_rejected(seqrepo_dir):
+    with pytest.raises(ValueError):
+        AsyncSeqRepo(seqrepo_dir, writeable=True)
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+
+import pytest
+
+from biocommons.seqrepo import SeqRepo
+from biocommons.seqrepo.bench import generate, run_benchmarks
+from biocommons.seqrepo.bench.benchmarks import summarize
+from biocommons.seqrepo.bench.synthetic import parse_lengths
+from biocommons.seqrepo.cli import bench
+
+
+def test_generate(tmp_path):
+    root_dir = str(tmp_path / "synthetic")
+    summary = generate(root_dir, n_sequences=10, n_aliases=25, lengths="uniform:50,200", n_files=3)
+    assert summary["n_sequences"] == 10 and len(summary["aliases"]) == 10
+    with SeqRepo(root_dir) as sr:
+        assert sr.sequences.stats()["n_files"] == 3
+        assert len(list(sr.aliases.find_aliases(namespace="bench"))) == 25
+        assert 50 <= len(sr["bench:S9"]) <= 200
+        assert sr["bench:S0.1"].seq_id == sr["bench:S0"].seq_id
+        seq = str(sr["bench:S3"])
+
+    # generation is repeatable
+    generate(str(tmp_path / "again"), n_sequences=10, n_aliases=25, lengths="uniform:50,200")
+    with SeqRepo(str(tmp_path / "again")) as sr:
+        assert str(sr["bench:S3"]) == seq
+
+    with pytest.raises(OSError):
+        generate(root_dir)
+    with pytest.raises(ValueError):
+        generate(str(tmp_path / "x"), n_sequences=10, n_aliases=5)
+    with pytest.raises(ValueError):
+        parse_lengths("normal:10,1")
+
+
+def test_summarize():
+    assert summarize([]) == {"n": 0}
+    s = summarize([0.001] * 99 + [0.1])
+    assert s["n"] == 100 and s["p50"] == 1.0 and s["max"] == 100.0
+
+
+def test_run_benchmarks(tmp_path):
+    root_dir = str(tmp_path / "synthetic")
+    summary = generate(root_dir, n_sequences=20, n_aliases=20, lengths="fixed:1000")
+    results = run_benchmarks(
+        root_dir, summary["aliases"], iterations=10, threads=(1, 2), store_sequences=5
+    )
+    assert set(results) == {
+        "resolve",
+        "fetch_short",
+        "fetch_long",
+        "proxy",
+        "store",
+        "export",
+        "threads",
+    }
+    assert results["resolve"]["n"] == 10 and results["fetch_long"]["n"] == 10
+    assert results["store"]["n"] == 5
+    assert results["export"] == {**results["export"], "n": 20, "residues": 20000}
+    assert set(results["threads"]) == {"1", "2"}
+
+
+def test_cli_bench(tmp_path):
+    opts = argparse.Namespace(
+        root_directory=str(tmp_path),
+        instance_name=None,
+        generate_dir=str(tmp_path / "synthetic"),
+        sequences=5,
+        aliases=5,
+        lengths="fixed:200",
+        files=1,
+        seed=0,
+        iterations=5,
+        threads="1",
+        store_sequences=2,
+        output=str(tmp_path / "results.json"),
+    )
+    bench(opts)
+    with open(opts.output) as f:
+        report = json.load(f)
+    assert report["params"]["n_residues"] == 1000
+
+    # benchmark the kept instance
+    opts.instance_name, opts.output = "synthetic", None
+    bench(opts)
+    assert os.path.exists(opts.generate_dir)
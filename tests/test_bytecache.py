@@ -0,0 +1,125 @@
+from array import array
+
+import pytest
+
+from biocommons.seqrepo._internal.bytecache import (
+    ByteCache,
+    LFUByteCache,
+    TinyLFUByteCache,
+    approx_sizeof,
+    make_byte_cache,
+)
+
+
+def test_byte_cache():
+    c = ByteCache(max_bytes=10)
+    c.put("a", "AAAA")
+    c.put("b", "BBBB")
+    assert c.get("a") == "AAAA"  # "a" is now most recently used
+    c.put("c", "CCCC")  # evicts "b"
+    assert "b" not in c and "a" in c and "c" in c
+    assert c.nbytes == 8 and c.evictions == 1
+
+    c.put("a", "AA")  # replace
+    assert c.nbytes == 6
+    c.put("big", "X" * 11)  # larger than max_bytes; not cached
+    assert "big" not in c
+
+    c.resize(3)
+    assert list(c._data) == ["a"] and c.nbytes == 2
+    assert c.stats() == {
+        "policy": "lru",
+        "entries": 1,
+        "nbytes": 2,
+        "max_bytes": 3,
+        "max_entries": None,
+        "hits": 1,
+        "misses": 0,
+        "evictions": 2,
+        "rejections": 0,
+        "invalidations": 0,
+    }
+    c.clear()
+    assert len(c) == 0 and c.nbytes == 0
+
+    assert not ByteCache(0).enabled
+    unbounded = ByteCache(None)
+    unbounded.put("a", "A" * 1000)
+    assert unbounded.get("a") == "A" * 1000
+
+
+def test_max_entries_and_invalidate():
+    assert approx_sizeof("ACGT") == approx_sizeof(b"ACGT") == 4
+    assert approx_sizeof({"seq_id": "q1", "len": 2}) == 2 * approx_sizeof(True)
+
+    c = ByteCache(None, sizeof=approx_sizeof, max_entries=2)
+    c.put("a", {"seq_id": "q1"})
+    c.put("b", "q2")
+    c.put("c", "q3")  # evicts "a"
+    assert list(c._data) == ["b", "c"] and c.nbytes == 4
+
+    c.invalidate("b", "missing")
+    assert list(c._data) == ["c"] and c.invalidations == 1
+    c.put("d", "q4")
+    c.invalidate()
+    assert len(c) == 0 and c.nbytes == 0 and c.invalidations == 3
+
+    c.resize(max_entries=0)
+    assert not c.enabled and c.max_bytes is None
+
+
+def test_lfu():
+    c = LFUByteCache(max_bytes=12)
+    for key in "abc":
+        c.put(key, "XXXX")
+    for key in "aab":
+        c.get(key)
+    c.put("d", "XXXX")  # evicts "c", the least frequently used
+    assert set(c._data) == {"a", "b", "d"}
+    c.put("e", "XXXX")  # evicts "d", the oldest of the least frequently used
+    assert set(c._data) == {"a", "b", "e"}
+    c.clear()
+    assert not c._buckets and not c._counts
+
+
+def test_tinylfu():
+    c = TinyLFUByteCache(max_bytes=12, width=1024)
+    for key in "abc":
+        c.get(key)
+        c.put(key, "XXXX")
+    c.get("a")
+    c.get("b")
+    c.get("c")
+
+    # a large value requested once may not evict popular entries
+    c.get("big")
+    c.put("big", "X" * 12)
+    assert "big" not in c and len(c) == 3 and c.rejections == 1
+
+    # once requested more often than the entries it displaces, it is admitted
+    for _ in range(3):
+        c.get("big")
+    c.put("big", "X" * 12)
+    assert list(c._data) == ["big"]
+
+    # counts are halved after sample_size requests
+    n = c.estimate("big")
+    c.sample_size = c._n_recorded + 1
+    c.get("other")
+    assert c.estimate("big") == n // 2
+
+    # each counter is halved independently of its neighbours
+    row = c._sketch[0]
+    j = 0 if hash((0, "other")) & c._mask >= 3 else 3  # away from the slot get() increments
+    row[j : j + 3] = array("I", [0xFFFFFFFF, 3, 1])
+    c.sample_size = c._n_recorded + 1
+    c.get("other")
+    assert list(row[j : j + 3]) == [0x7FFFFFFF, 1, 0]
+
+
+def test_make_byte_cache():
+    assert type(make_byte_cache(10)) is ByteCache
+    assert type(make_byte_cache(10, "LFU")) is LFUByteCache
+    assert make_byte_cache(10, "tinylfu").stats()["policy"] == "tinylfu"
+    with pytest.raises(ValueError):
+        make_byte_cache(10, "bogus")
@@ -6,6 +6,7 @@ from typing import List, Optional
 
 import pytest
 
+from biocommons.seqrepo import SeqRepo
 from biocommons.seqrepo.cli import init, load
 from biocommons.seqrepo.fastaiter import FastaIter
 from biocommons.seqrepo.utils import parse_defline
@@ -21,6 +22,7 @@ def opts():
             namespace: Optional[str] = None,
             instance_name: Optional[str] = None,
             verbose: int = 0,
+            jobs: int = 1,
         ):
             """
             Mock class for options used in seqrepo tests.
@@ -31,12 +33,14 @@ def opts():
                 namespace: The namespace.
                 instance_name: The instance name.
                 verbose: Verbosity level.
+                jobs: Number of digest worker processes.
             """
             self.root_directory = root_directory
             self.fasta_files = fasta_files
             self.namespace = namespace
             self.instance_name = instance_name
             self.verbose = verbose
+            self.jobs = jobs
 
     test_dir = os.path.dirname(__file__)
     test_data_dir = os.path.join(test_dir, "data")
@@ -69,6 +73,17 @@ def test_20_load(opts):
     load(opts)
 
 
+def test_20_load_jobs(opts):
+    init(opts)
+    opts.jobs = 2
+    load(opts)
+
+    sr = SeqRepo(os.path.join(opts.root_directory, opts.instance_name))
+    assert sr.sequences.stats()["n_sequences"] > 0
+    assert sr.fetch_uri("refseq:NM_000059.3", 0, 10) == "GTGGCGCGAG"
+    sr.close()
+
+
 def test_refseq_fasta(opts):
     def _get_refseq_alias(aliases):
         for al in aliases:
@@ -33,3 +33,35 @@ def test_SEQREPO_LRU_CACHE_MAXSIZE_invalid(monkeypatch):
     monkeypatch.setenv("SEQREPO_LRU_CACHE_MAXSIZE", "invalid")
     with pytest.raises(ValueError):
         reload(config)
+
+
+def test_SEQREPO_CHUNK_CACHE_BYTES(monkeypatch):
+    monkeypatch.delenv("SEQREPO_CHUNK_CACHE_BYTES", raising=False)
+    reload(config)
+    assert config.SEQREPO_CHUNK_CACHE_BYTES == 64 * 1024 * 1024
+    monkeypatch.setenv("SEQREPO_CHUNK_CACHE_BYTES", "0")
+    reload(config)
+    assert config.SEQREPO_CHUNK_CACHE_BYTES == 0
+
+
+def test_SEQREPO_RESULT_CACHE(monkeypatch):
+    monkeypatch.delenv("SEQREPO_RESULT_CACHE_BYTES", raising=False)
+    monkeypatch.setenv("SEQREPO_RESULT_CACHE_POLICY", "tinylfu")
+    reload(config)
+    assert config.SEQREPO_RESULT_CACHE_BYTES == 0
+    assert config.SEQREPO_RESULT_CACHE_POLICY == "tinylfu"
+
+
+def test_SEQREPO_METRICS(monkeypatch):
+    monkeypatch.delenv("SEQREPO_METRICS", raising=False)
+    reload(config)
+    assert config.SEQREPO_METRICS is False
+    monkeypatch.setenv("SEQREPO_METRICS", "1")
+    reload(config)
+    assert config.SEQREPO_METRICS is True
+
+
+def test_SEQREPO_NEGATIVE_CACHE_MAXSIZE(monkeypatch):
+    monkeypatch.delenv("SEQREPO_NEGATIVE_CACHE_MAXSIZE", raising=False)
+    reload(config)
+    assert config.SEQREPO_NEGATIVE_CACHE_MAXSIZE == 100000
@@ -0,0 +1,54 @@
+import random
+
+import bioutils.digests
+import pytest
+
+from biocommons.seqrepo._internal.digests import SequenceDigester, digest_sequence
+
+
+def _bioutils_digests(seq):
+    ir = bioutils.digests.seq_vmc_identifier(seq)
+    return {
+        "seq_id": bioutils.digests.seq_seqhash(seq),
+        "len": len(seq),
+        "alpha": "".join(sorted(set(seq))),
+        "digest_aliases": [
+            {"namespace": ir["namespace"], "alias": ir["accession"]},
+            {"namespace": "SHA1", "alias": bioutils.digests.seq_sha1(seq)},
+            {"namespace": "MD5", "alias": bioutils.digests.seq_md5(seq)},
+            {"namespace": "SEGUID", "alias": bioutils.digests.seq_seguid(seq)},
+        ],
+    }
+
+
+@pytest.mark.parametrize("upcase", [True, False])
+@pytest.mark.parametrize(
+    "seq",
+    [
+        "",
+        "ACGT",
+        "acgtNNNN",
+        "MVLSPADKTNVKAAW*",
+        "AC GT\tacgt*",
+        "".join(random.Random(0).choices("ACGTacgtN", k=10007)),
+    ],
+)
+def test_digest_sequence(seq, upcase):
+    stored = seq.upper() if upcase else seq
+    sd = digest_sequence(seq, upcase=upcase, chunk_size=100)
+    assert sd.pop("seq") == stored
+    assert sd == _bioutils_digests(stored)
+
+
+def test_sequence_digester_chunks():
+    seq = "".join(random.Random(1).choices("acgtn", k=5000))
+    digester = SequenceDigester()
+    stored = "".join(digester.update(seq[i : i + 333]) for i in range(0, len(seq), 333))
+    assert stored == seq.upper()
+    assert digester.digests() == _bioutils_digests(seq.upper())
+
+
+@pytest.mark.parametrize("seq", ["ACGT1", "AC-GT", "ACGTé"])
+def test_invalid_residues(seq):
+    with pytest.raises(RuntimeError):
+        digest_sequence(seq)
@@ -1,10 +1,12 @@
 import os
 import shutil
 import tempfile
+import threading
 
 import pytest
+from pysam import FastaFile
 
-from biocommons.seqrepo.fastadir.fabgz import FabgzReader, FabgzWriter
+from biocommons.seqrepo.fastadir.fabgz import FabgzReader, FabgzReaderPool, FabgzWriter
 
 seed = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
 sequences = {"l{l}".format(l=l): seed * l for l in (1, 10, 100, 1000, 10000)}
@@ -38,6 +40,52 @@ def test_write_reread():
     shutil.rmtree(tmpdir)
 
 
+def test_store_stream():
+    tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_")
+    fabgz_fn = os.path.join(tmpdir, "test.fa.bgz")
+
+    faw = FabgzWriter(fabgz_fn)
+    for seq_id, seq in sequences.items():
+        chunks = (seq[i : i + 37] for i in range(0, len(seq), 37))
+        assert faw.store_stream(seq_id, chunks) == len(seq)
+    assert faw.store_stream("l10", iter([seed])) == 0  # already added
+    faw.close()
+
+    far = FabgzReader(fabgz_fn)
+    for seq_id in far.keys():
+        assert far.fetch(seq_id) == sequences[seq_id]
+
+    shutil.rmtree(tmpdir)
+
+
+def test_indexes_match_htslib():
+    """.fai and .gzi written by FabgzWriter must match those from htslib"""
+    tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_")
+    fabgz_fn = os.path.join(tmpdir, "test.fa.bgz")
+
+    faw = FabgzWriter(fabgz_fn, threads=3)
+    faw.store("empty", "")
+    faw.store("short", "ACGT")
+    faw.store("oneline", seed[:50] * 2)
+    for seq_id, seq in sequences.items():  # l10000 spans several blocks
+        faw.store(seq_id, seq)
+    faw.close()
+    assert not os.path.exists(fabgz_fn + ".tmp")
+
+    htslib_fn = os.path.join(tmpdir, "htslib.fa.bgz")
+    shutil.copyfile(fabgz_fn, htslib_fn)
+    FastaFile(htslib_fn).close()  # builds indexes
+    for ext in (".fai", ".gzi"):
+        with open(fabgz_fn + ext, "rb") as a, open(htslib_fn + ext, "rb") as b:
+            assert a.read() == b.read()
+
+    far = FabgzReader(fabgz_fn)
+    assert far.fetch("short") == "ACGT"
+    assert far.fetch("l10000", 123456, 123466) == sequences["l10000"][123456:123466]
+
+    shutil.rmtree(tmpdir)
+
+
 def test_errors():
     with pytest.raises(RuntimeError):
         far = FabgzWriter("/tmp/badsuffix")
@@ -45,3 +93,48 @@ def test_errors():
 
 if __name__ == "__main__":
     test_write_reread()
+
+
+def test_reader_pool(tmp_path):
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"{i}.fa.bgz")
+        faw = FabgzWriter(path)
+        faw.store("l10", sequences["l10"])
+        faw.close()
+        paths.append(path)
+
+    pool = FabgzReaderPool(max_per_path=2, max_open=3)
+    with pool.reader(paths[0]) as r1, pool.reader(paths[0]) as r2:
+        assert r1 is not r2
+        assert r1.fetch("l10", 0, 5) == r2.fetch("l10", 0, 5) == "ABCDE"
+    with pool.reader(paths[0]) as r3:
+        assert r3 in (r1, r2)
+    assert pool.stats()["open"] == 2 and pool.stats()["hits"] == 1
+
+    # at max_open, opening another file closes the least recently used idle reader
+    with pool.reader(paths[1]), pool.reader(paths[2]):
+        assert pool.stats()["open"] == 3
+    assert pool.stats()["idle"] == 3
+
+    # requests beyond max_per_path wait for a reader to be released
+    held = pool._acquire(paths[1])
+    pool._acquire(paths[1])
+    results = []
+    t = threading.Thread(target=lambda: results.append(pool._acquire(paths[1])))
+    t.start()
+    t.join(0.1)
+    assert t.is_alive()
+    pool._release(paths[1], held)
+    t.join()
+    assert results == [held] and pool.stats()["waits"] >= 1
+
+    pool.close()
+    assert pool.stats()["open"] == 2  # readers in use are closed on release
+    with pytest.raises(RuntimeError):
+        pool._acquire(paths[0])
+
+    uncached = FabgzReaderPool(max_open=0)
+    with uncached.reader(paths[0]) as r:
+        assert r.fetch("l10", 0, 5) == "ABCDE"
+    assert uncached.stats()["open"] == 0
@@ -3,7 +3,8 @@ import tempfile
 
 import pytest
 
-from biocommons.seqrepo.fastadir import FastaDir
+from biocommons.seqrepo._internal.bytecache import ByteCache
+from biocommons.seqrepo.fastadir import FastaDir, fastadir
 
 
 def test_write_reread():
@@ -33,6 +34,58 @@ def test_write_reread():
     shutil.rmtree(tmpdir)
 
 
+def test_fetch_many():
+    tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_")
+
+    fd = FastaDir(tmpdir, writeable=True)
+    fd.store("1", "seq1")
+    fd.store("2", "seq2")
+    fd.commit()
+    fd.store("3", "seq3")  # second file, pending until fetched
+
+    requests = [("3", None, None), ("1", 1, 3), ("2", None, None), ("1", None, None)]
+    assert fd.fetch_many(requests) == ["seq3", "eq", "seq2", "seq1"]
+
+    with pytest.raises(KeyError):
+        fd.fetch_many([("1", None, None), ("bogus", None, None)])
+
+    shutil.rmtree(tmpdir)
+
+
+def test_chunk_cache(monkeypatch):
+    monkeypatch.setattr(fastadir, "chunk_size", 4)
+    monkeypatch.setattr(fastadir, "max_chunked_fetch", 20)
+    monkeypatch.setattr(fastadir, "chunk_cache", ByteCache(16))
+    tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_")
+
+    seq = "ACGTTGCAACGGTTAACCGGTA"  # 22 residues
+    fd = FastaDir(tmpdir, writeable=True)
+    fd.store("1", seq)
+    fd.commit()
+
+    ranges = [
+        (s, e) for s in [None, 0, 1, 3, 4, 15, 21, 22, 30] for e in [None, 0, 3, 4, 9, 22, 40]
+    ]
+    for start, end in ranges:
+        if start is not None and end is not None and start > end:
+            with pytest.raises(ValueError):
+                fd.fetch("1", start, end)
+        else:
+            assert fd.fetch("1", start, end) == seq[start:end], (start, end)
+    requests = [("1", s, e) for s, e in ranges if s is None or e is None or s <= e]
+    assert fd.fetch_many(requests) == [seq[s:e] for _, s, e in requests]
+    with pytest.raises(ValueError):
+        fd.fetch("1", -1, 3)
+
+    cache = fastadir.chunk_cache
+    assert cache.hits > 0 and cache.evictions > 0 and cache.nbytes <= 16
+    cache.clear()
+    assert fd.fetch("1", 5, 7) == seq[5:7]
+    assert len(cache) == 1 and fd.fetch("1", 4, 8) == seq[4:8] and cache.hits == 1
+
+    shutil.rmtree(tmpdir)
+
+
 if __name__ == "__main__":
     import logging
 
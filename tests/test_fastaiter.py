@@ -73,3 +73,32 @@ def test_multiline():
     # should be empty now
     with pytest.raises(StopIteration):
         next(iterator)
+
+
+def test_chunked():
+    data = StringIO(">seq1\nACGT\nTGCA\nAA\n>seq2\n>seq3 desc\nTTTT\n")
+
+    iterator = FastaIter(data, chunk_size=5)
+
+    header, chunks = next(iterator)
+    assert header == "seq1"
+    assert list(chunks) == ["ACGTTGCA", "AA"]
+
+    header, chunks = next(iterator)
+    assert header == "seq2"
+    assert list(chunks) == []
+
+    header, chunks = next(iterator)
+    assert header == "seq3 desc"
+    assert "".join(chunks) == "TTTT"
+
+    with pytest.raises(StopIteration):
+        next(iterator)
+
+
+def test_chunked_unconsumed():
+    data = StringIO("ignored\n>seq1\nACGT\nTGCA\n>seq2\nTTTT")
+
+    # records are returned correctly even if chunks are not consumed
+    headers = [header for header, _ in FastaIter(data, chunk_size=1)]
+    assert headers == ["seq1", "seq2"]
@@ -0,0 +1,54 @@
+from biocommons.seqrepo._internal import keyindex
+from biocommons.seqrepo._internal.keyindex import KeyMap, KeySet
+
+
+def test_keyset(monkeypatch):
+    monkeypatch.setattr(keyindex, "load_chunk_size", 3)
+    monkeypatch.setattr(keyindex, "min_merge_size", 4)
+    ks = KeySet.from_strings(f"s{i}" for i in range(10))
+    for i in range(10, 30):  # forces several merges
+        ks.add(f"s{i}")
+        ks.add(f"s{i}")
+    assert len(ks) == 30
+    assert all(f"s{i}" in ks for i in range(30))
+    assert "s30" not in ks
+    hashes = list(ks._map._entries.hashes)
+    assert hashes == sorted(hashes)
+
+
+def test_keymap(monkeypatch):
+    monkeypatch.setattr(keyindex, "load_chunk_size", 3)
+    monkeypatch.setattr(keyindex, "min_merge_size", 4)
+    km = KeyMap.from_items((f"a{i}", "q1") for i in range(10))
+    assert km.matches("a3", "q1")
+    assert not km.matches("a3", "q2")
+
+    for i in range(5, 20):  # reassigns a5..a9, adds a10..a19, and merges
+        km[f"a{i}"] = "q2"
+    km["a5"] = "q1"
+    assert [km.matches(f"a{i}", "q1") for i in range(10)] == [True] * 6 + [False] * 4
+    assert all(km.matches(f"a{i}", "q2") for i in range(6, 20))
+    assert not km.matches("a20", "q1")
+    hashes = list(km._entries.hashes)
+    assert hashes == sorted(set(hashes))
+
+
+def test_hash_collisions(monkeypatch):
+    """strings with equal hashes are distinguished"""
+    monkeypatch.setattr(keyindex, "load_chunk_size", 3)
+    monkeypatch.setattr(keyindex, "min_merge_size", 4)
+    monkeypatch.setattr(keyindex, "_hash", lambda s: len(s) % 2)
+    ks = KeySet.from_strings(f"s{i}" for i in range(0, 20, 2))
+    for i in range(1, 20, 2):
+        assert f"s{i}" not in ks
+        ks.add(f"s{i}")
+    assert len(ks) == 20
+    assert all(f"s{i}" in ks for i in range(20))
+    assert "s20" not in ks
+
+    km = KeyMap.from_items((f"a{i}", f"q{i}") for i in range(10))
+    for i in range(5, 15):
+        km[f"a{i}"] = "r"
+    assert [km.get(f"a{i}") for i in range(4, 7)] == ["q4", "r", "r"]
+    assert not km.matches("a3", "q4")
+    assert km.get("a15") is None
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from biocommons.seqrepo import SeqRepo
+from biocommons.seqrepo._internal import metrics
+from biocommons.seqrepo._internal.metrics import Histogram, Registry
+from biocommons.seqrepo.fastadir.fabgz import FabgzReader
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, "registry", Registry())
+    monkeypatch.setattr(metrics, "enabled", True)
+    return metrics.registry
+
+
+def test_histogram():
+    h = Histogram()
+    assert h.quantile(0.5) is None
+    for seconds in [0.000001, 0.00001, 0.0001, 0.5]:
+        h.observe(seconds)
+    snap = h.snapshot()
+    assert snap["count"] == 4 and snap["min"] == 0.000001 and snap["max"] == 0.5
+    assert snap["p50"] == 16e-6  # upper bound of bucket of 10us
+    assert snap["p99"] == 0.5
+
+
+def test_registry_and_hooks(enabled):
+    seen = []
+
+    def hook(name, value):
+        seen.append(name)
+
+    def bad_hook(name, value):
+        raise ValueError(name)
+
+    metrics.add_hook(hook)
+    metrics.registry.add_hook(bad_hook)  # errors are logged, not raised
+    metrics.incr("c", 2)
+    with metrics.Timer("t"):
+        pass
+    metrics.remove_hook(hook)
+    metrics.incr("c")
+    snap = enabled.snapshot()
+    assert snap["counters"] == {"c": 3} and snap["timers"]["t"]["count"] == 1
+    assert seen == ["c", "t"]
+
+    metrics.enable(False)
+    metrics.incr("c")
+    with metrics.Timer("t"):
+        pass
+    assert enabled.snapshot()["counters"] == {"c": 3}
+    enabled.reset()
+    assert enabled.snapshot() == {"counters": {}, "timers": {}}
+
+
+def test_seqrepo_metrics(make_seqrepo_dir, enabled):
+    seqrepo_dir = make_seqrepo_dir([("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}])])
+    with SeqRepo(seqrepo_dir) as sr:
+        assert sr.fetch("rose") == "SMELLASSWEET"
+        assert sr.fetch("rose", 0, 5) == "SMELL"
+        seqinfo = sr.sequences.fetch_seqinfo(sr._get_unique_seqid(alias="rose", namespace=None))
+        with FabgzReader(os.path.join(seqrepo_dir, "sequences", seqinfo["relpath"])) as fabgz:
+            fabgz.close()
+        m = sr.metrics()
+    assert m["enabled"]
+    timers = m["timers"]
+    for name in [
+        "seqrepo.store",
+        "seqrepo.commit",
+        "seqrepo.fetch",
+        "aliases.resolve",
+        "seqinfo.lookup",
+        "readers.open",
+        "fabgz.fetch",
+        "fabgz.lock_wait",
+    ]:
+        assert timers[name]["count"] >= 1, name
+    assert timers["seqrepo.fetch"]["count"] == 2
+    assert timers["aliases.resolve"]["count"] == 1  # then cached
+    assert m["counters"]["fabgz.bytes"] >= len("SMELLASSWEET")
+    assert m["caches"]["seq_ids"]["hits"] == 2
+    assert "hits" in m["readers"]
@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+
+import pytest
+
+from biocommons.seqrepo import SeqRepo
+from biocommons.seqrepo._internal.recorder import TraceRecorder
+from biocommons.seqrepo.bench import read_trace, replay
+from biocommons.seqrepo.cli import replay as replay_cli
+from biocommons.seqrepo.dataproxy import SeqRepoDataProxy
+
+
+@pytest.fixture
+def seqrepo_dir(make_seqrepo_dir):
+    return make_seqrepo_dir([("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}])])
+
+
+@pytest.mark.parametrize("fn", ["trace.jsonl", "trace.jsonl.gz"])
+def test_record_and_replay(tmp_path, seqrepo_dir, fn):
+    trace = str(tmp_path / fn)
+    with TraceRecorder(trace) as recorder, SeqRepo(seqrepo_dir, recorder=recorder) as sr:
+        assert sr.fetch("rose", 0, 5) == "SMELL"
+        assert sr.fetch_uri("en:rose") == "SMELLASSWEET"  # inner fetch() is not recorded
+        assert "en:rose" in sr.translate_identifier("rose")
+        with pytest.raises(KeyError):
+            sr.fetch("bogus")
+        dp = SeqRepoDataProxy(sr, recorder=recorder)
+        assert dp.get_metadata("en:rose")["length"] == 12
+        assert dp.get_sequence("en:rose", 1, 3) == "ME"
+    assert recorder.n_recorded == 6
+
+    records = list(read_trace(trace))
+    assert [r["op"] for r in records] == [
+        "fetch",
+        "fetch_uri",
+        "translate_identifier",
+        "fetch",
+        "get_metadata",
+        "get_sequence",
+    ]
+    assert records[0]["args"] == {"alias": "rose", "start": 0, "end": 5}
+    assert records[3]["error"] == "KeyError" and "error" not in records[0]
+    assert all(r["elapsed"] >= 0 for r in records)
+
+    with SeqRepo(seqrepo_dir) as sr:
+        report = replay(sr, records, concurrency=2)
+    assert report["n"] == 6 and report["all"]["n"] == 6
+    assert report["ops"]["fetch"]["n"] == 2
+    assert report["mismatches"] == {}
+
+    assert len(list(read_trace(trace, limit=2))) == 2
+
+
+def test_replay_mismatch_and_cli(tmp_path, seqrepo_dir):
+    trace = str(tmp_path / "trace.jsonl")
+    with open(trace, "w") as f:
+        f.write(json.dumps({"op": "fetch", "args": {"alias": "tulip"}, "elapsed": 0.001}) + "\n")
+    with SeqRepo(seqrepo_dir) as sr:
+        assert replay(sr, read_trace(trace))["mismatches"] == {"fetch: ok -> KeyError": 1}
+        with pytest.raises(ValueError):
+            replay(sr, [{"op": "store", "args": {}}])
+
+    opts = argparse.Namespace(
+        root_directory=os.path.dirname(seqrepo_dir),
+        instance_name=os.path.basename(seqrepo_dir),
+        trace=trace,
+        concurrency=1,
+        limit=None,
+        output=str(tmp_path / "report.json"),
+    )
+    replay_cli(opts)
+    with open(opts.output) as f:
+        assert json.load(f)["results"]["n"] == 1
@@ -93,6 +93,146 @@ def test_seqinfo():
     shutil.rmtree(tmpdir)
 
 
+def test_resolve_many():
+    tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_")
+    db = SeqAliasDB(os.path.join(tmpdir, "aliases.sqlite3"), writeable=True)
+    db.store_alias("q1", "A", "1")
+    db.store_alias("q2", "B", "1")
+    db.store_alias("q2", "A", "2")
+    db.store_alias("q3", "NCBI", "NM_01234.5")
+    db.store_alias("q4", "A", "3")
+    db.store_alias("q5", "A", "3")  # reassigns A:3 to q5
+
+    r = db.resolve_many(["A:1", "B:1", "2", "refseq:NM_01234.5", "A:3", "A:3", "1", "bogus"])
+    assert r["A:1"] == "q1"
+    assert r["B:1"] == "q2"
+    assert r["2"] == "q2"
+    assert r["refseq:NM_01234.5"] == "q3"
+    assert r["A:3"] == "q5"
+    assert isinstance(r["1"], KeyError)
+    assert "not unique" in str(r["1"])
+    assert isinstance(r["bogus"], KeyError)
+    assert len(r) == 7
+
+    # chunking must not change results
+    assert db.resolve_many(["A:1", "B:1", "2", "bogus"], chunk_size=1).keys() == {
+        "A:1",
+        "B:1",
+        "2",
+        "bogus",
+    }
+
+    db.close()
+    shutil.rmtree(tmpdir)
+
+
+def test_search_aliases():
+    tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_")
+    db = SeqAliasDB(os.path.join(tmpdir, "aliases.sqlite3"), writeable=True)
+    db.store_aliases([
+        ("q1", "NCBI", "NM_000551.3"),
+        ("q2", "NCBI", "NM_000551.4"),
+        ("q3", "NCBI", "NM_0005519.1"),
+        ("q4", "NCBI", "NMX0005"),
+        ("q5", "NCBI", "nm_000551.3"),
+        ("q1", "Ensembl", "ENST00000256474.3"),
+        ("q2", "Ensembl", "ENST00000256474.2"),
+        ("q6", "A", "x*ENST00000[1]"),
+    ])
+    db.store_alias("q7", "NCBI", "NM_000551.4")  # reassigns NCBI:NM_000551.4
+
+    def search(*args, **kwargs):
+        # stored records only; translated records (e.g., refseq) follow them
+        return [
+            (r["namespace"], r["alias"], r["seq_id"])
+            for r in db.search_aliases(*args, **kwargs)
+            if r["namespace"] in ("NCBI", "Ensembl", "A")
+        ]
+
+    def check_searches():
+        # prefix: case-sensitive, _ is not a wildcard, ordered by alias
+        assert search("NM_0005%", namespace="refseq") == [
+            ("NCBI", "NM_000551.3", "q1"),
+            ("NCBI", "NM_000551.4", "q7"),
+            ("NCBI", "NM_0005519.1", "q3"),
+        ]
+        assert [r[2] for r in search("NM_0005%", current_only=False)] == ["q1", "q2", "q7", "q3"]
+        assert [r["namespace"] for r in db.search_aliases("NM_000551.3")] == ["NCBI", "refseq"]
+        assert search("%ENST00000%", namespace="Ensembl") == [
+            ("Ensembl", "ENST00000256474.2", "q2"),
+            ("Ensembl", "ENST00000256474.3", "q1"),
+        ]
+        assert search("%*ENST00000[%") == [("A", "x*ENST00000[1]", "q6")]
+        assert search("%474.%3") == [("Ensembl", "ENST00000256474.3", "q1")]
+
+        # pages
+        pages = [search("%", namespace="NCBI", limit=2, offset=i) for i in range(0, 6, 2)]
+        assert [r[1] for page in pages for r in page] == [
+            "NMX0005",
+            "NM_000551.3",
+            "NM_000551.4",
+            "NM_0005519.1",
+            "nm_000551.3",
+        ]
+        assert search("%", limit=0) == []
+        with pytest.raises(ValueError, match="must not be negative"):
+            db.search_aliases("NM_%", limit=-1)
+
+    check_searches()
+    db.create_search_index()
+    db.create_search_index()  # no-op if the index exists
+    check_searches()
+    db.store_alias("q8", "Ensembl", "ENST00000999.1")  # indexed by trigger
+    assert search("%000009%") == [("Ensembl", "ENST00000999.1", "q8")]
+    db.commit()
+    db.close()
+
+    db = SeqAliasDB(os.path.join(tmpdir, "aliases.sqlite3"))
+    assert db._has_search_index()
+    assert search("%00009%") == search("%000009%")
+    with pytest.raises(RuntimeError):
+        db.create_search_index()
+    db.close()
+    shutil.rmtree(tmpdir)
+
+
+def test_store_aliases():
+    tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_")
+    records = [
+        ("q1", "A", "1"),
+        ("q1", "A", "1"),  # duplicate
+        ("q1", "A", "2"),
+        ("q1", "B", "1"),
+        ("q2", "A", "1"),  # reassign
+        ("q3", "refseq", "NM_01234.5"),  # stored as NCBI
+        ("q1", "A", "1"),  # reassign back
+        ("q2", "A", "2"),
+    ]
+    keys = ["seq_id", "namespace", "alias", "is_current"]
+
+    # store_aliases must match store_alias applied in order, for any batch size
+    db = SeqAliasDB(os.path.join(tmpdir, "expected.sqlite3"), writeable=True)
+    for r in records:
+        db.store_alias(*r)
+    expected = sorted(tuple(r[k] for k in keys) for r in db.find_aliases(current_only=False))
+    db.close()
+
+    for batch_size in (1, 2, 3, 10000):
+        db = SeqAliasDB(os.path.join(tmpdir, f"bulk{batch_size}.sqlite3"), writeable=True)
+        assert db.store_aliases(records, batch_size=batch_size) == 7
+        assert db.store_aliases(records[-2:]) == 0
+        found = sorted(tuple(r[k] for k in keys) for r in db.find_aliases(current_only=False))
+        assert found == expected
+        assert next(db.find_aliases(namespace="NCBI", alias="NM_01234.5"))["seq_id"] == "q3"
+        db.close()
+
+    db = SeqAliasDB(os.path.join(tmpdir, "expected.sqlite3"))
+    with pytest.raises(RuntimeError):
+        db.store_aliases(records)
+    db.close()
+    shutil.rmtree(tmpdir)
+
+
 def test_context_manager():
     """Test SeqAliasDB context manager support"""
     tmpdir = tempfile.mkdtemp(prefix="seqrepo_pytest_alias_ctx_")
@@ -1,6 +1,12 @@
+import gc
+import weakref
+
 import pytest
 
 from biocommons.seqrepo import SeqRepo
+from biocommons.seqrepo import seqrepo as seqrepo_module
+from biocommons.seqrepo._internal.digests import digest_sequence
+from biocommons.seqrepo.dataproxy import SeqRepoDataProxy
 from biocommons.seqrepo.seqrepo import SequenceProxy
 
 
@@ -10,9 +16,9 @@ def test_create(seqrepo):
 
 def test_seqrepo_dir_not_exist(tmpdir_factory):
     """Ensure that exception is raised for non-existent seqrepo directory"""
-    dir = str(tmpdir_factory.mktemp("seqrepo")) + "-IDONTEXIST"
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo")) + "-IDONTEXIST"
     with pytest.raises(OSError) as ex:
-        SeqRepo(dir, writeable=False)
+        SeqRepo(seqrepo_dir, writeable=False)
 
     assert "Unable to open SeqRepo directory" in str(ex.value)
 
@@ -56,6 +62,37 @@ def test_fetch(seqrepo):
     assert seqrepo.fetch_uri("fr:coin") == "ASINACORNER"
 
 
+def test_fetch_many(seqrepo):
+    requests = [
+        ("rose", None, None),
+        ("en:coin", 0, 4),
+        ("rosa", 5, 7),
+        ("fr:coin", None, None),
+        ("rose", 0, 1),
+    ]
+    assert seqrepo.fetch_many(requests) == ["SMELLASSWEET", "ASIN", "AS", "ASINACORNER", "S"]
+    assert seqrepo.fetch_many([]) == []
+
+    with pytest.raises(KeyError):
+        seqrepo.fetch_many([("rose", None, None), ("bogus", None, None)])
+
+
+def test_resolve_many(seqrepo):
+    r = seqrepo.resolve_many(["rose", "es:rosa", "coin", "bogus", "en:coin"])
+    assert r["rose"]["seq_id"] == r["es:rosa"]["seq_id"]
+    assert r["rose"]["len"] == len("SMELLASSWEET")
+    assert r["en:coin"]["relpath"]
+    assert isinstance(r["coin"], KeyError)  # ambiguous
+    assert isinstance(r["bogus"], KeyError)
+
+    # errors are those raised for single lookups
+    r = seqrepo.resolve_many(["coin", "bogus", "en:bogus"])
+    for identifier, error in r.items():
+        with pytest.raises(KeyError) as excinfo:
+            seqrepo[identifier]
+        assert type(error) is type(excinfo.value) and str(error) == str(excinfo.value)
+
+
 def test_digests(seqrepo):
     """tests one set of digests"""
 
@@ -68,6 +105,49 @@ def test_digests(seqrepo):
     assert seqrepo.fetch_uri("VMC:GS_LDz34B6fA_fLxFoc2agLrXQRYuupOGGM") == "ASINACORNER"
 
 
+def test_store_many(make_seqrepo_dir, monkeypatch):
+    records = [
+        ("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}]),
+        (["ASIN", "CHANGE"], [{"namespace": "en", "alias": "coin"}]),
+        ("smellassweet", [{"namespace": "es", "alias": "rosa"}]),
+        (["ASINA", "CORNER"], [{"namespace": "fr", "alias": "coin"}]),
+    ]
+    # with parallel_max_size 10, sequences are stored in both the pool and this process
+    for jobs, max_size in ((1, None), (2, None), (2, 10)):
+        if max_size is not None:
+            monkeypatch.setattr(seqrepo_module, "parallel_max_size", max_size)
+        with SeqRepo(make_seqrepo_dir(), writeable=True) as sr:
+            results = list(sr.store_many(records, jobs=jobs))
+            sr.commit()
+            assert [n_seqs for n_seqs, _ in results] == [1, 1, 0, 1]
+            assert [n_aliases for _, n_aliases in results] == [1, 1, 1, 1]
+            assert sr.fetch("rosa") == "SMELLASSWEET"
+            assert sr.fetch_uri("MD5:ea81b52627e387fc6edd8b9412cd3a99") == "ASINACORNER"
+            seq_id = sr._get_unique_seqid(alias="coin", namespace="en")
+            assert sr.sequences.fetch_seqinfo(seq_id)["alpha"] == "ACEGHINS"
+
+
+def test_store_stream(make_seqrepo_dir, monkeypatch):
+    seq = "acgt" * 1000 + "nn"
+    with SeqRepo(make_seqrepo_dir(), writeable=True) as sr:
+        # force spooling to disk
+        monkeypatch.setattr("biocommons.seqrepo.seqrepo.spool_max_size", 100)
+        chunks = (seq[i : i + 333] for i in range(0, len(seq), 333))
+        assert sr.store_stream(chunks, [{"namespace": "en", "alias": "long"}]) == (1, 1)
+        assert sr.store_stream(iter([seq]), [{"namespace": "fr", "alias": "long"}]) == (0, 1)
+        sr.commit()
+
+        assert sr.fetch_uri("en:long") == seq.upper()
+        assert sr.fetch_uri("fr:long", 3998, 4002) == "GTNN"
+        seq_id = sr._get_unique_seqid(alias="long", namespace="en")
+        assert sr.sequences.fetch_seqinfo(seq_id)["len"] == len(seq)
+        assert sr.sequences.fetch_seqinfo(seq_id)["alpha"] == "ACGNT"
+
+        # same digests as store()
+        assert sr.store(seq, [{"namespace": "es", "alias": "long"}]) == (0, 1)
+        assert sr._get_unique_seqid(alias="long", namespace="es") == seq_id
+
+
 def test_errors(seqrepo_ro):
     with pytest.raises(RuntimeError):
         seqrepo_ro.store("SHOULDFAIL", [{"namespace": "fr", "alias": "coin"}])
@@ -87,8 +167,8 @@ def test_refseq_lookup(seqrepo):
 
 
 def test_namespace_translation(tmpdir_factory):
-    dir = str(tmpdir_factory.mktemp("seqrepo"))
-    seqrepo = SeqRepo(dir, writeable=True)
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo"))
+    seqrepo = SeqRepo(seqrepo_dir, writeable=True)
 
     # store sequences
     seqrepo.store("NCBISEQUENCE", [{"namespace": "NCBI", "alias": "ncbiac"}])
@@ -146,26 +226,26 @@ def test_sequenceproxy(seqrepo):
 
 def test_context_manager(tmpdir_factory):
     """Test SeqRepo context manager support"""
-    dir = str(tmpdir_factory.mktemp("seqrepo_ctx"))
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo_ctx"))
 
     # Test with statement for resource cleanup
-    with SeqRepo(dir, writeable=True) as sr:
+    with SeqRepo(seqrepo_dir, writeable=True) as sr:
         sr.store("ATCGATCGATCG", [{"namespace": "test", "alias": "test_alias"}])
         sr.commit()
         assert "test_alias" in sr
 
     # After exiting context, database should be closed
     # (We can't directly test closure, but we can verify it doesn't error on re-open)
-    sr_reopened = SeqRepo(dir, writeable=False)
+    sr_reopened = SeqRepo(seqrepo_dir, writeable=False)
     assert "test_alias" in sr_reopened
     sr_reopened.close()
 
 
 def test_explicit_close(tmpdir_factory):
     """Test explicit close() method"""
-    dir = str(tmpdir_factory.mktemp("seqrepo_close"))
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo_close"))
 
-    sr = SeqRepo(dir, writeable=True)
+    sr = SeqRepo(seqrepo_dir, writeable=True)
     sr.store("GCTAGCTAGCTA", [{"namespace": "test", "alias": "test_alias2"}])
     sr.commit()
 
@@ -173,16 +253,16 @@ def test_explicit_close(tmpdir_factory):
     sr.close()
 
     # Verify we can reopen without issues
-    sr_reopened = SeqRepo(dir, writeable=False)
+    sr_reopened = SeqRepo(seqrepo_dir, writeable=False)
     assert "test_alias2" in sr_reopened
     sr_reopened.close()
 
 
 def test_close_multiple_times(tmpdir_factory):
     """Test that close() is safe to call multiple times"""
-    dir = str(tmpdir_factory.mktemp("seqrepo_multi_close"))
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo_multi_close"))
 
-    sr = SeqRepo(dir, writeable=True)
+    sr = SeqRepo(seqrepo_dir, writeable=True)
     sr.store("TTAACCGGTTAA", [{"namespace": "test", "alias": "test_alias3"}])
     sr.commit()
 
@@ -192,7 +272,7 @@ def test_close_multiple_times(tmpdir_factory):
     sr.close()  # And again for good measure
 
     # Verify we can still reopen after multiple closes
-    sr_reopened = SeqRepo(dir, writeable=False)
+    sr_reopened = SeqRepo(seqrepo_dir, writeable=False)
     assert "test_alias3" in sr_reopened
     sr_reopened.close()
 
@@ -233,6 +313,94 @@ def test_sequenceproxy_hash_and_reversed(seqrepo):
     assert str(sp)[::-1] == reversed(sp)
 
 
+def test_sequenceproxy_no_fetch(seqrepo, monkeypatch, record_fetches):
+    """hash, bool, and proxy equality don't fetch the sequence"""
+    sp1 = SequenceProxy(seqrepo, namespace=None, alias="rosa")
+    sp2 = SequenceProxy(seqrepo, namespace="en", alias="rose")
+    sp3 = SequenceProxy(seqrepo, namespace="en", alias="coin")
+    fetches = record_fetches(seqrepo)
+
+    assert sp1 and hash(sp1) == hash(sp2)
+    assert sp1 == sp2 and sp1 != sp3
+    assert len({sp1, sp2, sp3}) == 2
+    assert sp1 != "SHORT" and sp1 != 42
+    assert fetches == []
+
+    monkeypatch.setattr(seqrepo_module, "compare_chunk_size", 5)
+    assert sp1 == "SMELLASSWEET"
+    assert len(fetches) == 3
+    assert sp1 != "XMELLASSWEET"
+    assert len(fetches) == 4  # stops at the first mismatched chunk
+
+
+def test_sequenceproxy_search(make_seqrepo_dir, monkeypatch):
+    """iteration, in, index, and count match str, across chunk boundaries"""
+    monkeypatch.setattr(seqrepo_module, "iter_chunk_size", 3)
+    monkeypatch.setattr(seqrepo_module, "search_chunk_size", 4)
+    seq = "GAATTCAAAAGAATTCGAATTCAAAAAAG"
+    with SeqRepo(make_seqrepo_dir([(seq, [{"namespace": "en", "alias": "s"}])])) as sr:
+        sp = sr["s"]
+        assert list(sp) == list(seq)
+        ranges = [(None, None), (1, None), (3, 20), (-10, None), (5, 5), (5, 2), (-3, -5), (30, 40)]
+        for sub in ["GAATTC", "AA", "AAA", "G", "", "GAATTCGAATTC", "TTT", seq, seq + "A"]:
+            assert (sub in sp) == (sub in seq), sub
+            assert sp.count(sub) == seq.count(sub), sub
+            for start, end in ranges:
+                assert sp.count(sub, start, end) == seq.count(sub, start, end), (sub, start, end)
+                try:
+                    expected = seq.index(sub, start, end)
+                except ValueError:
+                    with pytest.raises(ValueError):
+                        sp.index(sub, start, end)
+                else:
+                    assert sp.index(sub, start, end) == expected
+        assert 42 not in sp
+
+
+def test_sequenceproxy_window(make_seqrepo_dir, monkeypatch, record_fetches):
+    """small slices are served from a padded window around the last slice"""
+    monkeypatch.setattr(seqrepo_module, "window_pad", 4)
+    monkeypatch.setattr(seqrepo_module, "window_max_size", 12)
+    seq = "ACGTTGCAACGGTTAACCGGTA"
+    with SeqRepo(make_seqrepo_dir([(seq, [{"namespace": "en", "alias": "s"}])])) as sr:
+        sp = sr["s"]
+        fetches = record_fetches(sr)
+        assert sp[10:12] == seq[10:12]
+        assert sp[8:14] == seq[8:14] and sp[6:16] == seq[6:16] and sp[9] == seq[9]
+        assert len(fetches) == 1
+        assert sp[4:8] == seq[4:8]  # outside window; refetched
+        assert sp[0:2] == seq[0:2] and sp[18:30] == seq[18:30] and sp[20:40] == seq[20:40]
+        assert sp[0:20] == seq[0:20]  # larger than window_max_size; not windowed
+        assert len(fetches) == 5
+
+
+def test_sequenceproxy_lazy(seqrepo):
+    sp = SequenceProxy(seqrepo, namespace=None, alias="bogus")  # not resolved yet
+    with pytest.raises(KeyError):
+        len(sp)
+    with pytest.raises(KeyError):
+        seqrepo["bogus"]
+
+    sp = seqrepo["en:rose"]
+    assert sp[0:5] == "SMELL" and sp._seqinfo is None
+    assert len(sp) == 12 and sp._seqinfo is not None
+
+
+def test_proxies(seqrepo, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(seqrepo.sequences, "fetch_seqinfo", lambda seq_id: pytest.fail("query"))
+        m.setattr(seqrepo, "_get_unique_seqid", lambda **kwargs: pytest.fail("query"))
+        sps = seqrepo.proxies(["rosa", "en:coin", "fr:coin", "rosa"])
+        assert [len(sp) for sp in sps] == [12, 10, 11, 12]
+        assert sps[0] == sps[3] and sps[1] != sps[2]
+    assert [str(sp) for sp in sps] == ["SMELLASSWEET", "ASINCHANGE", "ASINACORNER", "SMELLASSWEET"]
+
+    with pytest.raises(KeyError):
+        seqrepo.proxies(["rosa", "bogus"])
+    with pytest.raises(KeyError):
+        seqrepo.proxies(["coin"])  # not unique
+
+
 def test_sequenceproxy_repr(seqrepo):
     """Test SequenceProxy repr"""
     sp = SequenceProxy(seqrepo, namespace=None, alias="rosa")
@@ -270,8 +438,8 @@ def test_translate_identifier_with_target_namespaces(seqrepo):
 
 def test_getitem_with_use_sequenceproxy_false(tmpdir_factory):
     """Test __getitem__ when use_sequenceproxy=False returns string"""
-    dir = str(tmpdir_factory.mktemp("seqrepo_no_proxy"))
-    sr = SeqRepo(dir, writeable=True, use_sequenceproxy=False)
+    seqrepo_dir = str(tmpdir_factory.mktemp("seqrepo_no_proxy"))
+    sr = SeqRepo(seqrepo_dir, writeable=True, use_sequenceproxy=False)
     sr.store("ATCGATCG", [{"namespace": "test", "alias": "seq1"}])
     sr.commit()
 
@@ -298,3 +466,127 @@ def test_store_exception_handling(seqrepo):
     seqrepo.store("NEWSEQ", [{"namespace": "test", "alias": "newseq"}])
     seqrepo.commit()
     assert "newseq" in seqrepo
+
+
+def test_result_cache(make_seqrepo_dir):
+    seqrepo_dir = make_seqrepo_dir([
+        ("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}]),
+        ("ASINCHANGE", [{"namespace": "en", "alias": "coin"}]),
+    ])
+    with SeqRepo(seqrepo_dir) as sr:
+        assert not sr._result_cache.enabled
+        assert sr.fetch("rose", 1, 4) == "MEL"
+
+    with SeqRepo(seqrepo_dir, result_cache_bytes=16, result_cache_policy="tinylfu") as sr:
+        cache = sr._result_cache
+        assert sr.fetch("rose", 1, 4) == "MEL"
+        assert sr.fetch("rose", 1, 4) == "MEL"
+        assert sr.fetch_uri("en:rose", 1, 4) == "MEL"
+        assert cache.hits == 2 and len(cache) == 1
+        assert sr.fetch_many([("coin", None, None), ("rose", 1, 4)]) == ["ASINCHANGE", "MEL"]
+        assert cache.hits == 3 and cache.nbytes == 13
+
+    with pytest.raises(ValueError):
+        SeqRepo(seqrepo_dir, result_cache_bytes=16, result_cache_policy="bogus")
+
+
+def test_instance_caches(make_seqrepo_dir):
+    sr = SeqRepo(make_seqrepo_dir(), writeable=True)
+    sr.store("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}])
+    seq_id = sr._get_unique_seqid(alias="rose", namespace="en")
+    assert sr._get_unique_seqid(alias="rose", namespace="en") == seq_id
+    assert sr.cache_stats()["seq_ids"]["hits"] == 1
+
+    # reassigning an alias invalidates cached seq_ids
+    sr.store("ROSEBYANYOTHERNAME", [{"namespace": "en", "alias": "rose"}])
+    assert sr.fetch("rose", namespace="en") == "ROSEBYANYOTHERNAME"
+    new_seq_id = sr._get_unique_seqid(alias="rose", namespace="en")
+    sr.aliases.store_aliases([(seq_id, "en", "rose")])
+    sr.commit()
+    assert sr._get_unique_seqid(alias="rose", namespace="en") == seq_id
+    assert sr.cache_stats()["seq_ids"]["invalidations"] >= 1
+
+    # storing a sequence invalidates its seqinfo
+    assert sr.sequences.fetch_seqinfo(new_seq_id)["len"] == 18
+    assert new_seq_id in sr.sequences._seqinfo_cache
+    sr.sequences._seqinfo_cache.put("q1", {"len": 0})
+    sr.sequences.store("q1", "SEQ")
+    assert "q1" not in sr.sequences._seqinfo_cache
+
+    caches = sr.caches
+    assert set(caches) == {"seq_ids", "misses", "seqinfo", "results", "chunks"}
+    caches["seq_ids"].resize(max_entries=1)
+    sr.fetch("rose", namespace="en")
+    sr.fetch("rose")
+    assert len(caches["seq_ids"]) == 1 and ("rose", None) in caches["seq_ids"]
+    caches["seqinfo"].clear()
+    assert caches["seqinfo"].stats()["entries"] == 0
+    sr.close()
+
+    # caches belong to the instance, so closed repos are not kept alive
+    ref = weakref.ref(sr)
+    del sr, caches
+    gc.collect()
+    assert ref() is None
+
+
+def test_negative_cache(make_seqrepo_dir, monkeypatch):
+    sr = SeqRepo(make_seqrepo_dir(), writeable=True)
+    sr.store("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}])
+    sr.store("ROSA", [{"namespace": "es", "alias": "rose"}])
+    sr.commit()
+
+    queries = []
+    find_aliases = sr.aliases.find_aliases
+    monkeypatch.setattr(
+        sr.aliases, "find_aliases", lambda **kw: queries.append(kw) or find_aliases(**kw)
+    )
+    for _ in range(3):
+        with pytest.raises(KeyError, match="Alias tulip"):
+            sr.fetch("tulip")
+        with pytest.raises(KeyError, match="not unique"):
+            sr.fetch("rose")
+        assert "tulip" not in sr
+        assert "rose" in sr
+    assert len(queries) == 2
+    assert sr.cache_stats()["misses"]["entries"] == 2
+
+    # storing aliases invalidates misses
+    sr.store("TULIPA", [{"namespace": "en", "alias": "tulip"}])
+    assert "tulip" in sr
+    assert sr.fetch("tulip") == "TULIPA"
+
+    # the data proxy shares the caches, but still returns metadata for
+    # the first of several matches
+    dp = SeqRepoDataProxy(sr)
+    with pytest.raises(KeyError):
+        dp.get_metadata("en:daisy")
+    assert dp.get_metadata("en:t%")["length"] == len("TULIPA")
+    sr.store("TOMATOES", [{"namespace": "en", "alias": "tomato"}])
+    md = dp.get_metadata("en:t%")
+    assert "en:tulip" in md["aliases"] or "en:tomato" in md["aliases"]
+    sr.close()
+
+
+def test_digest_fast_path(make_seqrepo_dir, monkeypatch):
+    # a fresh instance, so that no lookups are served from caches
+    sr = SeqRepo(make_seqrepo_dir([("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}])]))
+    seq_id = digest_sequence("SMELLASSWEET")["seq_id"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("alias database queried")
+
+    monkeypatch.setattr(sr.aliases, "find_aliases", fail)
+    monkeypatch.setattr(sr.aliases, "resolve_many", fail)
+    for identifier in (f"ga4gh:SQ.{seq_id}", f"sha512t24u:{seq_id}", f"VMC:GS_{seq_id}"):
+        assert identifier in sr
+        assert sr.fetch_uri(identifier, 0, 5) == "SMELL"
+        assert sr.fetch_many([(identifier, 5, 7)]) == ["AS"]
+        assert sr.resolve_many([identifier])[identifier]["seq_id"] == seq_id
+
+    unknown = "ga4gh:SQ." + "A" * 32
+    assert unknown not in sr
+    with pytest.raises(KeyError):
+        sr.fetch_uri(unknown)
+    assert isinstance(sr.resolve_many([unknown])[unknown], KeyError)
+    sr.close()
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import stat
+import threading
+
+import pytest
+
+from biocommons.seqrepo import SeqRepo
+from biocommons.seqrepo._internal import sqlite
+from biocommons.seqrepo._internal.sqlite import (
+    ConnectionPool,
+    cached_schema_version,
+    connect,
+    is_immutable,
+)
+
+
+@pytest.fixture
+def root_dir(tmpdir_factory):
+    root_dir = str(tmpdir_factory.mktemp("seqrepo"))
+    with SeqRepo(root_dir, writeable=True) as sr:
+        sr.store("SMELLASSWEET", [{"namespace": "en", "alias": "rose"}])
+        sr.commit()
+    return root_dir
+
+
+def _drop_write(root_dir):
+    for dirpath, _, filenames in os.walk(root_dir):
+        for p in [dirpath] + [os.path.join(dirpath, fn) for fn in filenames]:
+            os.chmod(p, os.stat(p).st_mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def test_connect(root_dir):
+    path = os.path.join(root_dir, "aliases.sqlite3")
+    assert not is_immutable(path)
+    db = connect(path)
+    assert db.execute("pragma query_only").fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError):
+        db.execute("delete from seqalias")
+    db.close()
+
+    with pytest.raises(ValueError):
+        connect(path, writeable=True, immutable=True)
+
+
+def test_immutable(root_dir):
+    _drop_write(root_dir)
+    assert is_immutable(os.path.join(root_dir, "aliases.sqlite3"))
+    with SeqRepo(root_dir) as sr:
+        assert sr.aliases._immutable and sr.sequences._immutable
+        assert sr["en:rose"] == "SMELLASSWEET"
+    with SeqRepo(root_dir, immutable=False) as sr:
+        assert not sr.aliases._immutable and not sr.sequences._immutable
+        assert sr["en:rose"] == "SMELLASSWEET"
+
+
+def test_cached_schema_version(root_dir, monkeypatch):
+    monkeypatch.setattr(sqlite, "_schema_versions", {})
+    path = os.path.join(root_dir, "aliases.sqlite3")
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return 1
+
+    assert cached_schema_version(path, False, fetch) == 1
+    assert cached_schema_version(path, True, fetch) == 1
+    assert cached_schema_version(path, True, fetch) == 1
+    assert len(calls) == 2
+
+
+def test_connection_pool(root_dir):
+    path = os.path.join(root_dir, "aliases.sqlite3")
+    pool = ConnectionPool(lambda: connect(path, check_same_thread=False))
+    db = pool.get()
+    assert pool.get() is db
+
+    found = []
+
+    def _worker():
+        found.append(pool.get())
+        found.append(pool.get())
+
+    threads = [threading.Thread(target=_worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+        t.join()
+    assert len({id(c) for c in found}) == 3 and db not in found
+    assert found[0] is found[1]
+    assert len(pool) == 2  # connections of exited threads are closed on next open
+
+    pool.close()
+    pool.close()
+    assert len(pool) == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        db.execute("select 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.get()
+
+    pool = ConnectionPool(lambda: connect(path, check_same_thread=False), per_thread=False)
+    t = threading.Thread(target=lambda: found.append(pool.get()))
+    t.start()
+    t.join()
+    assert pool.get() is found[-1]
+    pool.close()
+
+
+def test_seqrepo_threads(root_dir):
+    sr = SeqRepo(root_dir)
+    results = []
+
+    def _worker():
+        results.append(str(sr["en:rose"]))
+
+    threads = [threading.Thread(target=_worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["SMELLASSWEET"] * 4
+    sr.close()
+    assert len(sr.aliases._pool) == 0